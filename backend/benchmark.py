@@ -0,0 +1,83 @@
+"""後端效能量測：以合成歌單語料比較處理流程的執行時間與記憶體峰值。
+
+用法（在專案根目錄執行）：
+    python backend/benchmark.py --files 2000 --songs-per-file 30 --unique 20000 records
+    python backend/benchmark.py --unique 100000 query
+    python backend/benchmark.py --unique 100000 duplicates
+    python backend/benchmark.py --files 2000 watch
+    python backend/benchmark.py --unique 100000 tags
+    python backend/benchmark.py --unique 20000 rules
+    python backend/benchmark.py --unique 100000 stats
+    python backend/benchmark.py --files 10000 pack
+    python backend/benchmark.py --unique 100000 readings
+    python backend/benchmark.py --unique 100000 orders
+    python backend/benchmark.py quota
+    python backend/benchmark.py --files 2000 pipeline
+    python backend/benchmark.py --files 5000 lint
+    python backend/benchmark.py --unique 500 registry
+    python backend/benchmark.py --repeat 5 startup
+    python backend/benchmark.py --files 5000 stream
+    python backend/benchmark.py --unique 20000 canonical
+    python backend/benchmark.py --files 2000 setlists
+    python backend/benchmark.py --unique 20000 disc
+    python backend/benchmark.py --files 10700 --songs-per-file 23 --unique 100000 cooccurrence   # 目前的 100 倍
+
+各功能的量測在 backend/benchmarks/bench_<子命令>.py，共用的合成語料與量測工具在 backend/benchmarks/__init__.py。
+"""
+import argparse
+
+from benchmarks.bench_canonical import bench_canonical
+from benchmarks.bench_cooccurrence import bench_cooccurrence
+from benchmarks.bench_disc import bench_disc
+from benchmarks.bench_duplicates import bench_duplicates
+from benchmarks.bench_lint import bench_lint
+from benchmarks.bench_orders import bench_orders
+from benchmarks.bench_pack import bench_pack
+from benchmarks.bench_pipeline import bench_pipeline
+from benchmarks.bench_query import bench_query
+from benchmarks.bench_quota import bench_quota
+from benchmarks.bench_readings import bench_readings
+from benchmarks.bench_records import bench_records
+from benchmarks.bench_registry import bench_registry
+from benchmarks.bench_rules import bench_rules
+from benchmarks.bench_setlists import bench_setlists
+from benchmarks.bench_startup import bench_startup
+from benchmarks.bench_stats import bench_stats
+from benchmarks.bench_stream import bench_stream
+from benchmarks.bench_tags import bench_tags
+from benchmarks.bench_watch import bench_watch
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000, help='合成歌單檔案數')
+    parser.add_argument('--songs-per-file', type=int, default=30, help='每個歌單的曲數')
+    parser.add_argument('--unique', type=int, default=20000, help='不重複歌曲數')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='計時重複次數（取最佳值）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('records', help=bench_records.__doc__).set_defaults(func=bench_records)
+    subparsers.add_parser('query', help=bench_query.__doc__).set_defaults(func=bench_query)
+    subparsers.add_parser('duplicates', help=bench_duplicates.__doc__).set_defaults(func=bench_duplicates)
+    subparsers.add_parser('watch', help=bench_watch.__doc__).set_defaults(func=bench_watch)
+    subparsers.add_parser('tags', help=bench_tags.__doc__).set_defaults(func=bench_tags)
+    subparsers.add_parser('rules', help=bench_rules.__doc__).set_defaults(func=bench_rules)
+    subparsers.add_parser('stats', help=bench_stats.__doc__).set_defaults(func=bench_stats)
+    subparsers.add_parser('pack', help=bench_pack.__doc__).set_defaults(func=bench_pack)
+    subparsers.add_parser('readings', help=bench_readings.__doc__).set_defaults(func=bench_readings)
+    subparsers.add_parser('orders', help=bench_orders.__doc__).set_defaults(func=bench_orders)
+    subparsers.add_parser('quota', help=bench_quota.__doc__).set_defaults(func=bench_quota)
+    subparsers.add_parser('pipeline', help=bench_pipeline.__doc__).set_defaults(func=bench_pipeline)
+    subparsers.add_parser('lint', help=bench_lint.__doc__).set_defaults(func=bench_lint)
+    subparsers.add_parser('registry', help=bench_registry.__doc__).set_defaults(func=bench_registry)
+    subparsers.add_parser('startup', help=bench_startup.__doc__).set_defaults(func=bench_startup)
+    subparsers.add_parser('stream', help=bench_stream.__doc__).set_defaults(func=bench_stream)
+    subparsers.add_parser('canonical', help=bench_canonical.__doc__).set_defaults(func=bench_canonical)
+    subparsers.add_parser('setlists', help=bench_setlists.__doc__).set_defaults(func=bench_setlists)
+    subparsers.add_parser('disc', help=bench_disc.__doc__).set_defaults(func=bench_disc)
+    subparsers.add_parser('cooccurrence', help=bench_cooccurrence.__doc__).set_defaults(func=bench_cooccurrence)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
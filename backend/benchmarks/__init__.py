@@ -0,0 +1,181 @@
+"""benchmark.py 各子命令共用的工具：合成語料、計時與記憶體量測、載入舊版模組作為比較基準。
+
+各功能的量測在 bench_<子命令>.py，由 backend/benchmark.py 統一註冊成子命令。
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/
+ROOT_DIR = os.path.dirname(BASE_DIR)
+TIMELINE_DIR = os.path.join(ROOT_DIR, 'timeline')
+
+sys.path.insert(0, BASE_DIR)
+
+BASELINE_REVISION = 'b03cfb5'  # 改為 Song/Appearance 記錄型別之前的版本
+RECORDS_REVISION = 'df4fc65'   # 改為記錄型別的版本
+
+# 合成曲名用的字元表（混合假名、漢字與英文，接近實際歌單）
+KANA = 'あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん'
+KATAKANA = 'アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン'
+KANJI = ''.join(chr(0x4E00 + i * 7) for i in range(2500))  # 約 2500 個常見範圍內的漢字
+LATIN = 'abcdefghijklmnopqrstuvwxyz'
+
+def load_module(filename, name=None):
+    """以檔名載入 backend 內的模組（可載入 process_timeline.old.py 這類非標準檔名）"""
+    name = name or filename.replace('.py', '').replace('.', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_revision(revision, filename, name=None):
+    """以 git show 取出某個版本的 backend 模組並載入（與目前的模組並存，作為比較基準）"""
+    source = subprocess.run(['git', 'show', f'{revision}:backend/{filename}'], cwd=ROOT_DIR, check=True,
+                            capture_output=True).stdout
+    directory = tempfile.mkdtemp(prefix='songlist-revision-')
+    try:
+        path = os.path.join(directory, filename)
+        with open(path, 'wb') as f:
+            f.write(source)
+        spec = importlib.util.spec_from_file_location(name or f"{filename[:-3]}_{revision}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return module
+
+def random_word(rng, length):
+    alphabet = rng.choice((KANA, KATAKANA, KANJI, LATIN))
+    word = ''.join(rng.choice(alphabet) for _ in range(length))
+    return word.capitalize() if alphabet is LATIN else word
+
+def make_song_pool(unique, seed=0):
+    """產生 (曲名, 歌手, 出典) 的合成歌曲池"""
+    rng = random.Random(seed)
+    artists = [random_word(rng, rng.randint(2, 6)) for _ in range(max(1, unique // 8))]
+    sources = [random_word(rng, rng.randint(3, 10)) for _ in range(max(1, unique // 12))]
+    pool = []
+    for i in range(unique):
+        song_name = f"{random_word(rng, rng.randint(2, 8))}{i}"
+        source = rng.choice(sources) if rng.random() < 0.6 else ''
+        pool.append((song_name, rng.choice(artists), source))
+    return pool
+
+def make_song_entries(unique, seed=0, appearances=5):
+    """產生 data.json 格式的合成歌曲（含 tags 與日期），供不經過解析的量測使用"""
+    rng = random.Random(seed)
+    tag_pool = ['Showa', '90s', '00s', '10s', '20s', 'Female', 'Male', 'Anime', 'Game', 'Vocaloid', 'Folk']
+    start = datetime(2023, 10, 28)
+    entries = []
+    for song_name, artist, source in make_song_pool(unique, seed):
+        dates = []
+        for _ in range(rng.randint(1, appearances * 2 - 1)):
+            date_str = (start + timedelta(days=rng.randrange(3000))).strftime('%Y%m%d')
+            dates.append({'date': date_str, 'time': '01:00:00',
+                          'link': 'https://www.youtube.com/watch?v=xxxxxxxxxxx&t=3600s',
+                          'is_member_exclusive': False, 'is_acapella': False, 'is_private': False})
+        entries.append({
+            'song_name': song_name, 'artist': artist, 'source': source,
+            'is_copyright': False, 'az': None, 'dates': dates,
+            'tags': rng.sample(tag_pool, rng.randint(0, 4)),
+            'source_en': '', '_searchableSources': source,
+        })
+    return entries
+
+def make_synthetic_timeline(root, files=2000, songs_per_file=30, unique=20000, seed=0):
+    """在 root/timeline 建立合成歌單，規則檔沿用實際的 timeline 規則檔"""
+    timeline_dir = os.path.join(root, 'timeline')
+    os.makedirs(timeline_dir, exist_ok=True)
+    for rule_file in ('exceptions.txt', 'acapella.txt', 'headers.txt', 'tags.txt'):
+        shutil.copy(os.path.join(TIMELINE_DIR, rule_file), timeline_dir)
+
+    rng = random.Random(seed)
+    pool = make_song_pool(unique, seed)
+    start = datetime(2024, 1, 27)
+    for n in range(files):
+        date_str = (start + timedelta(days=n)).strftime('%Y%m%d')
+        video_id = ''.join(rng.choice(LATIN + LATIN.upper() + '0123456789-_') for _ in range(11))
+        lines = [f'ID = {video_id}', '💐🌟🎶タイムスタンプ💐🌟🎶']
+        seconds = 300
+        for i, (song_name, artist, source) in enumerate(rng.sample(pool, min(songs_per_file, len(pool))), 1):
+            seconds += rng.randint(180, 420)
+            time_str = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+            if source:
+                lines.append(f"{i:02d}.    {time_str}    {song_name}  / 『{source}』{artist}")
+            else:
+                lines.append(f"{i:02d}.    {time_str}    {song_name} / {artist}")
+        with open(os.path.join(timeline_dir, f'{date_str}.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    return timeline_dir
+
+def measure(func, *args, repeat=1):
+    """回傳 (最佳執行秒數, tracemalloc 記憶體峰值 bytes)，執行期間的輸出一律丟棄"""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            func(*args)
+            best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def print_table(title, rows):
+    print(f"\n== {title}")
+    print(f"{'engine':<28}{'time (s)':>12}{'peak (MiB)':>14}")
+    for name, seconds, peak in rows:
+        print(f"{name:<28}{seconds:>12.3f}{peak / 1048576:>14.1f}")
+
+@contextlib.contextmanager
+def synthetic_workdir(args):
+    """建立合成語料並切換工作目錄（各腳本以相對路徑讀寫 timeline/ 與 data.json）"""
+    root = tempfile.mkdtemp(prefix='songlist-bench-')
+    cwd = os.getcwd()
+    try:
+        t0 = time.perf_counter()
+        make_synthetic_timeline(root, args.files, args.songs_per_file, args.unique, args.seed)
+        # readings.py 與 sort_orders.py 建置時讀取網頁的羅馬拼音表
+        shutil.copytree(os.path.join(ROOT_DIR, 'js'), os.path.join(root, 'js'))
+        print(f"Generated {args.files} files x {args.songs_per_file} songs "
+              f"({args.unique} unique) in {time.perf_counter() - t0:.2f}s")
+        os.chdir(root)
+        yield root
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+def merge_catalogue(file_results, tags_map):
+    """依序合併各歌單的解析結果（Song 列表的列表），不修改輸入的 Song 物件。
+
+    串流化以前 build_catalogue 的合併方式，作為 stream 與 watch 的比較基準。
+    """
+    from process_timeline import Song
+
+    all_data = {}
+    for songs in file_results:
+        for song in songs:
+            merged = all_data.get(song.key)
+            if merged is None:
+                merged = all_data[song.key] = Song(
+                    song.key, song.song_name, song.artist, song.source, song.is_copyright, song.az
+                )
+            # Song.merge 會一併收集所有出現過的出典寫法
+            merged.merge(song)
+    for key, song in all_data.items():
+        song.tags = tags_map.get(key, [])
+    return list(all_data.values())
@@ -0,0 +1,40 @@
+"""benchmark.py 的 canonical 子命令。
+
+    python backend/benchmark.py --unique 20000 canonical
+"""
+import contextlib
+import io
+import random
+import unicodedata
+
+from benchmarks import make_song_pool, measure, print_table
+
+def _spelling_variant(rng, source):
+    """同一作品的另一種寫法：全形化、加上補充說明或系列名後綴"""
+    choice = rng.randrange(3)
+    if choice == 0:
+        return unicodedata.normalize('NFKC', source).upper() + '！'
+    if choice == 1:
+        return source + rng.choice(['(アニメ)', '(ゲーム)', '（劇場版）'])
+    return source + ' ' + rng.choice(['2nd Season', '完結編', 'OVA'])
+
+def bench_canonical(args):
+    """canonical.py：出典與歌手的跨歌曲等價類別，歌曲數加倍時的建置時間（應接近線性）"""
+    import canonical
+    from process_timeline import Song, normalize_key
+    rows = []
+    for scale in (1, 2, 4):
+        rng = random.Random(args.seed)
+        songs = []
+        for song_name, artist, source in make_song_pool(args.unique * scale, args.seed):
+            key = (normalize_key(song_name), normalize_key(artist))
+            song = Song(key, song_name, artist, source, False, None)
+            if source and rng.random() < 0.3:
+                song.sources.setdefault(_spelling_variant(rng, source), None)
+            songs.append(song)
+        spellings = len({source for song in songs for source in song.sources})
+        with contextlib.redirect_stdout(io.StringIO()):
+            classes = len(canonical.build_canonical(songs)['sources'])
+        rows.append((f'{len(songs)} songs ({spellings}->{classes})',)
+                    + measure(canonical.build_canonical, songs, repeat=args.repeat))
+    print_table('canonical source/artist classes', rows)
@@ -0,0 +1,35 @@
+"""benchmark.py 的 cooccurrence 子命令。
+
+    python backend/benchmark.py --files 10700 --songs-per-file 23 --unique 100000 cooccurrence   # 目前的 100 倍
+"""
+import json
+import random
+
+from benchmarks import measure, print_table
+
+def make_streams(streams, songs_per_stream, unique, seed=0):
+    """合成的每場歌單：熱門歌曲較常被唱（編號越小越熱門），同一場偶爾重複同一首"""
+    rng = random.Random(seed)
+    return [[int(unique * rng.random() ** 2) for _ in range(songs_per_stream)] for _ in range(streams)]
+
+def bench_cooccurrence(args):
+    """cooccurrence.py：直播數為四分之一、一半與全部時的共同出現與接續次數（純 Python／NumPy）"""
+    import cooccurrence
+    engines = [('pure Python', False)] + ([('NumPy', True)] if cooccurrence.np is not None else [])
+    if cooccurrence.np is None:
+        print("NumPy is not installed, skipping the vectorised engine")
+    rows = []
+    for fraction in (4, 2, 1):
+        streams = make_streams(args.files // fraction, args.songs_per_file, args.unique, args.seed)
+        results = [cooccurrence.compute_cooccurrence(streams, args.unique, use_numpy=use_numpy)
+                   for _, use_numpy in engines]
+        if any(result != results[0] for result in results):
+            raise AssertionError("NumPy and pure Python co-occurrence differ")
+        for name, use_numpy in engines:
+            rows.append((f'{len(streams)} streams, {name}',)
+                        + measure(cooccurrence.compute_cooccurrence, streams, args.unique, cooccurrence.TOP_K,
+                                  use_numpy, repeat=args.repeat))
+    size = len(json.dumps(results[0], separators=(',', ':')))
+    print_table(f"co-occurrence, {args.songs_per_file} songs per stream, {args.unique} songs "
+                f"({results[0]['pairs']} pairs, {results[0]['transitions']} transitions, {size / 1048576:.1f} MiB JSON)",
+                rows)
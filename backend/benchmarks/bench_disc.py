@@ -0,0 +1,54 @@
+"""benchmark.py 的 disc 子命令。
+
+    python backend/benchmark.py --unique 20000 disc
+"""
+import random
+
+from benchmarks import make_song_pool, measure, print_table, random_word
+
+def _decorated_title(rng, song_name):
+    """播放清單上的曲目標題：原樣、加上裝飾、一個字的錯字，或目錄中沒有的曲子"""
+    choice = rng.randrange(5)
+    if choice == 0:
+        return song_name
+    if choice == 1:
+        return f"{song_name} (feat. {random_word(rng, 4)})"
+    if choice == 2:
+        return f"【MV】{song_name} / {random_word(rng, 4)}"
+    if choice == 3 and len(song_name) >= 6:
+        i = rng.randrange(len(song_name) - 1)
+        return song_name[:i] + random_word(rng, 1) + song_name[i + 1:]
+    return random_word(rng, rng.randint(4, 10))
+
+def bench_disc(args):
+    """disc_links.py：專輯曲目對應歌曲，曲名索引＋刪字索引模糊比對（歌曲與曲目加倍時應接近線性）vs 兩兩計算相似度"""
+    import disc_links
+    from duplicates import loose_key, similarity
+    from process_timeline import Song, normalize_key
+    rows = []
+    for scale in (1, 2, 4):
+        rng = random.Random(args.seed)
+        pool = make_song_pool(args.unique * scale, args.seed)
+        songs = [Song((normalize_key(name), normalize_key(artist)), name, artist, source, False, None)
+                 for name, artist, source in pool]
+        titles = [_decorated_title(rng, rng.choice(pool)[0]) for _ in range(len(pool) // 20)]
+        disc = {'synthetic': {'name': 'Synthetic', 'albums': [
+            {'title': f'album {i}', 'tracks': [{'title': title, 'videoId': ''} for title in titles[i:i + 10]]}
+            for i in range(0, len(titles), 10)]}}
+        links = disc_links.build_links(songs, disc)
+        linked = sum(1 for entry in links['tracks'] if entry['songs'])
+        rows.append((f'{len(songs)} x {len(titles)} ({linked} linked)',)
+                    + measure(disc_links.build_links, songs, disc, repeat=args.repeat))
+        if scale == 1:
+            # 兩兩比較：每首曲目與所有歌曲計算編輯距離相似度；只量前 5 首曲目，再依曲目數換算
+            names = [loose_key(song.song_name) for song in songs]
+            sample = [loose_key(disc_links.clean_title(title)) for title in titles[:5]]
+            baseline = f'{len(songs)} x {len(titles)} pairwise*', len(titles)
+
+    def pairwise():
+        return [max(range(len(names)), key=lambda i: similarity(names[i], title)) for title in sample]
+
+    seconds, peak = measure(pairwise, repeat=args.repeat)
+    rows.append((baseline[0], seconds * baseline[1] / len(sample), peak))
+    print_table('disc track -> song links', rows)
+    print(f"* extrapolated from {len(sample)} tracks")
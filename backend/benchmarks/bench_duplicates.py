@@ -0,0 +1,54 @@
+"""benchmark.py 的 duplicates 子命令。
+
+    python backend/benchmark.py --unique 100000 duplicates
+"""
+import random
+import time
+
+from benchmarks import make_song_pool
+
+def _variant(rng, text):
+    """產生 normalize_key 無法合併的寫法差異（插入符號、漏字、重複字）"""
+    mid = rng.randrange(1, len(text)) if len(text) > 1 else 1
+    kind = rng.randrange(3)
+    if kind == 0:
+        return text[:mid] + rng.choice('・!?.,') + text[mid:]
+    if kind == 1 and len(text) > 5:
+        return text[:mid] + text[mid + 1:]
+    return text[:mid] + text[mid - 1] + text[mid:]
+
+def bench_duplicates(args):
+    """duplicates.py 分組比對：規模倍增時的執行時間與注入重複的召回率"""
+    import duplicates
+    from process_timeline import Song, normalize_key
+    rng = random.Random(args.seed)
+    print(f"{'songs':>8}{'candidates':>12}{'found':>8}{'recall':>8}{'time (s)':>10}{'naive est. (s)':>16}")
+    for n in (args.unique // 4, args.unique // 2, args.unique):
+        pool = make_song_pool(n, args.seed)
+        injected = rng.sample(range(n), max(1, n // 50))
+        for i in injected:
+            song_name, artist, source = pool[i]
+            if rng.random() < 0.5:
+                pool.append((_variant(rng, song_name), artist, source))
+            else:
+                pool.append((song_name, _variant(rng, artist), source))
+        songs = [Song((normalize_key(name), normalize_key(artist)), name, artist, source, False, None)
+                 for name, artist, source in pool]
+
+        t0 = time.perf_counter()
+        report = duplicates.find_duplicates(songs)
+        elapsed = time.perf_counter() - t0
+        found = {(item['keep']['song_name'], item['keep']['artist']) for item in report} | \
+                {(item['merge']['song_name'], item['merge']['artist']) for item in report}
+        recall = sum(pool[i][:2] in found for i in injected) / len(injected)
+        names = [duplicates.loose_key(song.song_name) for song in songs]
+        docs = [name + '\0' + duplicates.loose_key(song.artist) for name, song in zip(names, songs)]
+        candidates = len(duplicates.candidate_pairs(docs))
+
+        # 兩兩比較的估計：量測 2000 組隨機配對的計分時間再乘上 n²/2
+        sample = [(rng.randrange(len(names)), rng.randrange(len(names))) for _ in range(2000)]
+        t0 = time.perf_counter()
+        for i, j in sample:
+            duplicates.similarity(names[i], names[j])
+        naive = (time.perf_counter() - t0) / len(sample) * len(songs) * (len(songs) - 1) / 2
+        print(f"{len(songs):>8}{candidates:>12}{len(report):>8}{recall:>8.1%}{elapsed:>10.2f}{naive:>16.0f}")
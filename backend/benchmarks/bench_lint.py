@@ -0,0 +1,33 @@
+"""benchmark.py 的 lint 子命令。
+
+    python backend/benchmark.py --files 5000 lint
+"""
+import os
+
+from benchmarks import measure, print_table, synthetic_workdir
+
+def bench_lint(args):
+    """lint_timeline.py：單一行程、多行程平行與內容雜湊快取（全部未變動）的檢查時間"""
+    import lint_timeline
+    with synthetic_workdir(args) as root:
+        paths = lint_timeline.timeline_paths(os.path.join(root, 'timeline'))
+        cache_path = os.path.join(root, 'lint_cache.json')
+        workers = lint_timeline.worker_count()
+
+        def parallel():
+            # 不論檔案大小都使用行程池
+            threshold = lint_timeline.PARALLEL_BYTES
+            lint_timeline.PARALLEL_BYTES = 0
+            try:
+                return lint_timeline.lint_files(paths, None, max(2, workers))
+            finally:
+                lint_timeline.PARALLEL_BYTES = threshold
+
+        serial = lint_timeline.lint_files(paths, None, 1)[0]
+        if parallel()[0] != serial or lint_timeline.lint_files(paths, cache_path)[0] != serial:
+            raise AssertionError("parallel or cached lint results differ from the serial run")
+        print_table(f'lint {len(paths)} files ({workers} CPUs available)',
+                    [('serial',) + measure(lint_timeline.lint_files, paths, None, 1, repeat=args.repeat),
+                     (f'{max(2, workers)} processes',) + measure(parallel, repeat=args.repeat),
+                     ('cached (unchanged)',) + measure(lint_timeline.lint_files, paths, cache_path,
+                                                       repeat=args.repeat)])
@@ -0,0 +1,49 @@
+"""benchmark.py 的 orders 子命令。
+
+    python backend/benchmark.py --unique 100000 orders
+"""
+import random
+
+from benchmarks import make_song_entries, measure, print_table
+
+def bench_orders(args):
+    """sort_orders.py：點表頭時以比較函式重新排序，對比依預先排好的順序篩選重排"""
+    import functools
+    import readings
+    import sort_orders
+    from process_timeline import Appearance, Song, normalize_key
+    songs = []
+    for entry in make_song_entries(args.unique, args.seed, appearances=2):
+        key = (normalize_key(entry['song_name']), normalize_key(entry['artist']))
+        song = Song(key, entry['song_name'], entry['artist'], entry['source'], False, None)
+        for info in entry['dates']:
+            song.add_appearance(Appearance(info['date'], info['time'], 'xxxxxxxxxxx', 3600))
+        songs.append(song)
+    rng = random.Random(args.seed)
+    visible = [rng.random() < 0.5 for _ in songs]  # 模擬篩選後剩一半
+
+    columns = sort_orders.compute_orders(songs)
+    problems = sort_orders.verify_orders(songs, columns)
+    if problems:
+        raise AssertionError(problems[0])
+
+    def comparator_sort():
+        # 網頁目前的作法：比較函式內每次都重新正規化歌手字串
+        normalize = readings.normalize_string.__wrapped__
+
+        def compare(a, b):
+            a_value, b_value = normalize(songs[a].artist), normalize(songs[b].artist)
+            return (a_value > b_value) - (a_value < b_value)
+        return sorted((i for i in columns['song_name']['asc'] if visible[i]), key=functools.cmp_to_key(compare))
+
+    def reindex():
+        return [i for i in columns['artist']['asc'] if visible[i]]
+
+    if comparator_sort() != reindex():
+        raise AssertionError("precomputed artist order differs from the comparator sort")
+    print_table(f'sort by artist, {sum(visible)} of {len(songs)} songs visible',
+                [('comparator sort',) + measure(comparator_sort, repeat=args.repeat),
+                 ('precomputed order',) + measure(reindex, repeat=args.repeat)])
+    print_table('build all orderings (including verification)',
+                [('compute_orders',) + measure(sort_orders.compute_orders, songs, repeat=args.repeat),
+                 ('verify_orders',) + measure(sort_orders.verify_orders, songs, columns, repeat=args.repeat)])
@@ -0,0 +1,67 @@
+"""benchmark.py 的 pack 子命令。
+
+    python backend/benchmark.py --files 10000 pack
+"""
+import contextlib
+import io
+import os
+import time
+
+from benchmarks import measure, synthetic_workdir
+
+def _evict_page_cache(paths):
+    """請核心丟棄這些檔案的快取頁面，模擬冷啟動（不支援 posix_fadvise 的平台回傳 False）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def bench_pack(args):
+    """timeline_pack.py：逐檔讀取 timeline/ 與 mmap 封裝檔的讀取／建置時間（冷、熱快取）"""
+    import timeline_pack
+    from process_timeline import build_catalogue, iter_timeline_files, open_text
+    with synthetic_workdir(args) as root:
+        timeline_dir = os.path.join(root, 'timeline')
+        pack_path = os.path.join(root, 'timeline.pack')
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = timeline_pack.pack(timeline_dir, pack_path)
+        print(f"Packed {count} files into {os.path.getsize(pack_path) / 1048576:.1f} MiB "
+              f"in {time.perf_counter() - t0:.2f}s")
+        files = [os.path.join(timeline_dir, name) for name in os.listdir(timeline_dir)]
+
+        def ingest(pack=None):
+            # 只量測逐行讀取每個歌單的成本
+            lines = 0
+            for _, source, _ in iter_timeline_files(timeline_dir, pack):
+                with open_text(source) as f:
+                    lines += sum(1 for _ in f)
+            return lines
+
+        def ingest_pack():
+            with timeline_pack.TimelinePack(pack_path) as pack:
+                return ingest(pack)
+
+        def build_pack():
+            with timeline_pack.TimelinePack(pack_path) as pack:
+                return build_catalogue(timeline_dir, pack)
+
+        cases = [('ingest: directory', ingest, files), ('ingest: pack (mmap)', ingest_pack, [pack_path]),
+                 ('build: directory', lambda: build_catalogue(timeline_dir), files),
+                 ('build: pack (mmap)', build_pack, [pack_path])]
+        print(f"\n{'case':<24}{'cold (s)':>12}{'warm (s)':>12}")
+        for name, func, paths in cases:
+            cold = None
+            with contextlib.redirect_stdout(io.StringIO()):
+                if _evict_page_cache(paths):
+                    t0 = time.perf_counter()
+                    func()
+                    cold = time.perf_counter() - t0
+                warm = measure(func, repeat=max(3, args.repeat))[0]
+            print(f"{name:<24}{cold if cold is not None else float('nan'):>12.3f}{warm:>12.3f}")
@@ -0,0 +1,28 @@
+"""benchmark.py 的 pipeline 子命令。
+
+    python backend/benchmark.py --files 2000 pipeline
+"""
+import os
+
+from benchmarks import measure, print_table, synthetic_workdir
+
+def bench_pipeline(args):
+    """pipeline.py：分開執行各腳本 vs 單一行程共用狀態（含輸入沒變時略過）"""
+    import json
+    import pipeline
+    import process_timeline
+    import update_tags_from_data
+    with synthetic_workdir(args):
+        def chained():
+            # 原本的工作流：建置 data.json 後，補 tag 的腳本再讀回 data.json
+            process_timeline.main([])
+            with open('data.json', 'r', encoding='utf-8') as f:
+                entries = [(song['song_name'], song['artist']) for song in json.load(f)]
+            update_tags_from_data.update_tags(entries, os.path.join('timeline', 'tags.txt'))
+
+        rows = [
+            ('separate scripts',) + measure(chained, repeat=args.repeat),
+            ('pipeline --force',) + measure(pipeline.main, ['--offline', '--force'], repeat=args.repeat),
+            ('pipeline (unchanged)',) + measure(pipeline.main, ['--offline'], repeat=args.repeat),
+        ]
+    print_table('build data.json and refresh tags.txt', rows)
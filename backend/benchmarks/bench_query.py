@@ -0,0 +1,46 @@
+"""benchmark.py 的 query 子命令。
+
+    python backend/benchmark.py --unique 100000 query
+"""
+import random
+import time
+
+from benchmarks import make_song_entries
+
+def bench_query(args):
+    """query.py 索引：建立、載入與各類查詢的延遲"""
+    import pickle
+    import query
+    entries = make_song_entries(args.unique, args.seed)
+    t0 = time.perf_counter()
+    index = query.SongIndex(entries)
+    build_seconds = time.perf_counter() - t0
+    blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    t0 = time.perf_counter()
+    pickle.loads(blob)
+    load_seconds = time.perf_counter() - t0
+    print(f"Index of {len(entries)} songs: build {build_seconds:.2f}s, "
+          f"{len(blob) / 1048576:.1f} MiB pickled, load {load_seconds:.2f}s")
+
+    rng = random.Random(args.seed)
+    samples = rng.sample(entries, 200)
+    cases = [
+        ('substring (name slice)', lambda e: index.search(e['song_name'][1:5])),
+        ('substring 1 char', lambda e: index.search(e['song_name'][0])),
+        ('substring --field artist', lambda e: index.search(e['artist'], field='artist')),
+        ('fuzzy (typo)', lambda e: index.search(e['song_name'][:-2] + 'x', fuzzy=True)),
+        ('tags 90s+Anime', lambda e: index.search(tags=['90s', 'Anime'])),
+        ('date range (1 month)', lambda e: index.search(since='20250101', until='20250131')),
+        ('name + tag + range', lambda e: index.search(e['song_name'][1:4], tags=['Female'],
+                                                      since='20240101', until='20251231')),
+    ]
+    print(f"\n{'query':<28}{'median (ms)':>14}{'p95 (ms)':>12}{'hits':>10}")
+    for name, func in cases:
+        timings, hits = [], 0
+        for entry in samples:
+            t0 = time.perf_counter()
+            hits += len(func(entry))
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"{name:<28}{timings[len(timings) // 2]:>14.3f}{timings[int(len(timings) * 0.95)]:>12.3f}"
+              f"{hits // len(samples):>10}")
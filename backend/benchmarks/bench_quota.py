@@ -0,0 +1,50 @@
+"""benchmark.py 的 quota 子命令。
+
+    python backend/benchmark.py quota
+"""
+import time
+
+from benchmarks import measure, print_table
+
+def bench_quota(args):
+    """quota_scheduler.py：多個頻道依序處理，對比共用排程器並行處理（模擬 API 延遲）"""
+    import threading
+    from quota_scheduler import QuotaExhausted, QuotaScheduler
+    latency = 0.02
+    workloads = {'large': 120, 'medium': 60, 'small': 15, 'tiny': 5}  # 每個頻道的 API 呼叫數
+
+    class FakeRequest:
+        def execute(self):
+            time.sleep(latency)
+            return {}
+
+    def run(name, calls, scheduler):
+        usage = scheduler.channel(name)
+        usage.started = time.monotonic()
+        try:
+            for _ in range(calls):
+                scheduler.execute(name, FakeRequest())
+        except QuotaExhausted:
+            pass
+        finally:
+            usage.finished = time.monotonic()
+
+    def sequential():
+        scheduler = QuotaScheduler(rate=50)
+        for name, calls in workloads.items():
+            run(name, calls, scheduler)
+        return scheduler
+
+    def concurrent(quota=10000):
+        scheduler = QuotaScheduler(quota=quota, rate=50)
+        threads = [threading.Thread(target=run, args=(name, calls, scheduler)) for name, calls in workloads.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return scheduler
+
+    print_table(f'{sum(workloads.values())} simulated calls ({latency * 1000:.0f} ms each, 50 requests/s)',
+                [('sequential',) + measure(sequential), ('shared scheduler',) + measure(concurrent)])
+    print("\nper-channel report with a 100-unit quota (smaller channels still finish):")
+    concurrent(quota=100).print_report()
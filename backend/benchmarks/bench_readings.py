@@ -0,0 +1,37 @@
+"""benchmark.py 的 readings 子命令。
+
+    python backend/benchmark.py --unique 100000 readings
+"""
+from benchmarks import make_song_entries, measure, print_table
+
+def bench_readings(args):
+    """readings.py：每首歌的讀音鍵、搜尋字串與排序權重，未快取與 lru_cache 快取的轉換時間"""
+    import readings
+    from process_timeline import Song, normalize_key
+    songs = []
+    for entry in make_song_entries(args.unique, args.seed, appearances=1):
+        key = (normalize_key(entry['song_name']), normalize_key(entry['artist']))
+        songs.append(Song(key, entry['song_name'], entry['artist'], entry['source'], False, None))
+
+    def uncached():
+        # 網頁載入時的作法：每首歌的每個欄位都重新轉換一次
+        cached = readings.convert_jp, readings.normalize_string
+        readings.convert_jp, readings.normalize_string = cached[0].__wrapped__, cached[1].__wrapped__
+        try:
+            return readings.compute_readings(songs)
+        finally:
+            readings.convert_jp, readings.normalize_string = cached
+
+    def cold():
+        readings.convert_jp.cache_clear()
+        readings.normalize_string.cache_clear()
+        return readings.compute_readings(songs)
+
+    if uncached() != cold():
+        raise AssertionError("memoized readings differ from the uncached conversion")
+    print_table(f'readings for {len(songs)} songs',
+                [('uncached',) + measure(uncached, repeat=args.repeat),
+                 ('lru_cache (cold)',) + measure(cold, repeat=args.repeat),
+                 ('lru_cache (warm)',) + measure(readings.compute_readings, songs, repeat=args.repeat)])
+    info = readings.normalize_string.cache_info()
+    print(f"{info.currsize} distinct strings, {info.hits} cache hits")
@@ -0,0 +1,24 @@
+"""benchmark.py 的 records 子命令。
+
+    python backend/benchmark.py --files 2000 --songs-per-file 30 --unique 20000 records
+"""
+from benchmarks import BASELINE_REVISION, RECORDS_REVISION, load_revision, measure, print_table, synthetic_workdir
+
+def bench_records(args):
+    """Song/Appearance 記錄型別 vs 改為記錄型別前的 dict 流程（git 中的 process_timeline.py，相同工作量）"""
+    # 各版本都做解析、normalize_key 合併、tags 對照並寫出 data.json；
+    # 目前版本只計 build_catalogue 與 write_data_json，不含之後加入的衍生產物
+    dict_version = load_revision(BASELINE_REVISION, 'process_timeline.py')
+    slots_version = load_revision(RECORDS_REVISION, 'process_timeline.py')
+    import process_timeline
+
+    def current():
+        process_timeline.write_data_json(process_timeline.build_catalogue('timeline'), 'data.json')
+
+    with synthetic_workdir(args):
+        rows = [
+            (f'dict ({BASELINE_REVISION})',) + measure(dict_version.main, repeat=args.repeat),
+            (f'slots ({RECORDS_REVISION})',) + measure(slots_version.main, repeat=args.repeat),
+            ('slots (current)',) + measure(current, repeat=args.repeat),
+        ]
+    print_table('build data.json', rows)
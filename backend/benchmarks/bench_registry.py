@@ -0,0 +1,60 @@
+"""benchmark.py 的 registry 子命令。
+
+    python backend/benchmark.py --unique 500 registry
+"""
+import os
+import tempfile
+import time
+
+from benchmarks import measure, print_table
+
+def bench_registry(args):
+    """video_registry.py：逐部查詢影片 vs 批次查詢填入登錄檔（模擬 API 延遲），以及第二次執行"""
+    import video_registry
+    latency = 0.02
+    video_ids = [f'video{i:06d}' for i in range(args.unique)]
+    calls = []
+
+    class FakeRequest:
+        def __init__(self, ids):
+            self.ids = ids
+
+        def execute(self):
+            time.sleep(latency)
+            calls.append(len(self.ids))
+            return {'items': [{'id': video_id, 'snippet': {'title': video_id, 'publishedAt': '2024-01-01T12:00:00Z'},
+                               'contentDetails': {'duration': 'PT1H'}, 'status': {'privacyStatus': 'public'}}
+                              for video_id in self.ids]}
+
+    class FakeVideos:
+        def list(self, part, id, maxResults=None):
+            return FakeRequest(id.split(','))
+
+    class FakeYoutube:
+        def videos(self):
+            return FakeVideos()
+
+    api = video_registry.DirectApi(FakeYoutube())
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'videos.json')
+
+        def per_video():
+            # 原本的作法：每部影片各自呼叫一次 videos.list
+            for video_id in video_ids:
+                api.execute(api.youtube.videos().list(part='status', id=video_id))
+
+        def batched():
+            if os.path.exists(path):
+                os.remove(path)
+            video_registry.VideoRegistry(path).refresh(api, video_ids)
+
+        def cached():
+            video_registry.VideoRegistry(path).refresh(api, video_ids)
+
+        rows = []
+        for name, func in (('per video', per_video), ('batched', batched),
+                           ('second run', cached)):
+            calls.clear()
+            seconds, peak = measure(func)
+            rows.append((f'{name} ({len(calls) // 2} calls)', seconds, peak))
+    print_table(f'look up {len(video_ids)} videos ({latency * 1000:.0f} ms per call)', rows)
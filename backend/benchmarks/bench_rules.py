@@ -0,0 +1,87 @@
+"""benchmark.py 的 rules 子命令。
+
+    python backend/benchmark.py --unique 20000 rules
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+import unicodedata
+from datetime import datetime, timedelta
+
+from benchmarks import load_module, make_song_pool
+
+def bench_rules(args):
+    """RuleSet：規則數增加時每筆演唱紀錄判定旗標的時間，與舊版未正規化的 set/dict 查表比較"""
+    legacy = load_module('process_timeline.old.py')
+    from process_timeline import RuleSet, normalize_key
+    rng = random.Random(args.seed)
+    pool = make_song_pool(args.unique, args.seed)
+    start = datetime(2024, 1, 27)
+    dates = [(start + timedelta(days=n)).strftime('%Y%m%d') for n in range(args.files)]
+    # 模擬歌單中的寫法：一成的演唱紀錄在歌手後多了空白或改用全形字元，舊版查表會漏掉
+    appearances = []
+    for _ in range(100000):
+        song_name, artist, _ = rng.choice(pool)
+        if rng.random() < 0.1:
+            artist = unicodedata.normalize('NFKC', artist) + ' ' if rng.random() < 0.5 else \
+                artist.replace('a', 'ａ').replace('e', 'ｅ')
+        appearances.append((rng.choice(dates), song_name, artist))
+    keyed = [(date, song_name, artist, (normalize_key(song_name), normalize_key(artist)))
+             for date, song_name, artist in appearances]
+
+    print(f"{'rules':>8}{'legacy (ms)':>14}{'RuleSet (ms)':>14}{'legacy hits':>13}{'RuleSet hits':>14}"
+          f"{'unmatched':>11}")
+    root = tempfile.mkdtemp(prefix='songlist-bench-')
+    try:
+        for count in (100, 1000, 10000):
+            exceptions_path = os.path.join(root, 'exceptions.txt')
+            acapella_path = os.path.join(root, 'acapella.txt')
+            with open(exceptions_path, 'w', encoding='utf-8') as f:
+                f.write(f"member_exclusive_dates|{','.join(rng.sample(dates, min(20, len(dates))))}\n")
+                f.write(f"private|{','.join(rng.sample(dates, min(20, len(dates))))}\n")
+                for song_name, artist, _ in rng.sample(pool, count // 2):
+                    f.write(f"copyright|{song_name}|{artist}\n")
+            with open(acapella_path, 'w', encoding='utf-8') as f:
+                for n, (song_name, artist, _) in enumerate(rng.sample(pool, count // 2)):
+                    if n % 3 == 0:
+                        f.write(f"{song_name}|{artist}|{rng.choice(dates)}\n")
+                    else:
+                        f.write(f"{song_name}|{artist}\n")
+
+            member_dates, private_dates, _, copyright_songs = legacy.load_exceptions(exceptions_path)
+            acapella_songs, global_acapella, acapella_with_artist = legacy.load_acapella(acapella_path)
+            t0 = time.perf_counter()
+            legacy_hits = 0
+            for date_str, song_name, artist in appearances:
+                flags = (
+                    date_str in member_dates,
+                    (date_str in acapella_songs and artist in acapella_songs[date_str]
+                     and song_name in acapella_songs[date_str][artist]) or
+                    (song_name in global_acapella) or
+                    (artist in acapella_with_artist and song_name in acapella_with_artist[artist]),
+                    (song_name, artist) in copyright_songs or (song_name, None) in copyright_songs,
+                    date_str in private_dates,
+                )
+                legacy_hits += flags[1] or flags[2]
+            legacy_ms = (time.perf_counter() - t0) * 1000
+
+            rules = RuleSet()
+            rules.load_exceptions(exceptions_path)
+            rules.load_acapella(acapella_path)
+            # 正規化鍵在建立 Song 時本來就會計算，這裡預先算好，只量測規則判定本身
+            t0 = time.perf_counter()
+            hits = 0
+            for date_str in dates:
+                # 整場直播相同的旗標在建置時每個歌單只查一次
+                rules.stream_flags(date_str, '')
+            for date_str, _, _, key in keyed:
+                is_acapella, is_copyright = rules.song_flags(key, date_str)
+                hits += is_acapella or is_copyright
+            rules_ms = (time.perf_counter() - t0) * 1000
+            print(f"{count:>8}{legacy_ms:>14.1f}{rules_ms:>14.1f}{legacy_hits:>13}{hits:>14}"
+                  f"{len(rules.unmatched()):>11}")
+    finally:
+        shutil.rmtree(root)
+    print(f"({len(appearances)} appearances; timings exclude normalize_key, which the build computes anyway)")
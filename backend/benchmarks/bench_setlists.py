@@ -0,0 +1,41 @@
+"""benchmark.py 的 setlists 子命令。
+
+    python backend/benchmark.py --files 2000 setlists
+"""
+import contextlib
+import io
+import random
+
+from benchmarks import measure, print_table, synthetic_workdir
+
+def bench_setlists(args):
+    """setlists.py：查某天的歌單時把每首歌的 dates 反過來掃過一遍，對比預先建立的每場歌單索引"""
+    import setlists
+    import process_timeline
+    with synthetic_workdir(args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            songs = process_timeline.build_catalogue('timeline')
+    entries = [song.to_dict() for song in songs]
+    index = setlists.build_setlists(songs)
+    rng = random.Random(args.seed)
+    queries = [rng.choice(index['dates']) for _ in range(200)]
+
+    def invert_data_json():
+        # 網頁目前的作法：每次查詢都掃過所有歌曲的 dates，再依時間排序（無法還原歌單中的順序）
+        results = []
+        for date in queries:
+            found = [(info['time'], song_id) for song_id, entry in enumerate(entries)
+                     for info in entry['dates'] if info['date'] == date]
+            results.append([song_id for _, song_id in sorted(found)])
+        return results
+
+    def lookup():
+        return [[song_id for i in setlists.streams_on(index, date) for song_id in index['streams'][i]['songs']]
+                for date in queries]
+
+    rows = [
+        ('build index',) + measure(setlists.build_setlists, songs, repeat=args.repeat),
+        (f'invert data.json x{len(queries)}',) + measure(invert_data_json, repeat=args.repeat),
+        (f'index lookup x{len(queries)}',) + measure(lookup, repeat=args.repeat),
+    ]
+    print_table(f"setlists: {len(index['streams'])} streams, {len(songs)} songs", rows)
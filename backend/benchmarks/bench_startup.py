@@ -0,0 +1,62 @@
+"""benchmark.py 的 startup 子命令。
+
+    python backend/benchmark.py --repeat 5 startup
+"""
+import os
+import subprocess
+import sys
+
+from benchmarks import BASE_DIR, ROOT_DIR
+
+_IMPORT_TIMER = """
+import sys, time
+t0 = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+    status = 'ok'
+except Exception as e:
+    status = type(e).__name__
+print(time.perf_counter() - t0, status)
+"""
+
+_CLIENT_TIMER = """
+import time, youtube_client
+from googleapiclient.discovery import build, build_from_document
+t0 = time.perf_counter()
+build('youtube', 'v3', developerKey='x', static_discovery=True)
+t1 = time.perf_counter()
+build_from_document(youtube_client.discovery_document(), developerKey='x')
+print(t1 - t0, time.perf_counter() - t1)
+"""
+
+def _run_timer(code, *argv, env=None):
+    # 每次都是新的直譯器，量到的是冷啟動（不含已載入的模組）
+    result = subprocess.run([sys.executable, '-c', code, *argv], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.split()
+
+def bench_startup(args):
+    """各後端腳本在新的直譯器中 import 的時間（不含 Python 本身啟動），以及 YouTube 客戶端的建立時間"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BASE_DIR, os.environ.get('PYTHONPATH')])))
+    # 沒有憑證時也應能 import（只有實際呼叫 API 時才需要）
+    env.pop('GOOGLE_SHEETS_CREDENTIALS', None)
+    env.pop('GOOGLE_API_KEY', None)
+    scripts = sorted(name[:-3] for name in os.listdir(BASE_DIR)
+                     if name.endswith('.py') and name.count('.') == 1 and name != 'benchmark.py')
+    print(f"\n== import time ({args.repeat} runs, best)")
+    print(f"{'script':<28}{'time (ms)':>12}  status")
+    for name in scripts:
+        runs = [_run_timer(_IMPORT_TIMER, name, env=env) for _ in range(args.repeat)]
+        best = min(float(run[0]) for run in runs if run)
+        print(f"{name + '.py':<28}{best * 1000:>12.1f}  {runs[-1][1]}")
+
+    clients = [_run_timer(_CLIENT_TIMER, env=env) for _ in range(args.repeat)]
+    if not all(clients):
+        print("\ngoogleapiclient is not installed; client build times skipped")
+        return
+    print(f"\n== YouTube client build ({args.repeat} runs, best)")
+    print(f"{'discovery document':<28}{'time (ms)':>12}")
+    print(f"{'packaged (build)':<28}{min(float(run[0]) for run in clients) * 1000:>12.1f}")
+    print(f"{'vendored (youtube_client)':<28}{min(float(run[1]) for run in clients) * 1000:>12.1f}")
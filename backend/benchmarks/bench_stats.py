@@ -0,0 +1,50 @@
+"""benchmark.py 的 stats 子命令。
+
+    python backend/benchmark.py --unique 100000 stats
+"""
+from benchmarks import make_song_entries, measure, print_table
+
+def bench_stats(args):
+    """stats.py：演唱紀錄表分組彙總（純 Python／NumPy），對比逐首掃過 dates 陣列"""
+    import stats
+    from process_timeline import Appearance, Song, normalize_key
+    songs = []
+    for entry in make_song_entries(args.unique, args.seed):
+        key = (normalize_key(entry['song_name']), normalize_key(entry['artist']))
+        song = Song(key, entry['song_name'], entry['artist'], entry['source'], False, None)
+        for info in entry['dates']:
+            song.add_appearance(Appearance(info['date'], info['time'], 'xxxxxxxxxxx', 3600))
+        songs.append(song)
+
+    def per_song_scan():
+        # 網頁目前的作法：每首歌各自排序 dates 取次數、首次與最近日期，再逐筆累計年份與歌手
+        result, artists = [], {}
+        for song in songs:
+            dates = sorted(appearance.date for appearance in song.dates)
+            years = {}
+            for date in dates:
+                years[date[:4]] = years.get(date[:4], 0) + 1
+            result.append((len(dates), dates[0], dates[-1], years))
+            artists[song.artist] = artists.get(song.artist, 0) + len(dates)
+        return result, artists
+
+    engines = [('per-song scan', per_song_scan), ('pure Python', lambda: stats.compute_stats(songs, False))]
+    if stats.np is not None:
+        engines.append(('NumPy', lambda: stats.compute_stats(songs, True)))
+        if engines[1][1]() != engines[2][1]():
+            raise AssertionError("NumPy and pure Python stats differ")
+    else:
+        print("NumPy is not installed, skipping the vectorised engine")
+    appearances = sum(len(song.dates) for song in songs)
+    print_table(f'stats for {len(songs)} songs / {appearances} appearances',
+                [(name,) + measure(func, repeat=args.repeat) for name, func in engines])
+
+    # 只量測演唱紀錄表的分組彙總本身（不含攤平 Song 物件與出典選擇）
+    song_ids, dates, _ = stats.appearance_table(songs)
+    first_year = min(dates) // 10000
+    n_years = max(dates) // 10000 - first_year + 1
+    print_table('aggregate() over the appearance table',
+                [(name,) + measure(stats.aggregate, song_ids, dates, len(songs), first_year, n_years, use_numpy,
+                                   repeat=args.repeat)
+                 for name, use_numpy in (('pure Python', False), ('NumPy', True))
+                 if not use_numpy or stats.np is not None])
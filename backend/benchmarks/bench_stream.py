@@ -0,0 +1,35 @@
+"""benchmark.py 的 stream 子命令。
+
+    python backend/benchmark.py --files 5000 stream
+"""
+import contextlib
+import io
+
+from benchmarks import measure, merge_catalogue, print_table, synthetic_workdir
+
+def bench_stream(args):
+    """process_timeline.py：逐檔建立 Song 列表後再合併 vs 產生器各階段直接併入同一份目錄"""
+    import process_timeline
+
+    def materialized():
+        # 串流化以前的 build_catalogue：每份歌單先 readlines、建立自己的 Song 列表，最後再合併
+        rules, tags_map = process_timeline.load_rules('timeline')
+        file_results = []
+        for _, file_path, date_str in process_timeline.iter_timeline_files('timeline'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = io.StringIO(''.join(f.readlines()))
+            lines.name = file_path
+            file_results.append(process_timeline.process_timeline(lines, date_str, **rules))
+        return merge_catalogue(file_results, tags_map)
+
+    def serialized(songs):
+        return [song.to_dict() for song in songs]
+
+    with synthetic_workdir(args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            same = serialized(materialized()) == serialized(process_timeline.build_catalogue('timeline'))
+        rows = [
+            ('per-file lists + merge',) + measure(materialized, repeat=args.repeat),
+            ('streaming stages',) + measure(process_timeline.build_catalogue, 'timeline', repeat=args.repeat),
+        ]
+    print_table(f"build catalogue (outputs {'identical' if same else 'DIFFER'})", rows)
@@ -0,0 +1,61 @@
+"""benchmark.py 的 tags 子命令。
+
+    python backend/benchmark.py --unique 100000 tags
+"""
+import time
+
+from benchmarks import make_song_entries
+
+def bench_tags(args):
+    """tag_index.py：tag 篩選與側欄計數，位元集合索引對比逐首檢查 tags 列表"""
+    import json
+    import tag_index
+    entries = make_song_entries(args.unique, args.seed)
+    t0 = time.perf_counter()
+    index = tag_index.TagIndex.from_tag_lists(entry['tags'] for entry in entries)
+    build_seconds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    blob = json.dumps(index.to_json(), separators=(',', ':'))
+    encode_seconds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    loaded = tag_index.TagIndex.from_json(json.loads(blob))
+    load_seconds = time.perf_counter() - t0
+    print(f"Tag index of {len(entries)} songs / {len(index.sets)} tags: build {build_seconds * 1000:.1f} ms, "
+          f"encode {encode_seconds * 1000:.1f} ms, {len(blob) / 1024:.1f} KiB, load {load_seconds * 1000:.1f} ms")
+
+    # 逐首檢查：與網頁目前的作法相同
+    def scan_and(tags):
+        return [i for i, entry in enumerate(entries) if all(t in entry['tags'] for t in tags)]
+
+    def scan_or(tags):
+        return [i for i, entry in enumerate(entries) if any(t in entry['tags'] for t in tags)]
+
+    def scan_counts(tags):
+        counts = dict.fromkeys(index.sets, 0)
+        for entry in entries:
+            if all(t in entry['tags'] for t in tags):
+                for t in entry['tags']:
+                    counts[t] += 1
+        return counts
+
+    cases = [
+        ('AND 90s+Anime', lambda: scan_and(['90s', 'Anime']), lambda: loaded.filter(['90s', 'Anime'])),
+        ('OR Male|Female', lambda: scan_or(['Male', 'Female']), lambda: loaded.filter(any_of=['Male', 'Female'])),
+        ('AND, count only', lambda: len(scan_and(['Female', 'Anime', '00s'])),
+         lambda: loaded.select(['Female', 'Anime', '00s']).bit_count()),
+        ('sidebar counts (Anime)', lambda: scan_counts(['Anime']),
+         lambda: loaded.facet_counts(loaded.select(['Anime']))),
+    ]
+    print(f"\n{'operation':<26}{'scan (ms)':>12}{'index (ms)':>12}{'speedup':>10}")
+    for name, scan, indexed in cases:
+        if scan() != indexed():
+            raise AssertionError(f"{name}: index result differs from scan")
+        timings = []
+        for func in (scan, indexed):
+            best = float('inf')
+            for _ in range(max(3, args.repeat)):
+                t0 = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - t0)
+            timings.append(best * 1000)
+        print(f"{name:<26}{timings[0]:>12.3f}{timings[1]:>12.3f}{timings[0] / timings[1]:>9.0f}x")
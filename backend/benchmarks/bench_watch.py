@@ -0,0 +1,63 @@
+"""benchmark.py 的 watch 子命令。
+
+    python backend/benchmark.py --files 2000 watch
+"""
+import contextlib
+import io
+import os
+import time
+
+from benchmarks import merge_catalogue, synthetic_workdir
+
+def bench_watch(args):
+    """watch.py：歌單存檔到 data.json 更新完成的延遲（inotify 與輪詢）"""
+    import threading
+    import watch
+    with synthetic_workdir(args) as root:
+        timeline_dir = os.path.join(root, 'timeline')
+        target = os.path.join(timeline_dir, sorted(os.listdir(timeline_dir))[len(os.listdir(timeline_dir)) // 2])
+        with open(target, encoding='utf-8') as f:
+            original = f.read()
+        for poll in (False, True):
+            rebuilt = threading.Event()
+            stop = threading.Event()
+            thread = threading.Thread(target=watch.watch, daemon=True, kwargs={
+                'timeline_dir': timeline_dir, 'output_path': os.path.join(root, 'data.json'), 'poll': poll,
+                'on_rebuilt': lambda changed, count: rebuilt.set(), 'should_stop': stop.is_set,
+            })
+            with contextlib.redirect_stdout(io.StringIO()):
+                thread.start()
+                time.sleep(0.5)
+                while thread.is_alive() and not os.path.exists(os.path.join(root, 'data.json')):
+                    time.sleep(0.1)
+                time.sleep(0.5)
+                latencies = []
+                for n in range(args.repeat * 10):
+                    rebuilt.clear()
+                    t0 = time.perf_counter()
+                    with open(target, 'w', encoding='utf-8') as f:
+                        f.write(original + f"99.    09:00:{n % 60:02d}    合成テスト{n} / テスト\n")
+                    if rebuilt.wait(10):
+                        latencies.append((time.perf_counter() - t0) * 1000)
+                    time.sleep(0.1)
+                stop.set()
+                thread.join()
+            latencies.sort()
+            mode = 'polling' if poll else 'inotify'
+            print(f"{mode:<8} save -> data.json  median {latencies[len(latencies) // 2]:.1f} ms, "
+                  f"max {latencies[-1]:.1f} ms (debounce {watch.DEBOUNCE_SECONDS * 1000:.0f} ms, "
+                  f"{len(latencies)} edits)")
+
+        state = watch.CatalogueState(timeline_dir)
+        t0 = time.perf_counter()
+        watch.rebuild(state, os.path.join(root, 'data.json'), {os.path.basename(target)})
+        print(f"rebuild alone (re-parse 1 file + merge + write): {(time.perf_counter() - t0) * 1000:.1f} ms")
+        t0 = time.perf_counter()
+        state.update({os.path.basename(target)})
+        state.songs()
+        patched = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        merge_catalogue(([song for _, song in state.files[name].values()] for name in sorted(state.files)),
+                        state.tags_map)
+        print(f"re-parse 1 file + re-merge its songs: {patched * 1000:.1f} ms "
+              f"(re-merging all {len(state.files)} files: {(time.perf_counter() - t0) * 1000:.1f} ms)")
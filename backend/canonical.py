@@ -0,0 +1,240 @@
+"""出典與歌手的標準化對照表：把整個歌曲目錄中同一作品（或同一歌手）的不同寫法歸為同一個編號。
+
+select_best_source／select_english_source 只在單一首歌的出典寫法中挑選，
+「遊☆戯☆王」與「遊戯王」、新格式的『』出典與舊格式第四欄的英文寫法，在不同歌曲間不會被視為同一作品。
+這裡以 union-find 把寫法分成等價類別：
+    出典  寬鬆鍵（duplicates.loose_key，並去掉括號內的補充說明，例如「(ゲーム)」「(PS版)」）相同者為同一類；
+          同一首歌的兩個寫法，一方的寬鬆鍵包含另一方（系列名與個別作品），或編輯距離相似度 ≥ SIMILARITY（錯字）時合併；
+          同一首歌的寫法合併後只剩一個純英文類別與一個日文類別時，視為同一作品的譯名合併
+    歌手  寬鬆鍵相同者為同一類；同名（normalize_key）且出典屬於同一類的歌曲，歌手寫法互相包含或相似時合併
+每一類以出現在最多首歌曲的寫法為代表：日文代表優先選含假名或漢字的寫法，英文代表只從純英文寫法中選，沒有時為空字串。
+
+結果寫在 data/canonical.json：
+    format          格式版本
+    sources         出典類別列表（列表位置即編號，依在 data.json 中首次出現的順序）：
+                    ja、en 代表寫法，spellings 所有寫法（依使用的歌曲數排序），songs 使用的歌曲數
+    artists         歌手類別列表，欄位同上
+    songs           以 data.json 順序排列的欄位陣列：sources（出典編號列表）、artist（歌手編號，沒有歌手時為 null）
+網頁的出典搜尋與分組可直接比對編號，不必再比對字串。
+
+    python backend/canonical.py            # 由 data.json 重建並列出合併了多個寫法的類別
+"""
+import argparse
+import json
+import os
+import re
+import unicodedata
+
+import output_writer
+from duplicates import loose_key, similarity
+from process_timeline import ARTIFACT_DIR, normalize_key
+
+CANONICAL_FORMAT = 1
+CANONICAL_PATH = os.path.join(ARTIFACT_DIR, 'canonical.json')
+SIMILARITY = 0.85   # 同一首歌的兩個寫法視為錯字的相似度門檻
+MIN_CONTAINED = 3   # 「包含」規則中較短一方的最小長度，避免單一字母之類的寫法吸收其他寫法
+
+_JAPANESE = re.compile(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]')  # 與 select_best_source 相同
+_NON_ASCII = re.compile(r'[^\x00-\x7F]')
+_PARENTHESIZED = re.compile(r'\([^()]*\)')
+
+class UnionFind:
+    """以路徑壓縮與依大小合併實作的互斥集合，元素為任意可雜湊的值"""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+    def groups(self):
+        """{根: [元素]}，元素依加入順序排列"""
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
+
+def canonical_key(text):
+    """比對用的寬鬆鍵：去掉括號內的補充說明後只保留文字與數字；整個寫法都在括號內時不去掉"""
+    stripped = loose_key(_PARENTHESIZED.sub('', unicodedata.normalize('NFKC', text)))
+    return stripped or loose_key(text)
+
+def _related(a, b):
+    """同一首歌的兩個寬鬆鍵是否為同一作品（系列名與個別作品，或錯字）"""
+    shorter, longer = sorted((a, b), key=len)
+    if len(shorter) >= MIN_CONTAINED and shorter in longer:
+        return True
+    return similarity(a, b) >= SIMILARITY
+
+def _link_by_key(spellings, keys):
+    """每個寫法一個集合，寬鬆鍵相同者合併"""
+    uf = UnionFind()
+    first = {}
+    for spelling in spellings:
+        uf.add(spelling)
+        key = keys[spelling]
+        if key:
+            uf.union(first.setdefault(key, spelling), spelling)
+    return uf
+
+def _link_related(uf, spellings, keys):
+    """同一組寫法中兩兩比較，相關者合併（每組只有幾個寫法）"""
+    for i, a in enumerate(spellings):
+        for b in spellings[i + 1:]:
+            if keys[a] and keys[b] and uf.find(a) != uf.find(b) and _related(keys[a], keys[b]):
+                uf.union(a, b)
+
+def _display(spellings, uses):
+    """類別的 (日文代表, 英文代表, 依使用的歌曲數排序的所有寫法)；同數時沒有括號補充說明的寫法優先"""
+    bare = {spelling: _PARENTHESIZED.sub('', unicodedata.normalize('NFKC', spelling)) for spelling in spellings}
+    ranked = sorted(spellings, key=lambda spelling: (-uses[spelling], len(bare[spelling]) < len(spelling),
+                                                     -len(spelling), spelling))
+    # 「(アニメ)」之類的補充說明不算日文寫法
+    japanese = [spelling for spelling in ranked if _JAPANESE.search(bare[spelling])]
+    english = [spelling for spelling in ranked if not _NON_ASCII.search(spelling)]
+    return (japanese or ranked)[0], english[0] if english else '', ranked
+
+def _classes(uf, order, uses):
+    """依 order（首次出現順序）為每個類別編號，回傳 (類別列表, {寫法: 編號})"""
+    groups = uf.groups()
+    classes = []
+    class_of_root = {}
+    for spelling in order:
+        root = uf.find(spelling)
+        if root not in class_of_root:
+            class_of_root[root] = len(classes)
+            ja, en, ranked = _display(groups[root], uses)
+            classes.append({'ja': ja, 'en': en, 'spellings': ranked,
+                            'songs': sum(uses[spelling] for spelling in ranked)})
+    return classes, {spelling: class_of_root[uf.find(spelling)] for spelling in order}
+
+def source_classes(songs):
+    """出典的 (類別列表, {寫法: 編號}, 每首歌的出典編號列表)"""
+    uses = {}
+    for song in songs:
+        for source in song.sources:
+            uses[source] = uses.get(source, 0) + 1
+    keys = {source: canonical_key(source) for source in uses}
+    uf = _link_by_key(uses, keys)
+
+    for song in songs:
+        spellings = list(song.sources)
+        if len(spellings) < 2:
+            continue
+        _link_related(uf, spellings, keys)
+        # 譯名：只剩一個日文類別與一個純英文類別
+        roots = {}
+        for spelling in spellings:
+            roots.setdefault(uf.find(spelling), []).append(spelling)
+        if len(roots) == 2:
+            (a, a_spellings), (b, b_spellings) = roots.items()
+            a_english = not any(_NON_ASCII.search(spelling) for spelling in a_spellings)
+            b_english = not any(_NON_ASCII.search(spelling) for spelling in b_spellings)
+            if a_english != b_english:
+                uf.union(a, b)
+
+    classes, class_of = _classes(uf, uses, uses)
+    song_sources = []
+    for song in songs:
+        ids = []
+        for source in song.sources:
+            if class_of[source] not in ids:
+                ids.append(class_of[source])
+        song_sources.append(ids)
+    return classes, class_of, song_sources
+
+def artist_classes(songs, song_sources):
+    """歌手的 (類別列表, {寫法: 編號}, 每首歌的歌手編號)；song_sources 為每首歌的出典編號列表"""
+    uses = {}
+    for song in songs:
+        if song.artist:
+            uses[song.artist] = uses.get(song.artist, 0) + 1
+    keys = {artist: canonical_key(artist) for artist in uses}
+    uf = _link_by_key(uses, keys)
+
+    # 同名歌曲：出典屬於同一類時，不同的歌手寫法可能是同一個歌手
+    by_name = {}
+    for song, sources in zip(songs, song_sources):
+        if song.artist:
+            by_name.setdefault(song.key[0], []).append((song.artist, set(sources)))
+    for entries in by_name.values():
+        for i, (a, a_sources) in enumerate(entries):
+            for b, b_sources in entries[i + 1:]:
+                if a_sources & b_sources:
+                    _link_related(uf, [a, b], keys)
+
+    classes, class_of = _classes(uf, uses, uses)
+    return classes, class_of, [class_of[song.artist] if song.artist else None for song in songs]
+
+def build_canonical(songs):
+    """由 Song 列表（data.json 順序）建立標準化對照表，回傳可直接序列化的 dict"""
+    sources, _, song_sources = source_classes(songs)
+    artists, _, song_artists = artist_classes(songs, song_sources)
+    return {
+        'format': CANONICAL_FORMAT,
+        'sources': sources,
+        'artists': artists,
+        'songs': {'sources': song_sources, 'artist': song_artists},
+    }
+
+def _merged(classes):
+    return [entry for entry in classes if len(entry['spellings']) > 1]
+
+def write_canonical(songs, output_path=CANONICAL_PATH):
+    """寫出 canonical.json，回傳對照表"""
+    canonical = build_canonical(songs)
+    output_writer.write_json(output_path, canonical, separators=(',', ':'))
+    for kind in ('sources', 'artists'):
+        classes = canonical[kind]
+        spellings = sum(len(entry['spellings']) for entry in classes)
+        print(f"Canonical {kind}: {spellings} spellings -> {len(classes)} classes "
+              f"({len(_merged(classes))} with several spellings)")
+    return canonical
+
+class _SongView:
+    """由 data.json 的一筆歌曲取出建立對照表需要的欄位（與 Song 相同的屬性名稱）"""
+    __slots__ = ('key', 'artist', 'sources')
+
+    def __init__(self, entry):
+        self.key = (normalize_key(entry['song_name']), normalize_key(entry['artist']))
+        self.artist = entry['artist']
+        self.sources = dict.fromkeys(source for source in entry.get('_searchableSources', '').split('|') if source)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data.json', help='歌曲資料（data.json）')
+    parser.add_argument('--output', default=CANONICAL_PATH)
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        songs = [_SongView(entry) for entry in json.load(f)]
+    canonical = write_canonical(songs, args.output)
+    for kind in ('sources', 'artists'):
+        print(f"\n{kind}:")
+        for entry in _merged(canonical[kind]):
+            print(f"  {entry['ja']}" + (f" / {entry['en']}" if entry['en'] and entry['en'] != entry['ja'] else '')
+                  + f"  <- {' | '.join(entry['spellings'])}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""本地 SQLite 歌曲資料庫：只重新解析有變動的歌單，並可匯出 data.json。
+
+    python backend/process_timeline.py --db catalogue.db
+
+其他腳本（check_deleted_videos.py、update_tags_from_data.py）在資料庫與 timeline/ 一致時改由此讀取
+（open_current，唯讀，不建立或重建資料表），資料庫不存在、過期或是空的時退回 data.json。
+"""
+import contextlib
+import hashlib
+import io
+import os
+import sqlite3
+
+from process_timeline import Appearance, Song, iter_timeline_files, load_rules, process_timeline
+
+DB_PATH = 'catalogue.db'
+SCHEMA_VERSION = 3  # 資料表結構變動時遞增；版本不同的資料庫只是快取，整個重建
+
+# 會影響每筆演唱標記（會限、刪檔、清唱、版權、首字分類）的規則檔，內容變動時需全部重建
+FLAG_RULE_FILES = ['exceptions.txt', 'acapella.txt', 'headers.txt']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timeline_files (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    file_id INTEGER PRIMARY KEY REFERENCES timeline_files(id) ON DELETE CASCADE,
+    video_id TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS songs (
+    id INTEGER PRIMARY KEY,
+    norm_name TEXT NOT NULL,
+    norm_artist TEXT NOT NULL,
+    song_name TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    is_copyright INTEGER NOT NULL,
+    az TEXT,
+    origin_file_id INTEGER NOT NULL,
+    UNIQUE (norm_name, norm_artist)
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    id INTEGER PRIMARY KEY,
+    song_id INTEGER NOT NULL REFERENCES songs(id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES timeline_files(id) ON DELETE CASCADE,
+    ord INTEGER NOT NULL,
+    line INTEGER,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    is_member_exclusive INTEGER NOT NULL,
+    is_acapella INTEGER NOT NULL,
+    is_private INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    song_id INTEGER NOT NULL REFERENCES songs(id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES timeline_files(id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    PRIMARY KEY (song_id, file_id, source)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    norm_name TEXT NOT NULL,
+    norm_artist TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (norm_name, norm_artist, ord)
+);
+CREATE INDEX IF NOT EXISTS idx_songs_norm_artist ON songs (norm_artist);
+CREATE INDEX IF NOT EXISTS idx_appearances_song ON appearances (song_id);
+CREATE INDEX IF NOT EXISTS idx_appearances_file ON appearances (file_id);
+CREATE INDEX IF NOT EXISTS idx_appearances_date ON appearances (date);
+CREATE INDEX IF NOT EXISTS idx_appearances_video ON appearances (video_id);
+CREATE INDEX IF NOT EXISTS idx_videos_video ON videos (video_id);
+CREATE INDEX IF NOT EXISTS idx_videos_date ON videos (date);
+CREATE INDEX IF NOT EXISTS idx_sources_file ON sources (file_id);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags (tag);
+"""
+
+def connect(db_path=DB_PATH):
+    """開啟（必要時建立）資料庫"""
+    conn = sqlite3.connect(db_path)
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        if tables:
+            print("Catalogue database schema changed, rebuilding")
+        for table in tables:
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.executescript(SCHEMA + f'PRAGMA user_version = {SCHEMA_VERSION};')
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+def open_current(db_path=DB_PATH, timeline_dir='timeline'):
+    """以唯讀方式開啟與 timeline 資料夾一致的資料庫；不存在、結構版本不同、過期或沒有歌曲時回傳 None。
+
+    一致是指規則檔與每份歌單的 SHA-1 都與上次同步時相同。不會建立或重建資料表，
+    資料庫需要更新時由 process_timeline.py --db 同步。
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f'file:{os.path.abspath(db_path)}?mode=ro', uri=True)
+    try:
+        reason = _stale_reason(conn, timeline_dir)
+    except sqlite3.DatabaseError as e:
+        reason = str(e)
+    if reason:
+        conn.close()
+        print(f"Catalogue database {db_path} not used ({reason}), falling back to data.json")
+        return None
+    return conn
+
+def _stale_reason(conn, timeline_dir):
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        return 'schema version differs'
+    rules_sha1 = file_sha1(*[os.path.join(timeline_dir, name) for name in FLAG_RULE_FILES])
+    if _get_meta(conn, 'rules_sha1') != rules_sha1:
+        return 'rule files changed since the last sync'
+    synced = dict(conn.execute('SELECT filename, sha1 FROM timeline_files'))
+    current = {filename: file_sha1(file_path) for filename, file_path, _ in iter_timeline_files(timeline_dir)}
+    if synced != current:
+        return 'timeline changed since the last sync'
+    if conn.execute('SELECT 1 FROM songs LIMIT 1').fetchone() is None:
+        return 'no songs'
+    return None
+
+def file_sha1(*paths):
+    """計算一個或多個檔案內容的 SHA-1（不存在的檔案視為空）"""
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8') + b'\0')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def _get_meta(conn, key):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+def _set_meta(conn, key, value):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+def _set_origin(conn, song_id, file_id, song):
+    conn.execute('UPDATE songs SET song_name = ?, artist = ?, is_copyright = ?, az = ?, origin_file_id = ? '
+                 'WHERE id = ?', (song.song_name, song.artist, song.is_copyright, song.az, file_id, song_id))
+
+def _insert_file_songs(conn, file_id, filename, songs):
+    """寫入單一歌單解析出的歌曲、出典與演唱紀錄"""
+    ord_ = 0
+    for song in songs:
+        norm_name, norm_artist = song.key
+        row = conn.execute(
+            'SELECT s.id, s.origin_file_id, f.filename FROM songs s '
+            'LEFT JOIN timeline_files f ON f.id = s.origin_file_id WHERE norm_name = ? AND norm_artist = ?', song.key
+        ).fetchone()
+        if row is None:
+            song_id = conn.execute(
+                'INSERT INTO songs (norm_name, norm_artist, song_name, artist, is_copyright, az, origin_file_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (norm_name, norm_artist, song.song_name, song.artist, song.is_copyright, song.az, file_id)
+            ).lastrowid
+        else:
+            song_id = row[0]
+            # 與 build_catalogue 相同，顯示用的曲名、歌手取自檔名最前面（最早）的歌單：
+            # 該歌單被修改，或補上了更早的歌單時一併更新
+            if row[1] == file_id or row[2] is None or filename < row[2]:
+                _set_origin(conn, song_id, file_id, song)
+        # 與 build_catalogue 相同：收錄該歌單中這首歌所有的出典寫法
+        for source in song.sources:
+            conn.execute('INSERT INTO sources (song_id, file_id, source) VALUES (?, ?, ?)',
+                         (song_id, file_id, source))
+        for appearance in song.dates:
+            conn.execute(
+                'INSERT INTO appearances (song_id, file_id, ord, line, date, time, seconds, video_id, '
+                'is_member_exclusive, is_acapella, is_private) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (song_id, file_id, ord_, appearance.position and appearance.position[1],
+                 appearance.date, appearance.time, appearance.seconds,
+                 appearance.video_id, appearance.is_member_exclusive, appearance.is_acapella,
+                 appearance.is_private)
+            )
+            ord_ += 1
+    if songs and songs[0].dates:
+        first = songs[0].dates[0]
+        conn.execute('INSERT OR REPLACE INTO videos (file_id, video_id, date) VALUES (?, ?, ?)',
+                     (file_id, first.video_id, first.date))
+
+def _sync_tags(conn, tags_map):
+    conn.execute('DELETE FROM tags')
+    conn.executemany(
+        'INSERT INTO tags (norm_name, norm_artist, ord, tag) VALUES (?, ?, ?, ?)',
+        [(key[0], key[1], i, tag) for key, tags in tags_map.items() for i, tag in enumerate(tags)]
+    )
+
+def sync_timeline(conn, timeline_dir='timeline'):
+    """將 timeline 資料夾同步進資料庫，只重新解析內容有變動的歌單。
+
+    回傳 (重新解析的檔案數, 移除的檔案數)。
+    """
+    rules, tags_map = load_rules(timeline_dir)
+
+    rules_sha1 = file_sha1(*[os.path.join(timeline_dir, name) for name in FLAG_RULE_FILES])
+    if _get_meta(conn, 'rules_sha1') != rules_sha1:
+        print("Rule files changed, rebuilding all timeline entries")
+        conn.execute('DELETE FROM timeline_files')
+        conn.execute('DELETE FROM songs')
+        _set_meta(conn, 'rules_sha1', rules_sha1)
+
+    tags_sha1 = file_sha1(os.path.join(timeline_dir, 'tags.txt'))
+    if _get_meta(conn, 'tags_sha1') != tags_sha1:
+        _sync_tags(conn, tags_map)
+        _set_meta(conn, 'tags_sha1', tags_sha1)
+
+    known = {filename: (file_id, sha1) for file_id, filename, sha1
+             in conn.execute('SELECT id, filename, sha1 FROM timeline_files')}
+    timeline_files = list(iter_timeline_files(timeline_dir))
+    seen = {filename for filename, _, _ in timeline_files}
+    removed = [filename for filename in known if filename not in seen]
+    for filename in removed:
+        conn.execute('DELETE FROM timeline_files WHERE id = ?', (known[filename][0],))
+
+    changed = 0
+    failed = 0
+    for filename, file_path, date_str in timeline_files:
+        sha1 = file_sha1(file_path)
+        if filename in known and known[filename][1] == sha1:
+            continue
+        # 先解析成功才改動資料庫：解析失敗時保留舊的演唱紀錄與 sha1，下次同步會再重試
+        try:
+            print(f"Processing file: {filename}")
+            songs = process_timeline(file_path, date_str, **rules)
+        except Exception as e:
+            print(f"Error processing file {file_path}: {e}")
+            failed += 1
+            continue
+        if filename in known:
+            # 保留原本的 file_id，讓匯出時的順序維持不變
+            file_id = known[filename][0]
+            for table in ('appearances', 'sources', 'videos'):
+                conn.execute(f'DELETE FROM {table} WHERE file_id = ?', (file_id,))
+            conn.execute('UPDATE timeline_files SET sha1 = ?, date = ? WHERE id = ?',
+                         (sha1, date_str, file_id))
+        else:
+            file_id = conn.execute('INSERT INTO timeline_files (filename, date, sha1) VALUES (?, ?, ?)',
+                                   (filename, date_str, sha1)).lastrowid
+        _insert_file_songs(conn, file_id, filename, songs)
+        changed += 1
+
+    # 移除已沒有任何演唱紀錄的歌曲
+    conn.execute('DELETE FROM songs WHERE id NOT IN (SELECT DISTINCT song_id FROM appearances)')
+    _repair_origins(conn, timeline_dir, rules)
+    conn.commit()
+    print(f"Synced catalogue database: {changed} files parsed, {len(removed)} removed, "
+          f"{failed} failed, {len(seen) - changed - failed} unchanged")
+    return changed, len(removed)
+
+def _repair_origins(conn, timeline_dir, rules):
+    """首次收錄的歌單已被刪除、或改過後不再有這首歌時，改由最早含有該曲的歌單取得顯示用的曲名、歌手"""
+    orphans = {}
+    for song_id, filename, file_id, date_str in conn.execute(
+        # SQLite 中與單一 MIN() 同時選取的欄位取自最小值的那一列
+        'SELECT s.id, MIN(f.filename), f.id, f.date FROM songs s '
+        'JOIN appearances a ON a.song_id = s.id JOIN timeline_files f ON f.id = a.file_id '
+        'WHERE NOT EXISTS (SELECT 1 FROM appearances o WHERE o.song_id = s.id AND o.file_id = s.origin_file_id) '
+        'GROUP BY s.id'
+    ).fetchall():
+        orphans.setdefault((filename, file_id, date_str), []).append(song_id)
+    for (filename, file_id, date_str), song_ids in orphans.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            parsed = {song.key: song for song in process_timeline(os.path.join(timeline_dir, filename),
+                                                                   date_str, **rules)}
+        for song_id in song_ids:
+            key = conn.execute('SELECT norm_name, norm_artist FROM songs WHERE id = ?', (song_id,)).fetchone()
+            if key in parsed:
+                _set_origin(conn, song_id, file_id, parsed[key])
+
+def _song_order(conn):
+    """歌曲編號 -> 順序：依歌單檔名與歌單內的順序第一次出現的位置，與 build_catalogue 相同"""
+    order = {}
+    for (song_id,) in conn.execute('SELECT a.song_id FROM appearances a JOIN timeline_files f ON f.id = a.file_id '
+                                   'ORDER BY f.filename, a.ord'):
+        order.setdefault(song_id, len(order))
+    return order
+
+def load_songs(conn):
+    """由資料庫重建 Song 物件列表，順序與 build_catalogue 相同（依歌曲首次出現）"""
+    order = _song_order(conn)
+    songs = {}
+    for song_id, norm_name, norm_artist, song_name, artist, is_copyright, az in sorted(conn.execute(
+        'SELECT id, norm_name, norm_artist, song_name, artist, is_copyright, az FROM songs'
+    ), key=lambda row: order.get(row[0], len(order))):
+        songs[song_id] = Song((norm_name, norm_artist), song_name, artist, '', bool(is_copyright), az)
+
+    for row in conn.execute(
+        'SELECT a.song_id, a.date, a.time, a.video_id, a.seconds, a.is_member_exclusive, a.is_acapella, '
+        'a.is_private, f.filename, a.line '
+        'FROM appearances a JOIN timeline_files f ON f.id = a.file_id ORDER BY f.filename, a.ord'
+    ):
+        songs[row[0]].add_appearance(Appearance(
+            row[1], row[2], row[3], row[4], bool(row[5]), bool(row[6]), bool(row[7]),
+            (row[8], row[9]) if row[9] is not None else None
+        ))
+
+    for song_id, source in conn.execute('SELECT s.song_id, s.source FROM sources s '
+                                        'JOIN timeline_files f ON f.id = s.file_id ORDER BY f.filename, s.rowid'):
+        songs[song_id].sources.setdefault(source, None)
+
+    by_key = {song.key: song for song in songs.values()}
+    for norm_name, norm_artist, tag in conn.execute(
+        'SELECT norm_name, norm_artist, tag FROM tags ORDER BY norm_name, norm_artist, ord'
+    ):
+        song = by_key.get((norm_name, norm_artist))
+        if song is not None:
+            song.tags.append(tag)
+
+    print(f"Total unique songs: {len(songs)}")
+    return list(songs.values())
+
+def get_video_ids(conn):
+    """資料庫中所有歌單的影片 ID"""
+    return {video_id for (video_id,) in conn.execute('SELECT DISTINCT video_id FROM videos')}
+
+def get_song_entries(conn):
+    """資料庫中所有歌曲的 (曲名, 歌手)，依首次出現順序"""
+    order = _song_order(conn)
+    rows = conn.execute('SELECT id, song_name, artist FROM songs').fetchall()
+    return [(song_name, artist) for _, song_name, artist in sorted(rows, key=lambda row: order.get(row[0], len(order)))]
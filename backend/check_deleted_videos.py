@@ -1,45 +1,37 @@
 import os
 import json
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-from googleapiclient.errors import HttpError
+import catalogue_db
+import output_writer
+import video_registry
+import youtube_client
 
-# 從環境變量中讀取 Google API 憑證
-google_sheets_credentials = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
-google_api_key = os.getenv('GOOGLE_API_KEY')
+def default_api():
+    """單獨執行時的客戶端：直接呼叫 API，不經過配額排程器（第一次使用時才檢查憑證並建立；
+    pipeline.py 會傳入經過排程器的客戶端）"""
+    return video_registry.DirectApi(youtube_client.youtube())
 
-if not google_sheets_credentials or not google_api_key:
-    raise ValueError("缺少Google API憑證或API密鑰")
-
-try:
-    credentials_info = json.loads(google_sheets_credentials)
-    credentials = service_account.Credentials.from_service_account_info(credentials_info)
-except Exception as e:
-    raise ValueError("無效的Google Sheets憑證") from e
-
-# YouTube Data API 客戶端
-youtube = build('youtube', 'v3', developerKey=google_api_key)
-
-def check_video_status(video_id):
-    """檢查影片狀態"""
+def check_video_status(video_id, api=None, registry=None):
+    """檢查影片是否已刪除（或設為私人）；影片狀態取自共用的登錄檔，沒有紀錄或過期時才查詢"""
+    api = api or default_api()
+    registry = registry or getattr(api, 'registry', None) or video_registry.VideoRegistry()
     try:
-        response = youtube.videos().list(
-            part='status',
-            id=video_id
-        ).execute()
-        
         # 如果沒有找到影片，表示影片已被刪除
-        if not response.get('items'):
-            return True
-        return False
-    except HttpError as e:
+        return registry.lookup(api, video_id)['status'] == 'missing'
+    except youtube_client.HttpError as e:
         if e.resp.status == 404:  # 影片不存在
             return True
         print(f"檢查影片 {video_id} 時發生錯誤: {e}")
         return False
 
 def get_all_video_ids():
-    """從 data.json 中獲取所有影片 ID"""
+    """獲取所有影片 ID：本地資料庫與 timeline/ 一致時直接查詢，否則從 data.json 解析"""
+    conn = catalogue_db.open_current(catalogue_db.DB_PATH)
+    if conn is not None:
+        try:
+            return catalogue_db.get_video_ids(conn)
+        finally:
+            conn.close()
+
     try:
         with open('data.json', 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -79,24 +71,31 @@ def update_exceptions_file(deleted_video_ids):
         if not replaced:
             existing_lines.append(('private_id', deleted_ids_str))
 
-        # 寫回文件，保持原有順序並確保換行正確
-        with open('timeline/exceptions.txt', 'w', encoding='utf-8') as f:
-            for key, value in existing_lines:
-                f.write(f"{key}|{value}\n")
-
-        print(f"已更新 exceptions.txt，新增/更新 {len(deleted_video_ids)} 個已刪除影片ID")
+        # 寫回文件，保持原有順序並確保換行正確；已刪除影片沒有增減時不覆寫
+        content = ''.join(f"{key}|{value}\n" for key, value in existing_lines)
+        if output_writer.write_text('timeline/exceptions.txt', content):
+            print(f"已更新 exceptions.txt，新增/更新 {len(deleted_video_ids)} 個已刪除影片ID")
+        else:
+            print("exceptions.txt 的已刪除影片ID沒有變動")
     except Exception as e:
         print(f"更新 exceptions.txt 時發生錯誤: {e}")
 
-def main():
-    # 獲取所有影片 ID
-    video_ids = get_all_video_ids()
+def find_deleted_videos(video_ids, api=None, registry=None):
+    """檢查每個影片的狀態並更新 exceptions.txt，回傳已刪除的影片 ID"""
+    api = api or default_api()
+    registry = registry or getattr(api, 'registry', None) or video_registry.VideoRegistry()
     print(f"找到 {len(video_ids)} 個影片需要檢查")
 
-    # 檢查每個影片的狀態
+    # 先以批次查詢（每 50 部一次）更新登錄檔中沒有紀錄或過期的影片，之後逐一判斷不再呼叫 API；
+    # 批次失敗時由 check_video_status 逐一查詢
+    try:
+        registry.refresh(api, video_ids)
+    except youtube_client.HttpError as e:
+        print(f"批次檢查影片時發生錯誤，改為逐一檢查: {e}")
+
     deleted_video_ids = set()
-    for video_id in video_ids:
-        if check_video_status(video_id):
+    for video_id in sorted(video_ids):
+        if check_video_status(video_id, api, registry):
             print(f"影片已刪除: {video_id}")
             deleted_video_ids.add(video_id)
 
@@ -105,6 +104,12 @@ def main():
         update_exceptions_file(deleted_video_ids)
     else:
         print("未發現已刪除的影片")
+    print(registry.summary())
+    return deleted_video_ids
+
+def main():
+    # 獲取所有影片 ID 並檢查
+    find_deleted_videos(get_all_video_ids())
 
 if __name__ == '__main__':
     main()
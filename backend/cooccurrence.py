@@ -0,0 +1,187 @@
+"""歌曲之間的關聯：同一場直播一起唱過的次數，與接在某首歌後面唱的歌。
+
+以 setlists.py 的每場歌單（依歌單順序的歌曲編號）建立「歌曲 × 直播」的稀疏關聯矩陣 A（CSR：indptr、indices，
+同一場重複的歌只算一次），共同出現次數即 AᵀA 的非對角元素，只對每場直播內的歌曲組合計數，不建立整個矩陣；
+接續次數則取每場歌單中相鄰的兩首（前後為同一首時不計）。
+有安裝 NumPy 時以 repeat／unique 向量化計數，否則使用結果相同的純 Python 迴圈。
+
+結果寫在 data/cooccurrence.json，只保留每首歌的前 TOP_K 名，檔案大小隨歌曲數線性增加：
+    format    格式版本
+    top_k     每首歌保留的筆數
+    streams   直播場數
+    pairs     一起唱過的歌曲組合數，transitions 為不同的接續組合數
+    songs     以 data.json 順序排列的欄位陣列：
+                streams           唱過這首歌的直播場數（AᵀA 的對角元素）
+                neighbours        最常一起唱的歌曲編號（依次數多到少，同數時依編號）
+                neighbour_counts  對應的一起唱過的場數
+                next              最常接在這首歌後面的歌曲編號
+                next_counts       對應的次數
+
+    python backend/cooccurrence.py                     # 由 data.json 與 data/setlists.json 重建並列出最常一起唱的組合
+    python backend/cooccurrence.py --song 'Monsoon'    # 曲名包含指定文字的歌曲的關聯
+"""
+import argparse
+import heapq
+import json
+import os
+from array import array
+
+import output_writer
+from process_timeline import ARTIFACT_DIR
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COOCCURRENCE_FORMAT = 1
+COOCCURRENCE_PATH = os.path.join(ARTIFACT_DIR, 'cooccurrence.json')
+TOP_K = 10
+
+def incidence(streams):
+    """每場依演唱順序的歌曲編號列表 → 稀疏關聯矩陣的 (indptr, indices)，每場的歌曲編號遞增且不重複"""
+    indptr = array('I', [0])
+    indices = array('I')
+    for songs in streams:
+        indices.extend(sorted(set(songs)))
+        indptr.append(len(indices))
+    return indptr, indices
+
+def _top_python(weights, size, top_k):
+    """{(a, b): 次數}（a → b）→ 每首歌依 (-次數, 編號) 的前 top_k 名 (編號列表, 次數列表)"""
+    per_song = [[] for _ in range(size)]
+    for (a, b), count in weights.items():
+        per_song[a].append((-count, b))
+    ids, counts = [], []
+    for entries in per_song:
+        best = heapq.nsmallest(top_k, entries)
+        ids.append([other for _, other in best])
+        counts.append([-count for count, _ in best])
+    return ids, counts
+
+def _relations_python(indptr, indices, streams, size, top_k):
+    stream_counts = [0] * size
+    together = {}
+    for s in range(len(indptr) - 1):
+        members = indices[indptr[s]:indptr[s + 1]]
+        for i, a in enumerate(members):
+            stream_counts[a] += 1
+            for b in members[i + 1:]:
+                together[a, b] = together.get((a, b), 0) + 1
+    pairs = len(together)
+    for (a, b), count in list(together.items()):
+        together[b, a] = count
+
+    following = {}
+    for songs in streams:
+        for a, b in zip(songs, songs[1:]):
+            if a != b:
+                following[a, b] = following.get((a, b), 0) + 1
+    return stream_counts, pairs, _top_python(together, size, top_k), len(following), \
+        _top_python(following, size, top_k)
+
+def _top_numpy(source, target, weight, size, top_k):
+    order = np.lexsort((target, -weight, source))
+    source, target, weight = source[order], target[order], weight[order]
+    starts = np.searchsorted(source, np.arange(size))
+    keep = np.arange(len(source)) - starts[source] < top_k
+    source, target, weight = source[keep], target[keep], weight[keep]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(source, minlength=size)))).tolist()
+    target, weight = target.tolist(), weight.tolist()
+    return ([target[bounds[i]:bounds[i + 1]] for i in range(size)],
+            [weight[bounds[i]:bounds[i + 1]] for i in range(size)])
+
+def _count_pairs(first, second, size):
+    codes, counts = np.unique(first * size + second, return_counts=True)
+    return codes // size, codes % size, counts
+
+def _relations_numpy(indptr, indices, streams, size, top_k):
+    indptr = np.frombuffer(indptr, dtype=np.uint32).astype(np.int64)
+    indices = np.frombuffer(indices, dtype=np.uint32).astype(np.int64)
+    stream_counts = np.bincount(indices, minlength=size)
+
+    # 每個位置與同一場中排在它後面的所有位置配對：位置 p 的配對數為該場結尾 - p - 1
+    positions = np.arange(len(indices))
+    stream_of = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    partners = indptr[1:][stream_of] - positions - 1
+    total = int(partners.sum())
+    first = np.repeat(indices, partners)
+    offsets = np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+    second = indices[np.repeat(positions + 1, partners) + offsets]
+    a, b, together = _count_pairs(first, second, size)
+    neighbours = _top_numpy(np.concatenate((a, b)), np.concatenate((b, a)),
+                            np.concatenate((together, together)), size, top_k)
+
+    flat = np.fromiter((song for songs in streams for song in songs), dtype=np.int64)
+    lengths = np.fromiter((len(songs) for songs in streams), dtype=np.int64, count=len(streams))
+    # 相鄰的兩首：排除跨場（前一場最後一首接下一場第一首）與同一首重複
+    valid = np.ones(max(len(flat) - 1, 0), dtype=bool)
+    ends = np.cumsum(lengths)[:-1] - 1
+    valid[ends[(ends >= 0) & (ends < len(valid))]] = False
+    valid &= flat[:-1] != flat[1:]
+    a, b, following = _count_pairs(flat[:-1][valid], flat[1:][valid], size)
+    return stream_counts.tolist(), len(together), neighbours, len(following), \
+        _top_numpy(a, b, following, size, top_k)
+
+def compute_cooccurrence(streams, size, top_k=TOP_K, use_numpy=None):
+    """streams：每場依演唱順序的歌曲編號列表；size：歌曲數。回傳可直接序列化的 dict"""
+    if use_numpy is None:
+        use_numpy = np is not None
+    indptr, indices = incidence(streams)
+    relations = _relations_numpy if use_numpy else _relations_python
+    stream_counts, pairs, (neighbours, neighbour_counts), transitions, (following, next_counts) = \
+        relations(indptr, indices, streams, size, top_k)
+    return {
+        'format': COOCCURRENCE_FORMAT,
+        'top_k': top_k,
+        'streams': len(streams),
+        'pairs': pairs,
+        'transitions': transitions,
+        'songs': {
+            'streams': stream_counts,
+            'neighbours': neighbours,
+            'neighbour_counts': neighbour_counts,
+            'next': following,
+            'next_counts': next_counts,
+        },
+    }
+
+def write_cooccurrence(streams, size, output_path=COOCCURRENCE_PATH):
+    """由 setlists 的每場歌曲列表寫出 cooccurrence.json，回傳結果"""
+    result = compute_cooccurrence(streams, size)
+    output_writer.write_json(output_path, result, separators=(',', ':'))
+    print(f"Co-occurrence: {result['pairs']} song pairs, {result['transitions']} transitions over "
+          f"{result['streams']} streams -> {output_path} ({'NumPy' if np is not None else 'pure Python'})")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--song', help='只列出曲名包含此文字的歌曲')
+    parser.add_argument('--data', default='data.json', help='歌曲資料（data.json，用來顯示曲名）')
+    parser.add_argument('--setlists', default=os.path.join(ARTIFACT_DIR, 'setlists.json'))
+    parser.add_argument('--output', default=COOCCURRENCE_PATH)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        names = [f"{entry['song_name']} / {entry['artist']}" for entry in json.load(f)]
+    with open(args.setlists, 'r', encoding='utf-8') as f:
+        streams = [stream['songs'] for stream in json.load(f)['streams']]
+    songs = write_cooccurrence(streams, len(names), args.output)['songs']
+
+    if args.song:
+        for song_id, name in enumerate(names):
+            if args.song.lower() in name.lower():
+                print(f"\n{name}  ({songs['streams'][song_id]} streams)")
+                for label, ids, counts in (('together', songs['neighbours'][song_id], songs['neighbour_counts'][song_id]),
+                                           ('next', songs['next'][song_id], songs['next_counts'][song_id])):
+                    for other, count in zip(ids, counts):
+                        print(f"  {label:<9}{count:>4}  {names[other]}")
+        return
+    top = sorted(((count, a, b) for a, (ids, counts) in enumerate(zip(songs['neighbours'], songs['neighbour_counts']))
+                  for b, count in zip(ids, counts) if a < b), key=lambda item: (-item[0], item[1], item[2]))
+    for count, a, b in top[:args.limit]:
+        print(f"{count:>4}  {names[a]}  +  {names[b]}")
+
+if __name__ == '__main__':
+    main()
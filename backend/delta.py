@@ -0,0 +1,227 @@
+"""data.json 的版本差異檔：讓已快取第 N 版的網頁只下載差異，而不必重抓整份 data.json。
+
+每次建置時與上一版 data.json 比較，寫出 data/delta/ 下的：
+    manifest.json   目前版本、data.json 的 SHA-1 與最近 MAX_CHAIN 個差異檔
+    <N>-<N+1>.json  從第 N 版到第 N+1 版的差異
+
+持有第 N 版的用戶端依序套用 manifest 中 from >= N 的差異檔即可得到最新版；
+N 早於差異鏈的起點時直接重抓 data.json。apply_delta() 是套用規則的參考實作，
+建置時每個新差異檔都會以它套回上一版驗證結果與新 data.json 完全相同。
+
+    python backend/delta.py verify OLD_DATA_JSON --from N   # 以參考實作重播差異鏈並比對
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+
+import output_writer
+from process_timeline import normalize_key
+
+DELTA_FORMAT = 1
+MAX_CHAIN = 10
+MANIFEST_NAME = 'manifest.json'
+
+def song_key(song):
+    """歌曲在差異檔中的識別鍵（與 process_timeline 合併時相同的正規化鍵）"""
+    return [normalize_key(song.get('song_name', '')), normalize_key(song.get('artist', ''))]
+
+def appearance_id(info):
+    """一筆演唱紀錄的識別：日期與連結（含影片 ID 與秒數）"""
+    return (info['date'], info['time'], info['link'])
+
+def _key_str(key):
+    return '\0'.join(key)
+
+def diff_catalogues(old, new):
+    """比較兩版 data.json（dict 列表），回傳差異內容（不含版本號）"""
+    old_by_key = {_key_str(song_key(song)): song for song in old}
+    new_by_key = {_key_str(song_key(song)): song for song in new}
+
+    delta = {
+        'songs_added': [],
+        'songs_removed': [],
+        'songs_updated': [],
+        'appearances_added': [],
+        'appearances_removed': [],
+        'flags_changed': [],
+        'dates_replaced': [],
+    }
+    for key_str, song in old_by_key.items():
+        if key_str not in new_by_key:
+            delta['songs_removed'].append(song_key(song))
+
+    for key_str, song in new_by_key.items():
+        previous = old_by_key.get(key_str)
+        if previous is None:
+            delta['songs_added'].append(song)
+            continue
+        key = song_key(song)
+        fields = {name: value for name, value in song.items()
+                  if name != 'dates' and previous.get(name) != value}
+        if fields:
+            delta['songs_updated'].append({'key': key, 'fields': fields})
+        _diff_dates(key, previous['dates'], song['dates'], delta)
+
+    # 新版歌曲順序 = 舊版去掉移除的歌 + 依序附加新歌；不是這種情況時附上完整順序
+    removed = {_key_str(key) for key in delta['songs_removed']}
+    expected = [key_str for key_str in old_by_key if key_str not in removed]
+    expected += [_key_str(song_key(song)) for song in delta['songs_added']]
+    if expected != list(new_by_key):
+        delta['order'] = [song_key(song) for song in new]
+
+    return {name: value for name, value in delta.items() if value}
+
+def _diff_dates(key, old_dates, new_dates, delta):
+    old_ids = [appearance_id(info) for info in old_dates]
+    new_ids = [appearance_id(info) for info in new_dates]
+    if old_ids == new_ids and old_dates == new_dates:
+        return
+    new_id_set = set(new_ids)
+    kept = [i for i in old_ids if i in new_id_set]
+    # 只能表示成「移除 + 附加 + 標記變更」時才拆開，否則整個 dates 重送
+    if (len(set(old_ids)) != len(old_ids) or len(new_id_set) != len(new_ids)
+            or new_ids[:len(kept)] != kept):
+        delta['dates_replaced'].append({'key': key, 'dates': new_dates})
+        return
+
+    removed = [list(i) for i in old_ids if i not in new_id_set]
+    if removed:
+        delta['appearances_removed'].append({'key': key, 'ids': removed})
+    old_by_id = dict(zip(old_ids, old_dates))
+    for info in new_dates[:len(kept)]:
+        before = old_by_id[appearance_id(info)]
+        changed = {name: value for name, value in info.items() if before.get(name) != value}
+        if changed:
+            delta['flags_changed'].append({'key': key, 'id': list(appearance_id(info)), 'fields': changed})
+    if len(new_dates) > len(kept):
+        delta['appearances_added'].append({'key': key, 'dates': new_dates[len(kept):]})
+
+def apply_delta(songs, delta):
+    """參考實作：將差異套用到 data.json（dict 列表），回傳新列表，不修改輸入"""
+    by_key = {_key_str(song_key(song)): copy.deepcopy(song) for song in songs}
+
+    for key in delta.get('songs_removed', []):
+        by_key.pop(_key_str(key), None)
+    for item in delta.get('songs_updated', []):
+        by_key[_key_str(item['key'])].update(item['fields'])
+    for item in delta.get('appearances_removed', []):
+        song = by_key[_key_str(item['key'])]
+        removed = {tuple(i) for i in item['ids']}
+        song['dates'] = [info for info in song['dates'] if appearance_id(info) not in removed]
+    for item in delta.get('flags_changed', []):
+        song = by_key[_key_str(item['key'])]
+        target = tuple(item['id'])
+        for info in song['dates']:
+            if appearance_id(info) == target:
+                info.update(item['fields'])
+                break
+    for item in delta.get('appearances_added', []):
+        by_key[_key_str(item['key'])]['dates'].extend(item['dates'])
+    for item in delta.get('dates_replaced', []):
+        by_key[_key_str(item['key'])]['dates'] = item['dates']
+    for song in delta.get('songs_added', []):
+        by_key[_key_str(song_key(song))] = copy.deepcopy(song)
+
+    if 'order' in delta:
+        return [by_key[_key_str(key)] for key in delta['order']]
+    return list(by_key.values())
+
+def apply_chain(songs, version, delta_dir):
+    """由第 version 版依序套用差異鏈到最新版；差異鏈不足時回傳 None（應重抓 data.json）"""
+    manifest = load_manifest(delta_dir)
+    if manifest is None:
+        return None
+    if version == manifest['version']:
+        return songs
+    chain = [entry for entry in manifest['deltas'] if entry['from'] >= version]
+    if not chain or chain[0]['from'] != version:
+        return None
+    for entry in chain:
+        with open(os.path.join(delta_dir, entry['file']), 'r', encoding='utf-8') as f:
+            songs = apply_delta(songs, json.load(f))
+    return songs
+
+def load_manifest(delta_dir):
+    path = os.path.join(delta_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def read_snapshot(data_path):
+    """讀取目前的 data.json 原始內容（覆寫前呼叫），不存在時回傳 None"""
+    if not os.path.exists(data_path):
+        return None
+    with open(data_path, 'rb') as f:
+        return f.read()
+
+def update_chain(previous_bytes, data_path, delta_dir, max_chain=MAX_CHAIN):
+    """比較上一版與新寫出的 data.json，更新差異鏈與 manifest，回傳目前版本號"""
+    with open(data_path, 'rb') as f:
+        current_bytes = f.read()
+    current_sha1 = hashlib.sha1(current_bytes).hexdigest()
+    manifest = load_manifest(delta_dir) or {'format': DELTA_FORMAT, 'version': 0, 'sha1': None, 'deltas': []}
+
+    if manifest['sha1'] == current_sha1:
+        print(f"data.json unchanged, delta chain stays at version {manifest['version']}")
+        return manifest['version']
+
+    os.makedirs(delta_dir, exist_ok=True)
+    previous_sha1 = hashlib.sha1(previous_bytes).hexdigest() if previous_bytes is not None else None
+    version = manifest['version'] + 1
+    if previous_sha1 is None or previous_sha1 != manifest['sha1']:
+        # 上一版不是差異鏈記錄的版本（首次建置或曾在鏈外修改），只能重新起算
+        print(f"Previous data.json is not version {manifest['version']}, starting a new delta chain")
+        deltas = []
+    else:
+        old = json.loads(previous_bytes)
+        new = json.loads(current_bytes)
+        delta = diff_catalogues(old, new)
+        if apply_delta(old, delta) != new:
+            raise RuntimeError("delta does not reproduce data.json")
+        delta.update({'format': DELTA_FORMAT, 'from': manifest['version'], 'to': version})
+        filename = f"{manifest['version']}-{version}.json"
+        output_writer.write_json(os.path.join(delta_dir, filename), delta, separators=(',', ':'))
+        size = os.path.getsize(os.path.join(delta_dir, filename))
+        print(f"Wrote delta {filename} ({size} bytes, data.json is {len(current_bytes)} bytes)")
+        deltas = manifest['deltas'] + [{'from': manifest['version'], 'to': version, 'file': filename,
+                                        'bytes': size}]
+
+    # 只保留最近 max_chain 個差異檔
+    deltas = deltas[-max_chain:]
+    manifest = {'format': DELTA_FORMAT, 'version': version, 'sha1': current_sha1, 'deltas': deltas}
+    output_writer.write_json(os.path.join(delta_dir, MANIFEST_NAME), manifest, indent=2)
+    # manifest 寫好之後才刪除不在其中的檔案（超出長度或重新起算前的舊差異檔）
+    keep = {entry['file'] for entry in deltas} | {MANIFEST_NAME}
+    for filename in sorted(os.listdir(delta_dir)):
+        if filename not in keep:
+            os.remove(os.path.join(delta_dir, filename))
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delta-dir', default=os.path.join('data', 'delta'))
+    parser.add_argument('--data', default='data.json', help='最新版 data.json')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    verify = subparsers.add_parser('verify', help='由舊版 data.json 套用差異鏈並與最新版比對')
+    verify.add_argument('old_data', help='舊版 data.json（例如 git show HEAD~1:data.json 的輸出）')
+    verify.add_argument('--from', dest='version', type=int, required=True, help='舊版的版本號')
+    args = parser.parse_args()
+
+    with open(args.old_data, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.data, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    result = apply_chain(old, args.version, args.delta_dir)
+    if result is None:
+        print(f"Version {args.version} is not covered by the delta chain; clients must refetch data.json")
+        raise SystemExit(1)
+    if result != current:
+        print("Mismatch: applying the delta chain does not reproduce data.json")
+        raise SystemExit(1)
+    print(f"OK: version {args.version} + delta chain == {args.data} ({len(current)} songs)")
+
+if __name__ == '__main__':
+    main()
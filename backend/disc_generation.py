@@ -1,20 +1,10 @@
-import json
 import os
 import re
 from urllib.parse import urlparse, parse_qs
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 
-# 環境變數與憑證設定
-google_sheets_credentials = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
-google_api_key = os.getenv('GOOGLE_API_KEY')
-
-if not google_sheets_credentials or not google_api_key:
-    raise ValueError("缺少 Google API 憑證或 API 密鑰")
-
-credentials_info = json.loads(google_sheets_credentials)
-credentials = service_account.Credentials.from_service_account_info(credentials_info)
-youtube = build('youtube', 'v3', developerKey=google_api_key)
+import output_writer
+import video_registry
+import youtube_client
 
 # 路徑定位 (確保 GitHub Actions 執行時能找到根目錄的 disc 資料夾)[cite: 1]
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +12,26 @@ ROOT_DIR = os.path.dirname(BASE_DIR)
 DISC_FILE_PATH = os.path.join(ROOT_DIR, 'disc', 'disc.txt')
 CACHE_FILE_PATH = os.path.join(ROOT_DIR, 'disc', 'disc.json')
 
+_registry = None
+_api = None
+
+def registry():
+    """與 getcomment、check_deleted_videos 共用的影片登錄檔，第一次使用時才讀取（import 時不讀檔）。
+
+    播放清單曲目與曲目影片資訊都記錄下來，未過期的播放清單不再呼叫 API。
+    """
+    global _registry
+    if _registry is None:
+        _registry = video_registry.VideoRegistry(os.path.join(ROOT_DIR, video_registry.REGISTRY_PATH))
+    return _registry
+
+def youtube_api():
+    """直接呼叫 API 的客戶端，第一次使用時才檢查憑證並建立（缺少憑證時拋出 ValueError）"""
+    global _api
+    if _api is None:
+        _api = video_registry.DirectApi(youtube_client.youtube())
+    return _api
+
 def extract_youtube_id(url_or_id):
     if not url_or_id: return ""
     val = url_or_id.strip()
@@ -45,15 +55,22 @@ def extract_youtube_id(url_or_id):
 def fetch_youtube_playlist_tracks(playlist_url):
     playlist_id = extract_youtube_id(playlist_url)
     if not playlist_id or len(playlist_id) < 12: return []
-    tracks = []
     try:
-        request = youtube.playlistItems().list(part="snippet", playlistId=playlist_id, maxResults=50)
-        response = request.execute()
-        for item in response.get('items', []):
-            snippet = item['snippet']
-            tracks.append({"title": snippet['title'], "videoId": snippet.get('resourceId', {}).get('videoId', '')})
-    except Exception: pass
-    return tracks
+        return [dict(track) for track in registry().playlist_tracks(youtube_api(), playlist_id)]
+    except Exception: return []
+
+def refresh_track_videos(data):
+    """以批次查詢把所有曲目影片的資訊（長度、是否還在等）填入登錄檔"""
+    video_ids = {track["videoId"] for category in data.values() for album in category["albums"]
+                 for track in album["tracks"] if track["videoId"]}
+    try:
+        registry().refresh(youtube_api(), video_ids)
+    except Exception as e:
+        print(f"⚠️ 無法更新曲目影片資訊: {e}")
+    missing = sorted(video_id for video_id in video_ids if (registry().get(video_id) or {}).get("status") == "missing")
+    if missing:
+        print(f"⚠️ {len(missing)} 個曲目影片已無法觀看: {', '.join(missing)}")
+    print(registry().summary())
 
 def parse_disc_file():
     """解析 disc.txt 檔案並對應至固定 ID"""
@@ -136,14 +153,15 @@ def save_to_json(data, file_path):
         print("⚠️ 未解析到任何作品，取消寫入以保護原始資料。")
         return
 
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=2)
-    print(f"✅ 成功更新 {total_albums} 個作品至 {file_path}")
+    if output_writer.write_json(file_path, data, indent=2):
+        print(f"✅ 成功更新 {total_albums} 個作品至 {file_path}")
+    else:
+        print(f"✅ {total_albums} 個作品沒有變動，保留 {file_path}")
 
 if __name__ == "__main__":
     try:
         data = parse_disc_file()
+        refresh_track_videos(data)
         save_to_json(data, CACHE_FILE_PATH)
     except Exception as e:
         print(f"❌ 致命錯誤: {e}")
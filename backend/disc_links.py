@@ -0,0 +1,214 @@
+"""專輯曲目與歌曲目錄的對照：disc/disc.json 的每首曲目對應到 data.json 中唱過的歌曲，反之亦然。
+
+曲目只有 YouTube 播放清單上的標題（fetch_youtube_playlist_tracks），沒有歌手，
+標題常帶有「(feat. …)」「【MV】」「～ 副標題」之類的裝飾。依序嘗試：
+    exact    normalize_key(標題) 與歌曲的正規化曲名（Song.key[0]）相同，以曲名索引查表
+    cleaned  去掉括號內容與 feat. 後的標題，或以前後有空白的 /、-、～、| 切開的其中一段
+             （與社團、分類名稱相同的段落除外），同樣查表
+    fuzzy    仍找不到時，以「刪去一個字」的寫法建立的索引找出只差一個字的候選（錯字、多或少一個字），
+             寬鬆鍵的編輯距離相似度 ≥ FUZZY_THRESHOLD 中最相似者
+同名的歌曲有多首時，優先選歌手與專輯社團（circle）或分類名稱相符者。
+查表與分組都只掃過每首歌一次，不做曲目 × 歌曲的兩兩比較。
+
+結果寫在 data/disc_links.json：
+    format   格式版本
+    tracks   依 disc.json 順序（分類、專輯、曲目）的曲目列表：
+               category, album, track   在 disc.json 中的位置
+               title                    曲目標題
+               songs                    對應的歌曲編號（即 data.json 中的位置），沒有時為空列表
+               match                    exact、cleaned、fuzzy，沒有對應時為 null
+               times_sung               對應歌曲的演唱次數合計（專輯卡片的「直播唱過 N 次」）
+    songs    歌曲編號（字串）-> 對應的曲目在 tracks 中的位置列表
+
+    python backend/disc_links.py            # 由 data.json 與 disc/disc.json 重建並列出對照
+"""
+import argparse
+import json
+import os
+import re
+import unicodedata
+
+import output_writer
+from duplicates import loose_key, similarity
+from process_timeline import ARTIFACT_DIR, normalize_key
+
+DISC_LINKS_FORMAT = 1
+DISC_PATH = os.path.join('disc', 'disc.json')
+LINKS_PATH = os.path.join(ARTIFACT_DIR, 'disc_links.json')
+FUZZY_THRESHOLD = 0.85  # 與 duplicates.NAME_THRESHOLD 相同
+
+# NFKC 之後的括號：(…) […] 【…】 〔…〕 <…> 〈…〉 《…》
+_BRACKETED = re.compile(r'[(\[【〔<〈《][^()\[\]【】〔〕<>〈〉《》]*[)\]】〕>〉》]')
+_FEATURING = re.compile(r'\s+(?:feat|ft)\.?\s.*$', re.IGNORECASE)
+_SEPARATOR = re.compile(r'\s+[-/|~〜]\s+')
+
+def clean_title(title):
+    """去掉括號內容與 feat. 之後的部分"""
+    text = _FEATURING.sub('', _BRACKETED.sub(' ', unicodedata.normalize('NFKC', title)))
+    return ' '.join(text.split())
+
+def title_keys(title):
+    """(exact 的鍵, cleaned 的鍵列表)：整段清理後的標題優先，再來是以分隔符號切開的各段"""
+    exact = normalize_key(title)
+    cleaned = clean_title(title)
+    keys = []
+    for text in [cleaned] + _SEPARATOR.split(cleaned):
+        key = normalize_key(text)
+        if key and key != exact and key not in keys:
+            keys.append(key)
+    return exact, keys
+
+def disc_tracks(disc):
+    """disc.json 的所有曲目：(分類, 專輯位置, 曲目位置, 標題, 提示用的歌手寬鬆鍵列表)"""
+    tracks = []
+    for category, entry in disc.items():
+        category_hint = loose_key(entry.get('name', category))
+        for album_index, album in enumerate(entry['albums']):
+            hints = [hint for hint in (category_hint, loose_key(album.get('circle') or '')) if hint]
+            for track_index, track in enumerate(album['tracks']):
+                tracks.append((category, album_index, track_index, track['title'], hints))
+    return tracks
+
+def _prefer(song_ids, songs, hints):
+    """同名的多首歌中，保留歌手與提示相符者；都不相符時全部保留"""
+    if len(song_ids) < 2 or not hints:
+        return song_ids
+    preferred = [song_id for song_id in song_ids
+                 if any(hint in loose_key(songs[song_id].artist) for hint in hints)]
+    return preferred or song_ids
+
+def _letters(normalized):
+    """normalize_key 的結果只保留文字與數字，即 duplicates.loose_key（歌曲已有 Song.key，不必再正規化一次）"""
+    return ''.join(ch for ch in normalized if unicodedata.category(ch)[0] in 'LN')
+
+def _variants(text):
+    """text 與刪去任一個字的寫法；短到錯一個字就低於 FUZZY_THRESHOLD 的字串只有自己"""
+    if len(text) * (1 - FUZZY_THRESHOLD) < 1:
+        return {text}
+    return {text} | {text[:i] + text[i + 1:] for i in range(len(text))}
+
+def _fuzzy_matches(songs, titles):
+    """{titles 的位置: 最相似的歌曲編號列表}。
+
+    曲目（數量少的一方）以「刪去一個字」的所有寫法建立索引，每首歌也以自己的這些寫法查表：
+    寬鬆鍵相同、多一個字、少一個字或錯一個字的組合才會成為候選，工作量只隨兩邊的字數線性增加。
+    """
+    postings = {}
+    for position, title in enumerate(titles):
+        if title:
+            for variant in _variants(title):
+                postings.setdefault(variant, []).append(position)
+
+    best = {}
+    for song_id, song in enumerate(songs):
+        name = _letters(song.key[0])
+        if not name:
+            continue
+        candidates = {position for variant in _variants(name) for position in postings.get(variant, ())}
+        for position in candidates:
+            score = similarity(name, titles[position])
+            if score < FUZZY_THRESHOLD:
+                continue
+            if position not in best or score > best[position][0]:
+                best[position] = (score, [song_id])
+            elif score == best[position][0]:
+                best[position][1].append(song_id)
+    return {position: song_ids for position, (_, song_ids) in best.items()}
+
+def match_tracks(songs, tracks):
+    """每首曲目的 (歌曲編號列表, 比對方式)；songs 為 data.json 順序的 Song 列表"""
+    by_name = {}
+    for song_id, song in enumerate(songs):
+        by_name.setdefault(song.key[0], []).append(song_id)
+
+    matches = []
+    unmatched = []
+    for index, (_, _, _, title, hints) in enumerate(tracks):
+        exact, cleaned = title_keys(title)
+        if exact in by_name:
+            matches.append((_prefer(by_name[exact], songs, hints), 'exact'))
+            continue
+        found = next((by_name[key] for key in cleaned if key in by_name and loose_key(key) not in hints), None)
+        if found:
+            matches.append((_prefer(found, songs, hints), 'cleaned'))
+            continue
+        matches.append(([], None))
+        unmatched.append(index)
+
+    if unmatched:
+        best = _fuzzy_matches(songs, [loose_key(clean_title(tracks[index][3])) for index in unmatched])
+        for position, song_ids in best.items():
+            track = unmatched[position]
+            matches[track] = (_prefer(song_ids, songs, tracks[track][4]), 'fuzzy')
+    return matches
+
+def build_links(songs, disc):
+    """由 Song 列表（data.json 順序）與 disc.json 的內容建立對照表，回傳可直接序列化的 dict"""
+    tracks = disc_tracks(disc)
+    entries = []
+    by_song = {}
+    for index, ((category, album, track, title, _), (song_ids, match)) in enumerate(
+            zip(tracks, match_tracks(songs, tracks))):
+        entries.append({
+            'category': category,
+            'album': album,
+            'track': track,
+            'title': title,
+            'songs': song_ids,
+            'match': match,
+            'times_sung': sum(len(songs[song_id].dates) for song_id in song_ids),
+        })
+        for song_id in song_ids:
+            by_song.setdefault(song_id, []).append(index)
+    return {
+        'format': DISC_LINKS_FORMAT,
+        'tracks': entries,
+        'songs': {str(song_id): by_song[song_id] for song_id in sorted(by_song)},
+    }
+
+def write_links(songs, output_path=LINKS_PATH, disc_path=DISC_PATH):
+    """寫出 disc_links.json，回傳對照表；沒有 disc.json 時略過並回傳 None"""
+    if not os.path.exists(disc_path):
+        print(f"Disc links: {disc_path} not found, skipped")
+        return None
+    with open(disc_path, 'r', encoding='utf-8') as f:
+        links = build_links(songs, json.load(f))
+    output_writer.write_json(output_path, links, ensure_ascii=False, separators=(',', ':'))
+    tracks = links['tracks']
+    counts = {}
+    for entry in tracks:
+        counts[entry['match']] = counts.get(entry['match'], 0) + 1
+    print(f"Disc links: {len(tracks) - counts.get(None, 0)} of {len(tracks)} tracks linked to "
+          f"{len(links['songs'])} songs (" + ', '.join(f"{counts.get(match, 0)} {match}"
+                                                    for match in ('exact', 'cleaned', 'fuzzy')) + ')')
+    return links
+
+class _SongView:
+    """由 data.json 的一筆歌曲取出對照需要的欄位（與 Song 相同的屬性名稱）"""
+    __slots__ = ('key', 'song_name', 'artist', 'dates')
+
+    def __init__(self, entry):
+        self.key = (normalize_key(entry['song_name']), normalize_key(entry['artist']))
+        self.song_name = entry['song_name']
+        self.artist = entry['artist']
+        self.dates = entry['dates']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data.json', help='歌曲資料（data.json）')
+    parser.add_argument('--disc', default=DISC_PATH)
+    parser.add_argument('--output', default=LINKS_PATH)
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        songs = [_SongView(entry) for entry in json.load(f)]
+    links = write_links(songs, args.output, args.disc)
+    if links is None:
+        return
+    for entry in links['tracks']:
+        linked = ', '.join(f"{songs[song_id].song_name} / {songs[song_id].artist}" for song_id in entry['songs'])
+        print(f"  {entry['category']}/{entry['album']}/{entry['track']}  {entry['title']}"
+              + (f"  -> [{entry['match']}] {linked} ({entry['times_sung']}x)" if linked else ''))
+
+if __name__ == '__main__':
+    main()
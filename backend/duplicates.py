@@ -0,0 +1,144 @@
+"""找出 normalize_key 仍未合併的疑似重複歌曲（曲名或歌手寫法不同而被拆成兩筆）。
+
+兩兩比較所有歌曲是 O(n²)，這裡改用 MinHash/LSH 分組：
+每首歌取「曲名＋歌手」的字元 bigram 計算 MinHash 簽章，切成 BANDS 段，
+任一段完全相同的歌曲才成為候選，再以 bigram Jaccard 與編輯距離計分。
+bigram Jaccard 0.75 的組合（一般的漏字、多一個符號）成為候選的機率約 99.6%。
+"""
+import struct
+import unicodedata
+from hashlib import blake2b
+
+import output_writer
+from process_timeline import normalize_key
+
+BANDS = 10              # LSH 段數
+BAND_ROWS = 3           # 每段的 MinHash 數
+BLOCK_THRESHOLD = 0.5   # 候選組合的 bigram Jaccard 門檻
+NAME_THRESHOLD = 0.85   # 曲名編輯距離相似度門檻
+ARTIST_THRESHOLD = 0.6  # 歌手編輯距離相似度門檻（任一方歌手空白時不檢查）
+MAX_BLOCK = 200         # 單一分組的候選上限，避免極端情況退化成兩兩比較
+
+def loose_key(text):
+    """比 normalize_key 更寬鬆的比對用字串：移除所有標點、符號與空白"""
+    normalized = normalize_key(text)
+    return ''.join(ch for ch in normalized if unicodedata.category(ch)[0] in 'LN')
+
+def bigrams(text):
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+def levenshtein(a, b):
+    """編輯距離（插入、刪除、取代各算 1）"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+def similarity(a, b):
+    """以編輯距離換算的相似度 0～1"""
+    if not a and not b:
+        return 1.0
+    return 1.0 - levenshtein(a, b) / max(len(a), len(b))
+
+def _gram_hashes(gram, cache):
+    """一個 bigram 的 32 個雜湊值（兩次 blake2b，結果跨執行固定）"""
+    hashes = cache.get(gram)
+    if hashes is None:
+        data = gram.encode('utf-8')
+        hashes = (struct.unpack('16I', blake2b(data, digest_size=64).digest()) +
+                  struct.unpack('16I', blake2b(data, digest_size=64, salt=b'minhash').digest()))
+        cache[gram] = hashes
+    return hashes
+
+def minhash(grams, cache):
+    """bigram 集合的 MinHash 簽章（每個雜湊函數取最小值）"""
+    return tuple(map(min, zip(*(_gram_hashes(gram, cache) for gram in grams))))
+
+def candidate_pairs(docs, threshold=BLOCK_THRESHOLD, max_block=MAX_BLOCK):
+    """LSH 分組：回傳 bigram Jaccard 相似度達 threshold 的 (i, j) 組合，i < j"""
+    shingles = [bigrams(doc) for doc in docs]
+    cache = {}
+    blocks = {}
+    for i, grams in enumerate(shingles):
+        if not grams:
+            continue
+        signature = minhash(grams, cache)
+        for band in range(BANDS):
+            key = (band,) + signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+            blocks.setdefault(key, []).append(i)
+
+    seen = set()
+    pairs = []
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > max_block:
+            continue
+        for a in range(len(members)):
+            x = shingles[members[a]]
+            for b in range(a + 1, len(members)):
+                pair = (members[a], members[b])
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                y = shingles[members[b]]
+                # 長度過濾：|y| < t·|x| 時 Jaccard 不可能達到門檻
+                if min(len(x), len(y)) < threshold * max(len(x), len(y)):
+                    continue
+                shared = len(x & y)
+                if shared >= threshold * (len(x) + len(y) - shared):
+                    pairs.append(pair)
+    return pairs
+
+def find_duplicates(songs):
+    """找出疑似重複的歌曲組合。
+
+    songs 為 Song 物件列表；回傳依分數排序的 dict 列表，
+    keep 為建議保留的寫法（演唱次數較多者），merge 為建議併入的寫法。
+    """
+    names = [loose_key(song.song_name) for song in songs]
+    artists = [loose_key(song.artist) for song in songs]
+    docs = [name + '\0' + artist for name, artist in zip(names, artists)]
+
+    report = []
+    for i, j in candidate_pairs(docs):
+        name_score = similarity(names[i], names[j])
+        if name_score < NAME_THRESHOLD:
+            continue
+        if artists[i] and artists[j]:
+            artist_score = similarity(artists[i], artists[j])
+            if artist_score < ARTIST_THRESHOLD:
+                continue
+        else:
+            artist_score = 1.0 if artists[i] == artists[j] else 0.0
+        keep, merge = (i, j) if len(songs[i].dates) >= len(songs[j].dates) else (j, i)
+        report.append({
+            'score': round((name_score * 2 + artist_score) / 3, 3),
+            'name_similarity': round(name_score, 3),
+            'artist_similarity': round(artist_score, 3),
+            'keep': _describe(songs[keep]),
+            'merge': _describe(songs[merge]),
+        })
+    report.sort(key=lambda item: (-item['score'], item['keep']['song_name'], item['merge']['song_name']))
+    return report
+
+def _describe(song):
+    return {'song_name': song.song_name, 'artist': song.artist, 'times_sung': len(song.dates)}
+
+def write_report(songs, output_path):
+    """寫出重複候選報告，回傳候選組數"""
+    report = find_duplicates(songs)
+    output_writer.write_json(output_path, report, indent=2)
+    print(f"Found {len(report)} possible duplicate songs, report written to {output_path}")
+    for item in report[:10]:
+        keep, merge = item['keep'], item['merge']
+        print(f"  {item['score']:.2f}  {merge['song_name']} / {merge['artist']}"
+              f"  ->  {keep['song_name']} / {keep['artist']}")
+    return len(report)
@@ -0,0 +1,292 @@
+"""以 process_timeline.old.py（已知正確的舊版）為基準，檢查各建置引擎的 data.json 是否等價，並並列執行時間與記憶體。
+
+    python backend/equivalence.py                           # 實際的 timeline/
+    python backend/equivalence.py --synthetic 2000          # 另加 2000 份合成歌單（含舊格式與邊界案例）
+    python backend/equivalence.py --engines old,new,pack    # 只執行指定的引擎
+
+每個引擎在暫存資料夾中由同一份 timeline/ 寫出 data.json，再逐首歌、逐筆演唱紀錄與基準比對：
+    old     process_timeline.old.py（基準；os.listdir 改為依檔名排序，結果才不受檔案系統影響）
+    new     process_timeline.build_catalogue（串流解析）
+    watch   watch.py 的作法：逐檔 process_timeline 後以 CatalogueState 逐首合併
+    db      catalogue_db.sync_timeline（新建的資料庫）後由資料庫匯出
+    pack    timeline_pack 封裝後以 mmap 讀取
+新增的引擎加進 ENGINES 即可。
+
+比對以 normalize_key 的 (曲名, 歌手) 對應歌曲，有意的差異不算錯誤：
+    merged          舊版視為不同、新版 normalize_key 合併的歌曲（全半形、波浪號等寫法），合併後再比對，
+                    顯示用的欄位只需是合併前其中一首的值
+    rule-broadened  清唱、著作權規則以 normalize_key 比對而多標記的紀錄（舊版為 false、新版為 true）
+    新欄位          INTENTIONAL_FIELDS（tags、source_en、_searchableSources）不比對
+    source          新版在所有寫法中挑選主出典，舊版的出典只需是其中一種寫法
+其他差異（缺少或多出的歌曲、演唱紀錄、標記或欄位不同）都列為錯誤，結束碼為 1。
+除了與基準的語意比對，也列出 data.json 與 setlists.json（依歌單順序的每場歌單，舊版沒有）
+是否與 new 引擎逐位元組相同。
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import string
+import sys
+import tempfile
+from unittest import mock
+
+import benchmarks
+import output_writer
+from process_timeline import normalize_key
+
+INTENTIONAL_FIELDS = {'tags', 'source_en', '_searchableSources'}
+EXPECTED = {'merged', 'rule-broadened'}
+# 新版的 RuleSet 以 normalize_key 比對清唱與著作權規則（舊版只比對完全相同的字串），只會多標記、不會少標記
+RULE_FIELDS = {'is_acapella', 'is_copyright'}
+APPEARANCE_FLAGS = ('is_member_exclusive', 'is_acapella', 'is_private')
+
+def _write(songs):
+    import setlists
+    from process_timeline import write_data_json
+    write_data_json(songs, 'data.json')
+    setlists.write_setlists(songs, 'setlists.json')
+
+def run_old():
+    legacy = benchmarks.load_module('process_timeline.old.py')
+    # 舊版依 os.listdir 的順序處理歌單，同一首歌的顯示寫法取決於檔案系統；固定為檔名順序
+    real_listdir = os.listdir
+    with mock.patch.object(legacy.os, 'listdir', lambda path: sorted(real_listdir(path))):
+        legacy.main()
+
+def run_new():
+    from process_timeline import build_catalogue
+    _write(build_catalogue('timeline'))
+
+def run_watch():
+    import watch
+    _write(watch.CatalogueState('timeline').songs())
+
+def run_db():
+    import catalogue_db
+    if os.path.exists('catalogue.db'):
+        os.remove('catalogue.db')
+    with catalogue_db.connect('catalogue.db') as conn:
+        catalogue_db.sync_timeline(conn, 'timeline')
+        songs = catalogue_db.load_songs(conn)
+    _write(songs)
+
+def run_pack():
+    import timeline_pack
+    from process_timeline import build_catalogue
+    timeline_pack.pack('timeline', 'timeline.pack')
+    with timeline_pack.TimelinePack('timeline.pack') as pack:
+        _write(build_catalogue('timeline', pack))
+
+ENGINES = [('old', run_old), ('new', run_new), ('watch', run_watch), ('db', run_db), ('pack', run_pack)]
+
+def _appearances(song):
+    """{(日期, 時間, 連結): 標記}"""
+    return {(info['date'], info['time'], info['link']): tuple(info[flag] for flag in APPEARANCE_FLAGS)
+            for info in song['dates']}
+
+def _label(song):
+    return f"{song['song_name']} / {song['artist']}"
+
+def diff_catalogues(reference, candidate):
+    """比對兩份 data.json 的歌曲列表，回傳 {差異類別: [說明]}"""
+    diffs = {}
+
+    def report(category, message):
+        diffs.setdefault(category, []).append(message)
+
+    def key(song):
+        return (normalize_key(song['song_name']), normalize_key(song['artist']))
+
+    groups = {}
+    for song in reference:
+        groups.setdefault(key(song), []).append(song)
+    candidates = {}
+    for song in candidate:
+        if key(song) in candidates:
+            report('duplicate-song', _label(song))
+        candidates[key(song)] = song
+
+    for song_key, old_songs in groups.items():
+        new_song = candidates.get(song_key)
+        if new_song is None:
+            report('missing-song', _label(old_songs[0]))
+            continue
+        if len(old_songs) > 1:
+            report('merged', f"{' + '.join(_label(song) for song in old_songs)} -> {_label(new_song)}")
+
+        for field in old_songs[0]:
+            if field == 'dates':
+                continue
+            if field not in new_song:
+                report('missing-field', f"{field}: {_label(new_song)}")
+                continue
+            old_values = {json.dumps(song[field], ensure_ascii=False) for song in old_songs}
+            new_value = new_song[field]
+            if field == 'source':
+                spellings = set(filter(None, new_song.get('_searchableSources', new_value).split('|')))
+                if any(song['source'] and song['source'] not in spellings for song in old_songs):
+                    report('field:source', f"{_label(new_song)}: {sorted(old_values)} not in {sorted(spellings)}")
+            elif field in RULE_FIELDS and new_value is True and old_values == {'false'}:
+                report('rule-broadened', f"{field}: {_label(new_song)}")
+            elif json.dumps(new_value, ensure_ascii=False) not in old_values:
+                # 合併的歌曲沿用其中第一次出現的寫法，只需是其中之一
+                report(f'field:{field}', f"{_label(new_song)}: {sorted(old_values)} -> {new_value!r}")
+        for field in new_song:
+            if field not in old_songs[0] and field not in INTENTIONAL_FIELDS:
+                report('new-field', f"{field}: {_label(new_song)}")
+
+        old_appearances = {}
+        for song in old_songs:
+            old_appearances.update(_appearances(song))
+        new_appearances = _appearances(new_song)
+        if len(new_appearances) != len(new_song['dates']):
+            report('duplicate-appearance', _label(new_song))
+        for identity, flags in old_appearances.items():
+            if identity not in new_appearances:
+                report('missing-appearance', f"{_label(new_song)} @ {identity[0]} {identity[1]}")
+            elif new_appearances[identity] != flags:
+                for flag, old, new in zip(APPEARANCE_FLAGS, flags, new_appearances[identity]):
+                    if old == new:
+                        continue
+                    category = 'rule-broadened' if new and flag in RULE_FIELDS else f'flag:{flag}'
+                    report(category, f"{flag}: {_label(new_song)} @ {identity[0]} {identity[1]}")
+        for identity in new_appearances.keys() - old_appearances.keys():
+            report('extra-appearance', f"{_label(new_song)} @ {identity[0]} {identity[1]}")
+
+    for song_key in candidates.keys() - groups.keys():
+        report('extra-song', _label(candidates[song_key]))
+    return diffs
+
+def add_edge_cases(timeline_dir, seed=0):
+    """加入合成語料沒有的寫法：舊格式歌單、大小寫與全半形不同的同一首歌、重複行、格式錯誤的行"""
+    rng = random.Random(seed)
+    files = {
+        '20231201.txt': ['ID = edgeOld0001', '00:05:00 | Hello World | Someone | Some Game',
+                         '00:09:00 | hello  world | someone', '00:13:00 | ＡＢＣの歌 | Ｘ',
+                         '00:17:00 | ABCの歌 | X | ABC (Game)', 'タイムスタンプ', '00:21:00 | Only Title'],
+        '20240105.txt': ['ID = edgeOld0002', '00:05:00 | Hello World | Someone | Some Game',
+                         '00:05:00 | Hello World | Someone | Some Game', '00:09:00 | 夢〜ゆめ | 歌手'],
+        '20240301_2.txt': ['ID = edgeNew0001', '01.  00:05:00  夢～ゆめ / 歌手',
+                           '2. 00:09:00　Hello World『Some Game』Someone', '00:13:00    1:2x / broken',
+                           '1:2x    壊れた時間 / 歌手', 'no separator here', '00:17:00  Title Only'],
+        '20240302.txt': ['not an id line'],
+        '20240303.txt': [],
+    }
+    for name, lines in files.items():
+        with open(os.path.join(timeline_dir, name), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + ('\n' if lines else ''))
+    # 把部分合成歌曲改成大小寫或全形不同的寫法，測試合併
+    fullwidth = {ord(ch): ord(ch) + 0xFEE0 for ch in string.ascii_letters + string.digits}
+    names = sorted(name for name in os.listdir(timeline_dir)
+                   if name not in files and re.fullmatch(r'\d{8}\.txt', name) and name >= '20240127')
+    for name in rng.sample(names, min(20, len(names))):
+        path = os.path.join(timeline_dir, name)
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        if len(lines) > 3:
+            index = rng.randrange(2, len(lines) - 1)
+            number, separator, song = lines[index].rpartition('    ')
+            song = song.swapcase() if rng.random() < 0.5 else song.translate(fullwidth)
+            lines[index] = number + separator + song
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+
+def _versus(digest, new_digest):
+    if digest is None or new_digest is None:
+        return '-'
+    return 'identical' if digest == new_digest else 'DIFFERENT'
+
+def run_corpus(title, timeline_dir, engines, repeat=1, show=5):
+    """在 timeline_dir 上執行所有引擎並與第一個引擎比對，回傳是否沒有非預期的差異"""
+    root = tempfile.mkdtemp(prefix='songlist-equivalence-')
+    cwd = os.getcwd()
+    results = []
+    try:
+        shutil.copytree(timeline_dir, os.path.join(root, 'timeline'))
+        os.chdir(root)
+        for name, func in engines:
+            seconds, peak = benchmarks.measure(func, repeat=repeat)
+            with open('data.json', 'rb') as f:
+                raw = f.read()
+            setlists_digest = output_writer.file_sha1('setlists.json')
+            if setlists_digest:
+                os.remove('setlists.json')
+            results.append((name, seconds, peak, hashlib.sha1(raw).hexdigest(), json.loads(raw), setlists_digest))
+            os.remove('data.json')
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    reference_name, reference = results[0][0], results[0][4]
+    new = next((result for result in results if result[0] == 'new'), None)
+    new_digest, new_setlists = (new[3], new[5]) if new else (None, None)
+    print(f"\n== {title}")
+    print(f"{'engine':<10}{'time (s)':>10}{'peak (MiB)':>12}{'songs':>8}{'dates':>9}  "
+          f"{'vs ' + reference_name:<34}{'bytes vs new':<14}{'setlists vs new':<14}")
+    ok = True
+    details = []
+    for name, seconds, peak, digest, songs, setlists_digest in results:
+        appearances = sum(len(song['dates']) for song in songs)
+        if name == reference_name:
+            status = 'reference'
+        else:
+            diffs = diff_catalogues(reference, songs)
+            errors = {category: items for category, items in diffs.items() if category not in EXPECTED}
+            ok = ok and not errors
+            status = ', '.join(f"{len(items)} {category}" for category, items in sorted(diffs.items())) or 'equivalent'
+            if errors:
+                status = 'DIFFERS: ' + status
+            details.extend((name, category, items) for category, items in sorted(diffs.items()))
+        same_bytes = '-' if name in ('new', reference_name) else _versus(digest, new_digest)
+        same_setlists = '-' if name == 'new' else _versus(setlists_digest, new_setlists)
+        ok = ok and 'DIFFERENT' not in (same_bytes, same_setlists)
+        print(f"{name:<10}{seconds:>10.3f}{peak / 1048576:>12.1f}{len(songs):>8}{appearances:>9}  "
+              f"{status:<34}{same_bytes:<14}{same_setlists:<14}")
+    for name, category, items in details:
+        if show and (category not in EXPECTED or name == 'new'):
+            print(f"  {name} {category}:")
+            for item in items[:show]:
+                print(f"    {item}")
+            if len(items) > show:
+                print(f"    ... {len(items) - show} more")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--timeline', default='timeline', help='實際歌單的資料夾')
+    parser.add_argument('--synthetic', type=int, default=0, metavar='FILES', help='另外比對的合成歌單數')
+    parser.add_argument('--songs-per-file', type=int, default=30)
+    parser.add_argument('--unique', type=int, default=5000, help='合成語料的不重複歌曲數')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', default=','.join(name for name, _ in ENGINES),
+                        help='要執行的引擎（逗號分隔，第一個為比對基準）')
+    parser.add_argument('--repeat', type=int, default=1, help='計時重複次數（取最佳值）')
+    parser.add_argument('--show', type=int, default=5, help='每種差異列出的筆數')
+    args = parser.parse_args()
+
+    available = dict(ENGINES)
+    names = [name.strip() for name in args.engines.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)} (available: {', '.join(available)})")
+    engines = [(name, available[name]) for name in names]
+
+    ok = run_corpus(f'{args.timeline}/', os.path.abspath(args.timeline), engines, args.repeat, args.show)
+    if args.synthetic:
+        with tempfile.TemporaryDirectory(prefix='songlist-synthetic-') as root:
+            timeline_dir = benchmarks.make_synthetic_timeline(root, args.synthetic, args.songs_per_file,
+                                                             args.unique, args.seed)
+            add_edge_cases(timeline_dir, args.seed)
+            ok = run_corpus(f'synthetic: {args.synthetic} files x {args.songs_per_file} songs '
+                            f'({args.unique} unique) + edge cases',
+                            timeline_dir, engines, args.repeat, args.show) and ok
+    print('\nAll engines are equivalent to the reference' if ok else '\nUnexpected differences found')
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
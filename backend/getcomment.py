@@ -1,102 +1,233 @@
+"""從 YouTube 留言抓取時間戳歌單，存成 timeline/yyyymmdd.txt。
+
+    python backend/getcomment.py                        # 預設頻道（DEFAULT_CHANNEL）
+    python backend/getcomment.py --config channels.json # 設定檔中的多個頻道同時處理
+
+設定檔是頻道設定的 JSON 列表，未寫的欄位沿用 DEFAULT_CHANNEL：
+    [
+      {"name": "hoshiho", "channel_id": "UC...", "playlists": ["PL..."],
+       "markers": ["💐🌟🎶タイムスタンプ💐🌟🎶"], "output_dir": "timeline"},
+      {"name": "other", "channel_id": "UC...", "playlists": [], "keywords": ["歌枠", "karaoke"],
+       "markers": ["🎤セトリ🎤"], "output_dir": "singers/other/timeline"}
+    ]
+每個頻道在各自的執行緒中處理，所有 API 呼叫經過同一個 QuotaScheduler，
+共用每日配額與每秒請求數上限，並輪流放行已用配額最少的頻道。結束時列出各頻道的時間與配額使用。
+
+每個頻道的進度存在 checkpoints/getcomment_<name>.json，每完成一個工作單位（一頁影片清單、
+一部影片的日期、一部影片的留言搜尋）就原子寫入。執行中斷、API 錯誤或配額用完時，
+下次執行從進度檔繼續：
+    sources    各影片來源的搜尋進度（下一頁的 pageToken、已找到的影片、是否完成），DISCOVERY_TTL 內有效
+    dates      已查到的影片日期（尚未開播、只有預定時間的不記錄）
+    searched   已搜尋過留言但沒有找到時間戳的影片，SEARCH_RETRY 內不重複搜尋
+暫時性錯誤由 QuotaScheduler 以指數退避重試，配額用完時斷路器跳脫，所有頻道保存進度後停止。
+
+影片的日期、會員限定等資訊取自共用的影片登錄檔（video_registry.py，data/videos.json），
+每頁影片清單需要的影片以一次批次的 videos.list 查詢，已查過且未過期的影片不再呼叫 API。
+"""
+import argparse
 import os
 import json
 import re
 import time
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-from datetime import datetime, timedelta, timezone
-import pytz
-from googleapiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 import html
 
-# 從環境變量中讀取 Google API 憑證
-google_sheets_credentials = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
-google_api_key = os.getenv('GOOGLE_API_KEY')
+import output_writer
+import video_registry
+import youtube_client
+from quota_scheduler import DAILY_QUOTA, REQUESTS_PER_SECOND, CircuitOpen, QuotaScheduler
+
+# 日本時區（固定 +09:00）
+JST = video_registry.JST
+
+DEFAULT_CHANNEL = {
+    'name': 'default',
+    'channel_id': 'UCDqn3HdMA5zwlYvsQ1YSG4Q',
+    'playlists': ['PL7H5HbMMfm_lUoLIkPAZkhF_W0oDf5WEk'],
+    'keywords': ['歌枠', 'karaoke'],
+    'markers': ['💐🌟🎶タイムスタンプ💐🌟🎶', '🌟💐🎶タイムスタンプ🌟💐🎶'],
+    'output_dir': 'timeline',
+    'days': 30,
+}
+
+CHECKPOINT_DIR = 'checkpoints'
+CHECKPOINT_FORMAT = 1
+DISCOVERY_TTL = timedelta(hours=12)  # 超過這個時間的影片清單搜尋進度重新開始（才會找到新影片）
+SEARCH_RETRY = timedelta(hours=24)   # 沒找到時間戳的影片，這段時間後再搜尋一次（留言可能晚點才出現）
+
+class Checkpoint:
+    """單一頻道的進度檔；path 為 None 時只保存在記憶體"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {'format': CHECKPOINT_FORMAT, 'sources': {}, 'dates': {}, 'searched': {}}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('format') == CHECKPOINT_FORMAT:
+                    self.data = data
+                    print(f"DEBUG: 從進度檔繼續: {path}")
+            except ValueError as e:
+                print(f"DEBUG: 進度檔 {path} 無法讀取，重新開始: {e}")
+
+    def save(self):
+        if self.path:
+            output_writer.write_json(self.path, self.data, quiet=True, indent=1)
+
+    def source(self, key):
+        """影片來源的搜尋進度；過期或不存在時重新開始"""
+        now = datetime.now(timezone.utc)
+        state = self.data['sources'].get(key)
+        if state is None or now - datetime.fromisoformat(state['started_at']) > DISCOVERY_TTL:
+            state = {'started_at': now.isoformat(timespec='seconds'), 'page_token': None,
+                     'complete': False, 'videos': {}}
+            self.data['sources'][key] = state
+        return state
 
-if not google_sheets_credentials or not google_api_key:
-    raise ValueError("缺少Google API憑證或API密鑰")
+    def cached_date(self, video_id):
+        """(是否有紀錄, 日期或 None)"""
+        if video_id not in self.data['dates']:
+            return False, None
+        value = self.data['dates'][video_id]
+        return True, date.fromisoformat(value) if value else None
 
-try:
-    credentials_info = json.loads(google_sheets_credentials)
-    credentials = service_account.Credentials.from_service_account_info(credentials_info)
-except Exception as e:
-    raise ValueError("無效的Google Sheets憑證") from e
+    def record_date(self, video_id, video_date):
+        self.data['dates'][video_id] = video_date.isoformat() if video_date else None
+        self.save()
 
-# YouTube Data API 客戶端
-youtube = build('youtube', 'v3', developerKey=google_api_key)
+    def searched_recently(self, video_id):
+        searched_at = self.data['searched'].get(video_id)
+        return bool(searched_at) and datetime.now(timezone.utc) - datetime.fromisoformat(searched_at) < SEARCH_RETRY
 
-# 創建日本時區對象
-JST = pytz.timezone('Asia/Tokyo')
+    def record_search(self, video_id):
+        self.data['searched'][video_id] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.save()
 
-def get_jst_date(utc_time_str):
-    """將 UTC 時間字符串轉換為日本時間的日期"""
-    utc_time = datetime.strptime(utc_time_str, '%Y-%m-%dT%H:%M:%SZ')
-    utc_time = utc_time.replace(tzinfo=timezone.utc)
-    jst_time = utc_time.astimezone(JST)
-    return jst_time.date()
+    def prune(self, video_ids):
+        """只保留目前搜尋範圍內影片的日期與搜尋紀錄，避免進度檔無限增長"""
+        for field in ('dates', 'searched'):
+            self.data[field] = {video_id: value for video_id, value in self.data[field].items()
+                                if video_id in video_ids}
+        self.save()
 
-def get_video_date(video_id):
-    """獲取影片的實際直播日期（日本時間）"""
+def source_videos(state):
+    """搜尋進度中已找到的 (影片ID, 日期) 列表"""
+    return [(video_id, date.fromisoformat(value)) for video_id, value in state['videos'].items() if value]
+
+def build_youtube():
+    """YouTube Data API 客戶端；第一次建立時才檢查憑證"""
+    return youtube_client.build_youtube()
+
+class ChannelApi:
+    """單一頻道使用的 API 客戶端：每次呼叫都經過共用的排程器"""
+
+    def __init__(self, name, scheduler, youtube=None, registry=None):
+        self.name = name
+        self.scheduler = scheduler
+        # 影片資訊的共用登錄檔（data/videos.json）；只以批次查詢填入
+        self.registry = registry or video_registry.VideoRegistry()
+        # googleapiclient 的 http 物件不是執行緒安全的，同時處理多個頻道時各自建立客戶端；
+        # 只在單一執行緒中使用時可傳入共用的客戶端
+        self.youtube = youtube or build_youtube()
+
+    def execute(self, request, cost=1):
+        return self.scheduler.execute(self.name, request, cost)
+
+def load_config(path):
+    """讀取頻道設定檔，補上預設值並檢查名稱與輸出資料夾不重複"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    channels = []
+    for entry in entries:
+        channel = dict(DEFAULT_CHANNEL, **entry)
+        if not channel.get('channel_id') and not channel.get('playlists'):
+            raise ValueError(f"{path}: {channel['name']} needs a channel_id or playlists")
+        channels.append(channel)
+    for field in ('name', 'output_dir'):
+        values = [os.path.normpath(channel[field]) if field == 'output_dir' else channel[field] for channel in channels]
+        duplicates = sorted({value for value in values if values.count(value) > 1})
+        if duplicates:
+            raise ValueError(f"{path}: duplicate {field}: {', '.join(duplicates)}")
+    return channels
+
+def get_video_date(api, video_id, checkpoint=None):
+    """獲取影片的實際直播日期（日本時間）；有進度檔時沿用已查過的結果，影片資訊取自共用的登錄檔"""
+    if checkpoint:
+        found, video_date = checkpoint.cached_date(video_id)
+        if found:
+            return video_date
     try:
-        response = youtube.videos().list(
-            part='liveStreamingDetails,snippet',
-            id=video_id
-        ).execute()
+        video_details = api.registry.lookup(api, video_id)
         
-        if not response.get('items'):
+        if video_details['status'] == 'missing':
             print(f"DEBUG: 無法找到影片 {video_id} 的資訊")
+            if checkpoint:
+                checkpoint.record_date(video_id, None)
             return None
         
-        video_details = response['items'][0]
-        
         # 檢查是否為會員限定
-        if video_details['snippet'].get('liveBroadcastContent') == 'membersOnly':
+        if video_details['members_only']:
             print(f"DEBUG: 跳過會員限定視頻：{video_id}")
+            if checkpoint:
+                checkpoint.record_date(video_id, None)
             return None
         
         # 檢查直播相關時間
-        if 'liveStreamingDetails' in video_details:
+        if video_details['streamed']:
             # 優先使用實際開始時間，如果沒有則使用預定開始時間
-            actual_start = video_details['liveStreamingDetails'].get('actualStartTime')
-            scheduled_start = video_details['liveStreamingDetails'].get('scheduledStartTime')
-            
-            if actual_start:
-                jst_date = get_jst_date(actual_start)
+            if video_details['actual_start']:
+                jst_date = video_registry.jst_date(video_details['actual_start'])
                 print(f"DEBUG: 使用實際開始時間 (JST): {jst_date}")
+                if checkpoint:
+                    checkpoint.record_date(video_id, jst_date)
                 return jst_date
-            elif scheduled_start:
-                jst_date = get_jst_date(scheduled_start)
+            elif video_details['scheduled_start']:
+                # 預定時間可能變動，不記入進度檔
+                jst_date = video_registry.jst_date(video_details['scheduled_start'])
                 print(f"DEBUG: 使用預定開始時間 (JST): {jst_date}")
                 return jst_date
         
         # 如果都沒有，使用發布時間
-        publish_time = video_details['snippet']['publishedAt']
-        jst_date = get_jst_date(publish_time)
+        jst_date = video_registry.jst_date(video_details['published_at'])
         print(f"DEBUG: 使用發布時間 (JST): {jst_date}")
+        if checkpoint:
+            checkpoint.record_date(video_id, jst_date)
         return jst_date
         
-    except HttpError as e:
+    except youtube_client.HttpError as e:
         print(f"Error fetching video date for {video_id}: {e}")
         return None
 
-def get_video_ids_from_playlist(playlist_id):
-    """從播放清單獲取最近30天的影片ID和日期"""
-    video_info = []
+def get_video_ids_from_playlist(api, playlist_id, days=30, checkpoint=None):
+    """從播放清單獲取最近30天的影片ID和日期；每讀完一頁就記錄進度，中斷後從下一頁繼續"""
+    checkpoint = checkpoint or Checkpoint(None)
+    state = checkpoint.source(f'playlist:{playlist_id}')
+    if state['complete']:
+        print(f"DEBUG: 播放清單 {playlist_id} 已於 {state['started_at']} 搜尋完成，沿用進度檔")
+        return source_videos(state)
     
     # 計算最近30天的日期（使用日本時間）
     current_time = datetime.now(JST)
-    thirty_days_ago = current_time - timedelta(days=30)
+    thirty_days_ago = current_time - timedelta(days=days)
     
-    request = youtube.playlistItems().list(
+    request = api.youtube.playlistItems().list(
         part='snippet',
         playlistId=playlist_id,
-        maxResults=50
+        maxResults=50,
+        **({'pageToken': state['page_token']} if state['page_token'] else {})
     )
     
     while request:
         try:
-            response = request.execute()
+            response = api.execute(request)
             items = response.get('items', [])
+            reached_end = False
+            # 這一頁需要日期的影片以一次批次查詢填入登錄檔
+            page_ids = [item['snippet']['resourceId']['videoId'] for item in items]
+            api.registry.refresh(api, [video_id for video_id in page_ids
+                                       if video_id not in state['videos'] and not checkpoint.cached_date(video_id)[0]])
             
             for item in items:
                 published_time = datetime.strptime(
@@ -106,55 +237,76 @@ def get_video_ids_from_playlist(playlist_id):
                 
                 # 如果超過30天就停止檢查
                 if published_time < thirty_days_ago:
-                    return video_info
+                    reached_end = True
+                    break
                 
                 video_id = item['snippet']['resourceId']['videoId']
-                video_date = get_video_date(video_id)
+                if video_id in state['videos']:
+                    continue
+                video_date = get_video_date(api, video_id, checkpoint)
+                state['videos'][video_id] = video_date.isoformat() if video_date else None
                 if video_date:
-                    video_info.append((video_id, video_date))
                     print(f"找到播放清單影片：{video_id} 來自 {video_date} (JST)")
             
-            request = youtube.playlistItems().list_next(request, response)
-        except HttpError as e:
+            if reached_end:
+                break
+            request = api.youtube.playlistItems().list_next(request, response)
+            state['page_token'] = response.get('nextPageToken')
+            checkpoint.save()
+        except youtube_client.HttpError as e:
+            # 未完成的搜尋保留在進度檔，下次從同一頁繼續
             print(f"Error fetching playlist items: {e}")
-            break
+            checkpoint.save()
+            return source_videos(state)
     
-    return video_info
+    state['complete'] = True
+    state['page_token'] = None
+    checkpoint.save()
+    return source_videos(state)
 
-def get_video_ids_from_channel(channel_id):
-    """從頻道獲取最近30天的歌枠直播"""
-    video_info = []
+def get_video_ids_from_channel(api, channel_id, keywords=('歌枠', 'karaoke'), days=30, checkpoint=None):
+    """從頻道獲取最近30天的歌枠直播；每讀完一頁就記錄進度，中斷後從下一頁繼續"""
+    checkpoint = checkpoint or Checkpoint(None)
+    state = checkpoint.source(f'channel:{channel_id}')
+    if state['complete']:
+        print(f"DEBUG: 頻道 {channel_id} 已於 {state['started_at']} 搜尋完成，沿用進度檔")
+        return source_videos(state)
     
     try:
         # 計算時間範圍（使用日本時間）
         current_time = datetime.now(JST)
-        thirty_days_ago = current_time - timedelta(days=30)
+        thirty_days_ago = current_time - timedelta(days=days)
         
         print(f"DEBUG: 開始搜尋 {thirty_days_ago.strftime('%Y-%m-%d')} 到 {current_time.strftime('%Y-%m-%d')} 的歌枠直播 (JST)")
         
         # 獲取頻道的上傳播放清單
-        channel_response = youtube.channels().list(
-            part='contentDetails',
-            id=channel_id
-        ).execute()
-        
-        if not channel_response.get('items'):
-            print(f"DEBUG: 無法獲取頻道 {channel_id} 的資訊")
-            return []
-        
-        # 獲取上傳播放清單 ID
-        uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        uploads_playlist_id = state.get('uploads')
+        if not uploads_playlist_id:
+            channel_response = api.execute(api.youtube.channels().list(
+                part='contentDetails',
+                id=channel_id
+            ))
+            
+            if not channel_response.get('items'):
+                print(f"DEBUG: 無法獲取頻道 {channel_id} 的資訊")
+                return []
+            
+            # 獲取上傳播放清單 ID
+            uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            state['uploads'] = uploads_playlist_id
+            checkpoint.save()
         print(f"DEBUG: 上傳播放清單 ID: {uploads_playlist_id}")
         
         # 使用 playlistItems 獲取影片列表
-        request = youtube.playlistItems().list(
+        request = api.youtube.playlistItems().list(
             part='snippet',
             playlistId=uploads_playlist_id,
-            maxResults=50  # 每頁最大數量
+            maxResults=50,  # 每頁最大數量
+            **({'pageToken': state['page_token']} if state['page_token'] else {})
         )
         
         while request:
-            response = request.execute()
+            response = api.execute(request)
             items = response.get('items', [])
             
             if not items:
@@ -163,6 +315,12 @@ def get_video_ids_from_channel(channel_id):
                 
             print(f"DEBUG: 獲取到 {len(items)} 個影片")
             
+            # 標題符合關鍵字的影片以一次批次查詢填入登錄檔
+            matching = [item['snippet']['resourceId']['videoId'] for item in items
+                        if any(keyword.lower() in item['snippet']['title'].lower() for keyword in keywords)]
+            api.registry.refresh(api, [video_id for video_id in matching if video_id not in state['videos']])
+            
+            reached_end = False
             for item in items:
                 snippet = item['snippet']
                 video_id = snippet['resourceId']['videoId']
@@ -175,71 +333,70 @@ def get_video_ids_from_channel(channel_id):
                 # 如果影片發布時間早於30天前，就停止搜尋
                 if published_time < thirty_days_ago:
                     print(f"DEBUG: 已到達30天前的影片，停止搜尋")
+                    reached_end = True
                     break
                 
                 # 檢查標題是否包含關鍵字（不區分大小寫）
-                if ('歌枠' in title or 'karaoke' in title.lower()):
+                if video_id not in state['videos'] and any(keyword.lower() in title.lower() for keyword in keywords):
                     print(f"DEBUG: 找到歌枠直播: {title}")
                     
-                    # 獲取影片詳細資訊
-                    video_response = youtube.videos().list(
-                        part='liveStreamingDetails,snippet',
-                        id=video_id
-                    ).execute()
+                    # 影片詳細資訊（上面已批次查詢）
+                    video_details = api.registry.lookup(api, video_id)
                     
-                    if not video_response.get('items'):
+                    if video_details['status'] == 'missing':
                         print(f"DEBUG: 無法獲取影片 {video_id} 的詳細資訊")
                         continue
                     
-                    video_details = video_response['items'][0]
+                    stream_date = None
                     
                     # 獲取直播時間
-                    if 'liveStreamingDetails' in video_details:
+                    if video_details['streamed']:
                         # 優先使用實際開始時間，如果沒有則使用預定開始時間
-                        actual_start = video_details['liveStreamingDetails'].get('actualStartTime')
-                        scheduled_start = video_details['liveStreamingDetails'].get('scheduledStartTime')
-                        
-                        if actual_start:
-                            stream_date = get_jst_date(actual_start)
-                        elif scheduled_start:
-                            stream_date = get_jst_date(scheduled_start)
-                        else:
-                            stream_date = get_jst_date(video_details['snippet']['publishedAt'])
+                        stream_date = video_registry.jst_date(video_details['actual_start']
+                                                              or video_details['scheduled_start']
+                                                              or video_details['published_at'])
                         
-                        video_info.append((video_id, stream_date))
-                        print(f"DEBUG: 已加入清單: {video_id} - {title} - {stream_date.date()}")
+                        print(f"DEBUG: 已加入清單: {video_id} - {title} - {stream_date}")
+                    state['videos'][video_id] = stream_date.isoformat() if stream_date else None
+                    checkpoint.save()
             
-            if published_time < thirty_days_ago:
+            if reached_end:
                 break
                 
             # 獲取下一頁
             if 'nextPageToken' in response:
-                request = youtube.playlistItems().list_next(request, response)
+                request = api.youtube.playlistItems().list_next(request, response)
+                state['page_token'] = response['nextPageToken']
+                checkpoint.save()
             else:
                 break  # 使用 break 而不是設置 request = None
-            
-        print(f"DEBUG: 總共找到 {len(video_info)} 個歌枠直播")
         
-    except HttpError as e:
+        state['complete'] = True
+        state['page_token'] = None
+        checkpoint.save()
+        print(f"DEBUG: 總共找到 {len(source_videos(state))} 個歌枠直播")
+        
+    except youtube_client.HttpError as e:
         print(f"DEBUG: YouTube API 錯誤: {str(e)}")
+    except CircuitOpen:
+        raise
     except Exception as e:
         print(f"DEBUG: 未預期的錯誤: {str(e)}")
     
-    return video_info
+    checkpoint.save()
+    return source_videos(state)
     
-def get_timestamp_comment(video_id):
-    """獲取包含時間戳標記的留言"""
+def get_timestamp_comment(api, video_id, timestamp_markers=DEFAULT_CHANNEL['markers'], checkpoint=None):
+    """獲取包含時間戳標記的留言；搜尋完所有留言都沒有找到時記入進度檔"""
     try:
-        request = youtube.commentThreads().list(
+        request = api.youtube.commentThreads().list(
             part='snippet,replies',
             videoId=video_id,
             maxResults=100
         )
-
-        timestamp_markers = ['💐🌟🎶タイムスタンプ💐🌟🎶', '🌟💐🎶タイムスタンプ🌟💐🎶']
         
         while request:
-            response = request.execute()
+            response = api.execute(request)
             for item in response['items']:
                 # 檢查頂級評論
                 comment = item['snippet']['topLevelComment']['snippet']['textDisplay']
@@ -253,9 +410,12 @@ def get_timestamp_comment(video_id):
                         if any(marker in reply_text for marker in timestamp_markers):
                             return reply_text
 
-            request = youtube.commentThreads().list_next(request, response)
+            request = api.youtube.commentThreads().list_next(request, response)
+        
+        if checkpoint:
+            checkpoint.record_search(video_id)
             
-    except HttpError as e:
+    except youtube_client.HttpError as e:
         print(f"Error fetching comments for video {video_id}: {e}")
     
     return None
@@ -267,13 +427,12 @@ def clean_html(raw_html):
     clean_text = html.unescape(clean_text)  # 轉換HTML實體為普通字符
     return clean_text
 
-def save_to_file(video_id, comment, date):
+def save_to_file(video_id, comment, date, output_dir='timeline'):
     """保存留言到文件"""
     if not comment:
         print(f"未找到時間戳留言，視頻ID：{video_id}")
         return
         
-    output_dir = 'timeline'
     os.makedirs(output_dir, exist_ok=True)
     
     file_name = date.strftime('%Y%m%d') + '.txt'
@@ -287,38 +446,91 @@ def save_to_file(video_id, comment, date):
     # 清理HTML標籤
     clean_comment = clean_html(comment)
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(f'ID = {video_id}\n')
-        f.write(clean_comment)
+    # 原子寫入：中途失敗不會留下不完整的歌單（檔案已存在時會被視為已抓取而永遠跳過）
+    output_writer.write_text(file_path, f'ID = {video_id}\n' + clean_comment)
         
     print(f"已保存時間戳留言到 {file_path}")
 
+def checkpoint_path(channel):
+    return os.path.join(CHECKPOINT_DIR, f"getcomment_{channel['name']}.json")
+
+def fetch_channel(channel, scheduler, resume=True, youtube=None, registry=None):
+    """處理單一頻道：找出最近的歌枠與播放清單影片，抓取尚未存檔的時間戳留言；回傳 (存檔數, 狀態說明)"""
+    name = channel['name']
+    usage = scheduler.channel(name)
+    usage.started = time.monotonic()
+    checkpoint = Checkpoint(checkpoint_path(channel) if resume else None)
+    saved = 0
+    status = 'done'
+    try:
+        api = ChannelApi(name, scheduler, youtube, registry)
+        # 收集所有影片資訊
+        video_info = []
+        if channel.get('channel_id'):
+            video_info.extend(get_video_ids_from_channel(api, channel['channel_id'], channel['keywords'],
+                                                         channel['days'], checkpoint))
+        for playlist_id in channel.get('playlists', []):
+            video_info.extend(get_video_ids_from_playlist(api, playlist_id, channel['days'], checkpoint))
+        
+        # 去重並排序
+        video_info = sorted(set(video_info), key=lambda x: x[1], reverse=True)
+        print(f"DEBUG: [{name}] 找到 {len(video_info)} 個唯一影片")
+        if all(state['complete'] for state in checkpoint.data['sources'].values()):
+            checkpoint.prune({video_id for video_id, _ in video_info})
+        
+        # 處理每個影片
+        for video_id, video_date in video_info:
+            file_name = f"{video_date:%Y%m%d}.txt"
+            file_path = os.path.join(channel['output_dir'], file_name)
+            
+            if os.path.exists(file_path):
+                print(f"DEBUG: [{name}] 檔案已存在，跳過 {video_id} ({video_date})")
+                continue
+            if checkpoint.searched_recently(video_id):
+                print(f"DEBUG: [{name}] 最近已搜尋過留言，跳過 {video_id} ({video_date})")
+                continue
+            
+            if timestamp_comment := get_timestamp_comment(api, video_id, channel['markers'], checkpoint):
+                save_to_file(video_id, timestamp_comment, video_date, channel['output_dir'])
+                saved += 1
+    except CircuitOpen as e:
+        status = f"stopped, progress saved: {e}"
+        print(f"DEBUG: [{name}] API 無法繼續使用，保存進度後停止: {e}")
+    finally:
+        checkpoint.save()
+        usage.finished = time.monotonic()
+    return saved, status
+
+def fetch_all(channels, scheduler, resume=True, youtube=None, registry=None):
+    """同時處理所有頻道，回傳 {頻道名稱: (存檔數, 狀態說明)}；youtube 只在單一頻道時共用，登錄檔所有頻道共用"""
+    registry = registry or video_registry.VideoRegistry()
+    if len(channels) == 1:
+        results = {channels[0]['name']: fetch_channel(channels[0], scheduler, resume, youtube, registry)}
+    else:
+        with ThreadPoolExecutor(max_workers=len(channels)) as executor:
+            futures = {channel['name']: executor.submit(fetch_channel, channel, scheduler, resume, None, registry)
+                       for channel in channels}
+        results = {name: future.result() for name, future in futures.items()}
+    print(registry.summary())
+    return results
+
 def main():
-    channel_id = 'UCDqn3HdMA5zwlYvsQ1YSG4Q'
-    playlist_id = 'PL7H5HbMMfm_lUoLIkPAZkhF_W0oDf5WEk'
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help='頻道設定檔（JSON 列表）；未指定時只處理 DEFAULT_CHANNEL')
+    parser.add_argument('--quota', type=int, default=DAILY_QUOTA, help='所有頻道共用的配額單位數')
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='所有頻道共用的每秒請求數上限')
+    parser.add_argument('--no-resume', action='store_true', help='不讀取也不寫入進度檔，從頭開始')
+    args = parser.parse_args()
+
+    channels = load_config(args.config) if args.config else [dict(DEFAULT_CHANNEL)]
+    scheduler = QuotaScheduler(args.quota, args.rate)
     start_time = datetime.now(timezone.utc)
     
-    print(f"DEBUG: 開始時間: {start_time}")
-    
-    # 收集所有影片資訊
-    video_info = get_video_ids_from_channel(channel_id)
-    video_info.extend(get_video_ids_from_playlist(playlist_id))
+    print(f"DEBUG: 開始時間: {start_time}，共 {len(channels)} 個頻道")
     
-    # 去重並排序
-    video_info = sorted(set(video_info), key=lambda x: x[1], reverse=True)
-    print(f"DEBUG: 找到 {len(video_info)} 個唯一影片")
+    results = fetch_all(channels, scheduler, not args.no_resume)
     
-    # 處理每個影片
-    for video_id, video_date in video_info:
-        file_name = f"{video_date:%Y%m%d}.txt"
-        file_path = os.path.join('timeline', file_name)
-        
-        if os.path.exists(file_path):
-            print(f"DEBUG: 檔案已存在，跳過 {video_id} ({video_date})")
-            continue
-        
-        if timestamp_comment := get_timestamp_comment(video_id):
-            save_to_file(video_id, timestamp_comment, video_date)
+    scheduler.print_report({name: f"{count} files saved, {status}" for name, (count, status) in results.items()})
 
 if __name__ == '__main__':
     main()
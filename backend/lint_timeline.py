@@ -0,0 +1,215 @@
+"""檢查 timeline/*.txt 中無法解析的行，輸出含檔名、行號與原因的診斷。
+
+    python backend/lint_timeline.py                          # 文字輸出（檔案:行號: 等級 原因: 內容）
+    python backend/lint_timeline.py --format json            # JSON 列表
+    python backend/lint_timeline.py --format sarif -o lint.sarif
+    python backend/lint_timeline.py timeline/20250101.txt    # 只檢查指定的歌單
+
+直接呼叫 process_timeline.process_timeline()（建置 data.json 的同一個解析器）並收集它的警告，
+規則與網頁建置完全一致。診斷等級：
+    error     整份歌單被略過（empty-file、invalid-video-id、invalid-filename、unreadable-file），
+              或某行解析時發生例外（line-error，例如時間格式錯誤）
+    warning   看起來是歌曲（含 mm:ss 時間）卻被略過的行（insufficient-parts、incorrect-format）
+    note      被略過的其他文字（タイムスタンプ標題、說明文字）；預設不顯示，--min-level note 時列出
+空白行不列入。整份歌單的問題標在第 1 行；無法檢查的檔案也一定會出現在輸出中，不會中斷整次檢查。
+
+每個檔案的結果以「路徑＋內容的 SHA-1」快取在 lint_cache.json，內容沒變的檔案不重新解析；
+process_timeline.py 或本檔改動時整份快取失效。需要解析的檔案以多個行程平行處理。
+有 error（或 --fail-on 指定的等級以上）時結束碼為 1。
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+import output_writer
+from process_timeline import RuleSet, process_timeline, timeline_file_date
+
+CACHE_PATH = 'lint_cache.json'
+CACHE_FORMAT = 1
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARALLEL_BYTES = 512 * 1024  # 需要解析的內容少於這個大小時不啟動子行程（啟動成本比解析還高）
+
+LEVELS = ['note', 'warning', 'error']
+RULES = {
+    'empty-file': ('error', '歌單是空的，整份略過'),
+    'invalid-filename': ('error', '檔名不是有效日期的 YYYYMMDD.txt（或 YYYYMMDD_N.txt），整份略過'),
+    'unreadable-file': ('error', '檔案無法讀取、不是 UTF-8，或解析時發生例外，整份略過'),
+    'invalid-video-id': ('error', '第一行不是 ID = 影片ID，整份略過'),
+    'line-error': ('error', '解析時發生例外（多半是時間格式錯誤），該行略過'),
+    'insufficient-parts': ('warning', '舊格式（時間 | 曲名 | 歌手 | 出典）欄位不足，該行略過'),
+    'incorrect-format': ('warning', '新格式（時間與曲名之間需全形空白或 2～4 個半形空白）不符，該行略過'),
+}
+_TIMESTAMP = re.compile(r'\d{1,2}[:：]\d{2}')
+
+def parser_fingerprint():
+    """解析器與本檔原始碼的 SHA-1；解析或分級規則改動時快取失效"""
+    return ','.join(output_writer.file_sha1(os.path.join(BASE_DIR, filename))
+                    for filename in ('process_timeline.py', 'lint_timeline.py'))
+
+def diagnostic_level(reason, text):
+    level = RULES[reason][0]
+    if level == 'warning' and not _TIMESTAMP.search(text):
+        return 'note'
+    return level
+
+def lint_text(name, text):
+    """以正式的解析器檢查一份歌單，回傳 [[行號, 等級, 原因, 內容]]"""
+    date_str = timeline_file_date(name)
+    try:
+        datetime.strptime(date_str or '', '%Y%m%d')
+    except ValueError:
+        return [[1, 'error', 'invalid-filename', name]]
+    diagnostics = []
+    source = io.StringIO(text, newline=None)
+    source.name = name
+    try:
+        # 規則檔只影響旗標（會員限定、清唱等），不影響哪些行能解析，用空的規則即可
+        process_timeline(source, date_str, RuleSet(), {}, diagnostics)
+    except Exception as e:
+        return [[1, 'error', 'unreadable-file', f"{type(e).__name__}: {e}"]]
+    return [[line_no, diagnostic_level(reason, detail), reason, detail]
+            for line_no, reason, detail in diagnostics
+            if reason not in ('insufficient-parts', 'incorrect-format') or detail]
+
+def worker_count(jobs=None):
+    """平行處理的行程數：預設為這個行程可用的 CPU 數"""
+    if jobs:
+        return jobs
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS、Windows
+        return os.cpu_count() or 1
+
+def load_cache(path, fingerprint):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('format') == CACHE_FORMAT and cache.get('parser') == fingerprint:
+            return cache
+    except (FileNotFoundError, ValueError):
+        pass
+    return {'format': CACHE_FORMAT, 'parser': fingerprint, 'files': {}}
+
+def lint_files(paths, cache_path=CACHE_PATH, jobs=None):
+    """檢查 paths 中的歌單，回傳 ({路徑: 診斷列表}, 不是取自快取的檔案數)"""
+    cache = load_cache(cache_path, parser_fingerprint()) if cache_path else None
+    cached = cache['files'] if cache else {}
+    results = {}
+    hits = 0
+    pending = []  # (路徑, 檔名, 內容, SHA-1)
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            results[path] = [[1, 'error', 'unreadable-file', f"{type(e).__name__}: {e.strerror}"]]
+            continue
+        name = os.path.basename(path)
+        digest = hashlib.sha1(data).hexdigest()
+        entry = cached.get(path)
+        if entry and entry['sha1'] == digest:
+            results[path] = entry['diagnostics']
+            hits += 1
+            continue
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            results[path] = [[1, 'error', 'unreadable-file', str(e)]]
+            continue
+        pending.append((path, name, text, digest))
+
+    names = [name for _, name, _, _ in pending]
+    texts = [text for _, _, text, _ in pending]
+    workers = worker_count(jobs)
+    if workers > 1 and sum(len(text) for text in texts) >= PARALLEL_BYTES:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            linted = list(executor.map(lint_text, names, texts, chunksize=max(1, len(pending) // 64)))
+    else:
+        linted = list(map(lint_text, names, texts))
+    for (path, name, _, digest), diagnostics in zip(pending, linted):
+        results[path] = diagnostics
+        cached[path] = {'sha1': digest, 'diagnostics': diagnostics}
+
+    if cache is not None and pending:
+        output_writer.write_json(cache_path, cache, quiet=True, ensure_ascii=False, separators=(',', ':'))
+    return results, len(paths) - hits
+
+def timeline_paths(timeline_dir='timeline'):
+    return [os.path.join(timeline_dir, name) for name in sorted(os.listdir(timeline_dir))
+            if timeline_file_date(name) is not None]
+
+def flatten(results, min_level='warning'):
+    """[(路徑, 行號, 等級, 原因, 內容)]，依檔名與行號排序"""
+    threshold = LEVELS.index(min_level)
+    return [(path, line_no, level, reason, text)
+            for path in sorted(results)
+            for line_no, level, reason, text in results[path]
+            if LEVELS.index(level) >= threshold]
+
+def to_json(diagnostics):
+    return json.dumps([{'file': path.replace(os.sep, '/'), 'line': line_no, 'level': level,
+                        'rule': reason, 'message': text}
+                       for path, line_no, level, reason, text in diagnostics],
+                      ensure_ascii=False, indent=2)
+
+def to_sarif(diagnostics):
+    """SARIF 2.1.0（GitHub code scanning 可直接上傳）"""
+    rules = [{'id': reason, 'shortDescription': {'text': description},
+              'defaultConfiguration': {'level': level}}
+             for reason, (level, description) in RULES.items()]
+    results = [{
+        'ruleId': reason,
+        'level': level,
+        'message': {'text': f"{RULES[reason][1]}: {text}" if text else RULES[reason][1]},
+        'locations': [{'physicalLocation': {
+            'artifactLocation': {'uri': path.replace(os.sep, '/')},
+            'region': {'startLine': line_no},
+        }}],
+    } for path, line_no, level, reason, text in diagnostics]
+    return json.dumps({
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{'tool': {'driver': {'name': 'lint_timeline', 'rules': rules}}, 'results': results}],
+    }, ensure_ascii=False, indent=2)
+
+def to_text(diagnostics):
+    return ''.join(f"{path}:{line_no}: {level} {reason}: {text}\n"
+                   for path, line_no, level, reason, text in diagnostics)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='要檢查的歌單；未指定時檢查 timeline/ 內所有歌單')
+    parser.add_argument('--format', choices=('text', 'json', 'sarif'), default='text')
+    parser.add_argument('-o', '--output', help='寫入檔案而不是輸出到畫面')
+    parser.add_argument('--min-level', choices=LEVELS, default='warning', help='列出的最低等級')
+    parser.add_argument('--fail-on', choices=LEVELS, default='error', help='有這個等級以上的診斷時結束碼為 1')
+    parser.add_argument('--jobs', type=int, help='平行處理的行程數（預設為可用的 CPU 數）')
+    parser.add_argument('--no-cache', action='store_true', help='不讀取也不寫入快取')
+    args = parser.parse_args(argv)
+
+    paths = args.files or timeline_paths()
+    results, checked = lint_files(paths, None if args.no_cache else CACHE_PATH, args.jobs)
+    diagnostics = flatten(results, args.min_level)
+    output = {'text': to_text, 'json': to_json, 'sarif': to_sarif}[args.format](diagnostics)
+    if args.output:
+        output_writer.write_text(args.output, output)
+    else:
+        sys.stdout.write(output)
+
+    counts = {level: 0 for level in LEVELS}
+    for _, _, level, _, _ in flatten(results, 'note'):
+        counts[level] += 1
+    print(f"{len(paths)} files ({checked} checked, {len(paths) - checked} cached): "
+          f"{counts['error']} errors, {counts['warning']} warnings, {counts['note']} notes", file=sys.stderr)
+    failing = LEVELS.index(args.fail_on)
+    if any(counts[level] for level in LEVELS[failing:]):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""所有產生器共用的輸出寫入：先寫暫存檔、fsync 後改名取代，內容未變時不寫入。
+
+    with output_writer.atomic_open('data.json') as f:   # 逐段寫入（串流輸出）
+        f.write(...)
+    f.written                                            # 離開區塊後為是否實際寫入
+    output_writer.write_text(path, text)
+    output_writer.write_json(path, obj, indent=2)
+
+暫存檔與目標檔在同一資料夾，os.replace 是原子操作，中途當掉只會留下舊檔，不會留下寫到一半的檔案。
+寫完後比對新舊內容的 SHA-1，相同時刪除暫存檔、保留原檔（修改時間不變，git 也不會有變動）。
+每次寫入都會印出寫入或略過的位元組數（quiet=True 時不印，例如頻繁更新的進度檔），
+並累計在寫入／略過的檔案數與位元組數，print_summary() 列出上次統計之後的總數並歸零
+（watch 模式、getcomment 等長時間執行或多執行緒寫入時，記錄不會無限增加）。
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+_totals = {True: [0, 0], False: [0, 0]}  # 是否實際寫入 -> [檔案數, 位元組數]
+_totals_lock = threading.Lock()
+
+def file_sha1(path):
+    """檔案內容的 SHA-1，檔案不存在時回傳 None"""
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1()
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+            return digest.hexdigest()
+    except FileNotFoundError:
+        return None
+
+def _fsync_directory(directory):
+    # 讓改名本身也寫入磁碟；不支援開啟資料夾的平台（Windows）略過
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _count(written, size):
+    with _totals_lock:
+        _totals[written][0] += 1
+        _totals[written][1] += size
+
+def _commit(tmp_path, path, quiet=False):
+    """內容與現有檔案不同時以暫存檔取代，回傳是否實際寫入"""
+    size = os.path.getsize(tmp_path)
+    if os.path.exists(path) and os.path.getsize(path) == size and file_sha1(path) == file_sha1(tmp_path):
+        os.remove(tmp_path)
+        _count(False, size)
+        if not quiet:
+            print(f"Unchanged {path} ({size} bytes), write skipped")
+        return False
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+    _count(True, size)
+    if not quiet:
+        print(f"Wrote {path} ({size} bytes)")
+    return True
+
+@contextlib.contextmanager
+def atomic_open(path, encoding='utf-8', binary=False, quiet=False):
+    """逐段寫入 path（預設文字模式，binary=True 時寫入 bytes）；區塊內發生例外時放棄暫存檔、保留原檔。
+
+    離開區塊後，檔案物件的 written 屬性為這次是否實際寫入（每次呼叫各自的結果，多執行緒時也不會混用）。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        # mkstemp 建立的檔案權限是 0600，改為沿用原檔（或一般檔案）的權限
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        # newline='' 保留呼叫端寫入的換行字元，不在 Windows 上改成 \r\n
+        with (open(fd, 'wb') if binary else open(fd, 'w', encoding=encoding, newline='')) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    f.written = _commit(tmp_path, path, quiet)
+
+def write_text(path, text, encoding='utf-8', quiet=False):
+    """寫入整份文字內容，回傳是否實際寫入（內容相同時為 False）"""
+    with atomic_open(path, encoding, quiet=quiet) as f:
+        f.write(text)
+    return f.written
+
+def write_bytes(path, data):
+    """寫入 bytes，回傳是否實際寫入（內容相同時為 False）"""
+    with atomic_open(path, binary=True) as f:
+        f.write(data)
+    return f.written
+
+def write_json(path, obj, quiet=False, **dump_kwargs):
+    """以 json.dump 的參數序列化後寫入（預設 ensure_ascii=False），回傳是否實際寫入"""
+    dump_kwargs.setdefault('ensure_ascii', False)
+    return write_text(path, json.dumps(obj, **dump_kwargs), quiet=quiet)
+
+def print_summary():
+    """列出上次統計之後所有輸出檔的寫入／略過統計，並重新開始計算"""
+    with _totals_lock:
+        (written, written_bytes), (skipped, skipped_bytes) = _totals[True], _totals[False]
+        _totals[True], _totals[False] = [0, 0], [0, 0]
+    if not written and not skipped:
+        return
+    print(f"Output files: {written} written ({written_bytes} bytes), "
+          f"{skipped} unchanged ({skipped_bytes} bytes skipped)")
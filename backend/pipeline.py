@@ -0,0 +1,319 @@
+"""每週流程的單一入口：在同一個行程中依相依關係（DAG）執行各階段，共用狀態並列出各階段的時間。
+
+    python backend/pipeline.py                   # 抓留言 -> 檢查刪檔 -> 建置 data.json -> 補 tags.txt
+    python backend/pipeline.py --offline         # 不呼叫 API，只建置與補 tags.txt（不需要憑證）
+    python backend/pipeline.py --force           # 忽略上次的輸入紀錄，所有階段都重新執行
+    python backend/pipeline.py --skip tags       # 略過指定階段（可重複指定）
+
+階段與相依關係：
+    fetch     getcomment.py             抓取新的時間戳留言           （呼叫 API，每次都執行）
+    deleted   check_deleted_videos.py   檢查刪檔並更新 exceptions.txt （呼叫 API，每次都執行；依賴 fetch）
+    build     process_timeline.py       建置 data.json 與 data/       （依賴 deleted）
+    tags      update_tags_from_data.py  補上 tags.txt 缺少的歌曲      （依賴 build）
+
+原本各腳本分別執行時，每個都要重新讀取 timeline/、解析 data.json、建立 API 客戶端；
+這裡共用：
+    - timeline/ 的記憶體快照：每個檔案只讀一次，之後只重讀被前面階段改動的檔案；
+      規則檔與歌單都由快照讀取，檢查刪檔的影片 ID 也直接取自快照
+    - 建置好的歌曲列表（Song 物件），tags 階段直接使用，不再讀回 data.json
+    - 一個 YouTube API 客戶端與一個 QuotaScheduler，fetch 與 deleted 共用配額
+    - 影片登錄檔（video_registry.py）：fetch 查過的影片，deleted 在過期前不再查詢
+
+不呼叫 API 的階段記錄輸入（timeline/ 快照）的雜湊於 data/pipeline.json，
+輸入沒變且輸出都存在時略過該階段。pipeline.json 只存輸入雜湊（每週會被 commit，
+內容沒變時不產生新的 commit），各階段的完成時間只印在執行紀錄中。
+呼叫 API 的階段失敗時，依賴它的 API 階段不執行；build、tags 只依自己的輸入判斷，
+例如 fetch 因配額用完而失敗時，timeline/ 或 disc.json 有變動仍會重新建置。
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+
+import output_writer
+from process_timeline import ARTIFACT_DIR, build_catalogue, timeline_file_date, write_outputs
+from timeline_pack import packable_files
+
+STATE_PATH = os.path.join(ARTIFACT_DIR, 'pipeline.json')
+STATE_FORMAT = 1
+BUILD_OUTPUTS = ['data.json'] + [os.path.join(ARTIFACT_DIR, name) for name in
+                                 ('duplicates.json', 'tags.json', 'stats.json', 'readings.json', 'orders.json',
+                                  'canonical.json', 'setlists.json', 'cooccurrence.json',
+                                  'disc_links.json')]
+
+class TimelineSnapshot:
+    """timeline/ 內容的記憶體快照，提供與 timeline_pack.TimelinePack 相同的 names()／open() 介面，
+    可直接傳給 process_timeline.build_catalogue(pack=...)"""
+
+    def __init__(self, timeline_dir='timeline'):
+        self.timeline_dir = timeline_dir
+        self.files = {}  # 檔名 -> (mtime_ns, 大小, 內容 bytes, SHA-1)
+        self.reads = 0
+        self.refresh()
+
+    def refresh(self):
+        """重新掃描資料夾，只重讀新增或修改過的檔案，回傳有變動（含刪除）的檔名列表"""
+        names = packable_files(self.timeline_dir)
+        changed = sorted(set(self.files) - set(names))
+        for name in changed:
+            del self.files[name]
+        for name in names:
+            stat = os.stat(os.path.join(self.timeline_dir, name))
+            cached = self.files.get(name)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                continue
+            with open(os.path.join(self.timeline_dir, name), 'rb') as f:
+                data = f.read()
+            self.reads += 1
+            digest = hashlib.sha1(data).hexdigest()
+            if cached is None or cached[3] != digest:
+                changed.append(name)
+            self.files[name] = (stat.st_mtime_ns, stat.st_size, data, digest)
+        return changed
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def names(self):
+        return sorted(self.files)
+
+    def open(self, name):
+        """以文字檔的形式開啟快照中的檔案（換行處理與 open() 相同）"""
+        if name not in self.files:
+            raise FileNotFoundError(f"{name} is not in {self.timeline_dir}/")
+        text = io.StringIO(self.files[name][2].decode('utf-8'), newline=None)
+        text.name = os.path.join(self.timeline_dir, name)
+        return text
+
+    def digest(self):
+        """整個快照的雜湊（檔名與內容），作為建置階段的輸入紀錄"""
+        digest = hashlib.sha1()
+        for name in self.names():
+            digest.update(f"{name}\0{self.files[name][3]}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def video_ids(self):
+        """各歌單第一行 ID = ... 的影片 ID（與 process_timeline 的解析相同）"""
+        video_ids = set()
+        for name in self.names():
+            if timeline_file_date(name) is None:
+                continue
+            first_line = self.files[name][2].decode('utf-8').split('\n', 1)[0]
+            if '=' in first_line:
+                video_ids.add(first_line.split('=')[1].strip())
+        return video_ids
+
+class PipelineContext:
+    """各階段共用的狀態：timeline 快照、歌曲列表、API 客戶端與配額排程器"""
+
+    def __init__(self, args):
+        self.args = args
+        self.snapshot = TimelineSnapshot('timeline')
+        self._songs = None
+        self._songs_digest = None
+        self._youtube = None
+        self._scheduler = None
+        self._registry = None
+
+    def songs(self):
+        """由目前的快照建置歌曲列表；快照沒變時沿用上次的結果"""
+        digest = self.snapshot.digest()
+        if self._songs is None or self._songs_digest != digest:
+            self._songs = build_catalogue(self.snapshot.timeline_dir, self.snapshot)
+            self._songs_digest = digest
+        return self._songs
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            from quota_scheduler import QuotaScheduler
+            self._scheduler = QuotaScheduler(self.args.quota, self.args.rate)
+        return self._scheduler
+
+    @property
+    def youtube(self):
+        if self._youtube is None:
+            import getcomment
+            self._youtube = getcomment.build_youtube()
+        return self._youtube
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            import video_registry
+            self._registry = video_registry.VideoRegistry()
+        return self._registry
+
+    @property
+    def used_api(self):
+        return self._scheduler is not None
+
+class Stage:
+    """DAG 中的一個階段。inputs(ctx) 回傳輸入雜湊，None 表示每次都要執行（例如呼叫 API 的階段）。
+
+    有 inputs 的階段只在相依階段之後執行，不因相依階段失敗而略過（輸入沒變時仍為 unchanged）。
+    """
+
+    def __init__(self, name, run, deps=(), inputs=None, outputs=()):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.inputs = inputs
+        self.outputs = list(outputs)
+
+def run_fetch(ctx):
+    import getcomment
+    channels = getcomment.load_config(ctx.args.config) if ctx.args.config else [dict(getcomment.DEFAULT_CHANNEL)]
+    results = getcomment.fetch_all(channels, ctx.scheduler, not ctx.args.no_resume, ctx.youtube, ctx.registry)
+    return ', '.join(f"{name}: {count} files saved, {status}" for name, (count, status) in results.items())
+
+def run_deleted(ctx):
+    import check_deleted_videos
+    import getcomment
+    from quota_scheduler import CircuitOpen
+    api = getcomment.ChannelApi('deleted', ctx.scheduler, ctx.youtube, ctx.registry)
+    try:
+        deleted = check_deleted_videos.find_deleted_videos(ctx.snapshot.video_ids(), api)
+    except CircuitOpen as e:
+        # 只檢查了一部分時不更新 exceptions.txt（private_id 會被整行取代）
+        return f"stopped, exceptions.txt unchanged: {e}"
+    return f"{len(deleted)} deleted videos"
+
+def run_build(ctx):
+    songs = ctx.songs()
+    write_outputs(songs, 'data.json')
+    return f"{len(songs)} songs"
+
+def run_tags(ctx):
+    import update_tags_from_data
+    added = update_tags_from_data.update_tags([(song.song_name, song.artist) for song in ctx.songs()],
+                                              os.path.join(ctx.snapshot.timeline_dir, 'tags.txt'))
+    return f"{added} tag lines added"
+
+def snapshot_digest(ctx):
+    return ctx.snapshot.digest()
+
+def build_digest(ctx):
+    # disc_links.py 另外讀取 disc/disc.json，專輯資料更新後也要重新建置
+    import disc_links
+    return f"{ctx.snapshot.digest()}:{output_writer.file_sha1(disc_links.DISC_PATH)}"
+
+STAGES = [
+    Stage('fetch', run_fetch),
+    Stage('deleted', run_deleted, deps=['fetch']),
+    Stage('build', run_build, deps=['deleted'], inputs=build_digest, outputs=BUILD_OUTPUTS),
+    Stage('tags', run_tags, deps=['build'], inputs=snapshot_digest, outputs=['timeline/tags.txt']),
+]
+
+def stage_order(stages):
+    """依相依關係排序（同一層保持宣告順序），有循環或未知的相依時拋出 ValueError"""
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.deps if dep not in by_name]
+        if unknown:
+            raise ValueError(f"stage {stage.name} depends on unknown stage(s): {', '.join(unknown)}")
+    ordered, done = [], set()
+    while len(ordered) < len(stages):
+        ready = [stage for stage in stages if stage.name not in done and all(dep in done for dep in stage.deps)]
+        if not ready:
+            cycle = sorted(stage.name for stage in stages if stage.name not in done)
+            raise ValueError(f"dependency cycle among stages: {', '.join(cycle)}")
+        ordered.extend(ready)
+        done.update(stage.name for stage in ready)
+    return ordered
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('format') == STATE_FORMAT:
+            # 舊版另外記錄了完成時間，只保留輸入雜湊
+            state['stages'] = {name: {'inputs': entry.get('inputs')} for name, entry in state['stages'].items()}
+            return state
+    except (FileNotFoundError, ValueError):
+        pass
+    return {'format': STATE_FORMAT, 'stages': {}}
+
+def run_pipeline(ctx, stages=STAGES, skip=(), force=False, state_path=STATE_PATH):
+    """依序執行各階段，回傳 [(階段, 狀態, 秒數, 說明)]；狀態為 ran、unchanged、skipped、failed 或 blocked"""
+    state = load_state(state_path)
+    results = []
+    statuses = {}
+    for stage in stage_order(stages):
+        t0 = time.perf_counter()
+        note = ''
+        failed_deps = [dep for dep in stage.deps if statuses[dep] in ('failed', 'blocked')]
+        if failed_deps and stage.inputs is None:
+            status = 'blocked'
+            note = f"after {', '.join(failed_deps)} failed"
+        elif stage.name in skip:
+            status = 'skipped'
+        else:
+            digest = stage.inputs(ctx) if stage.inputs else None
+            recorded = state['stages'].get(stage.name, {}).get('inputs')
+            if (digest is not None and not force and digest == recorded
+                    and all(os.path.exists(path) for path in stage.outputs)):
+                status = 'unchanged'
+                note = 'inputs unchanged since last run'
+            else:
+                print(f"=== {stage.name} ===")
+                try:
+                    note = stage.run(ctx) or ''
+                    status = 'ran'
+                except Exception as e:
+                    traceback.print_exc()
+                    status = 'failed'
+                    note = f"{type(e).__name__}: {e}"
+                # 後面的階段看到的是這個階段寫入後的內容
+                changed = ctx.snapshot.refresh()
+                if changed:
+                    note += f" ({len(changed)} timeline files changed)"
+                if status == 'ran' and stage.inputs:
+                    state['stages'][stage.name] = {'inputs': stage.inputs(ctx)}
+                print(f"=== {stage.name} {status} at {datetime.now(timezone.utc).isoformat(timespec='seconds')} ===")
+            if failed_deps and status != 'blocked':
+                note += f" ({', '.join(f'{dep} {statuses[dep]}' for dep in failed_deps)})"
+        statuses[stage.name] = status
+        results.append((stage.name, status, time.perf_counter() - t0, note))
+    output_writer.write_json(state_path, state, quiet=True, indent=1)
+    return results
+
+def print_report(results):
+    print(f"{'stage':<10}{'status':<11}{'time (s)':>9}")
+    for name, status, seconds, note in results:
+        print(f"{name:<10}{status:<11}{seconds:>9.2f}  {note}")
+    print(f"total {sum(seconds for _, _, seconds, _ in results):.2f}s")
+
+def main(argv=None):
+    from quota_scheduler import DAILY_QUOTA, REQUESTS_PER_SECOND
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    stage_names = [stage.name for stage in STAGES]
+    parser.add_argument('--skip', action='append', default=[], choices=stage_names, help='略過的階段（可重複指定）')
+    parser.add_argument('--offline', action='store_true', help='略過呼叫 API 的階段（fetch、deleted）')
+    parser.add_argument('--force', action='store_true', help='忽略上次的輸入紀錄，重新執行所有階段')
+    parser.add_argument('--config', help='getcomment 的頻道設定檔；未指定時只處理預設頻道')
+    parser.add_argument('--quota', type=int, default=DAILY_QUOTA, help='fetch 與 deleted 共用的配額單位數')
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='fetch 與 deleted 共用的每秒請求數上限')
+    parser.add_argument('--no-resume', action='store_true', help='getcomment 不使用進度檔')
+    args = parser.parse_args(argv)
+    skip = set(args.skip)
+    if args.offline:
+        skip.update(('fetch', 'deleted'))
+
+    ctx = PipelineContext(args)
+    results = run_pipeline(ctx, skip=skip, force=args.force)
+    if ctx.used_api:
+        ctx.scheduler.print_report()
+    output_writer.print_summary()
+    print(f"timeline files read: {ctx.snapshot.reads}")
+    print_report(results)
+    if any(status == 'failed' for _, status, _, _ in results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
+import argparse
+import collections
 import json
 import os
 import re
 import unicodedata
 from datetime import datetime
 
+import output_writer
+
 def parse_time(time_str):
     """將時間字符串轉換為秒數"""
     time_str = time_str.replace('：', ':')
@@ -15,70 +19,243 @@ def create_link(video_id, time_str):
     time_in_seconds = parse_time(time_str)
     return f"https://www.youtube.com/watch?v={video_id}&t={time_in_seconds}s"
 
-def load_exceptions(exceptions_file):
-    """從指定文件讀取例外規則"""
-    member_exclusive_dates = set()
-    private_dates = set()  
-    private_ids = set()  # 新增：存儲已刪除影片的ID
-    copyright_songs = set()
-
-    with open(exceptions_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        for line in lines:
-            parts = line.strip().split('|')
-            if parts[0] == 'member_exclusive_dates':
-                dates = parts[1].split(',')
-                member_exclusive_dates.update(dates)
-            elif parts[0] == 'private':
-                dates = parts[1].split(',')
-                private_dates.update(dates)
-            elif parts[0] == 'private_id':  # 新增：處理已刪除影片ID
-                video_ids = parts[1].split(',')
-                private_ids.update(video_ids)
-            elif parts[0] == 'copyright':
-                if len(parts) == 3:
-                    song_name, artist = parts[1], parts[2]
-                    copyright_songs.add((song_name, artist))
+def open_text(source):
+    """開啟文字檔：source 為路徑，或已開啟的檔案物件（例如 timeline_pack 封裝檔中的檔案）"""
+    if hasattr(source, 'read'):
+        return source
+    return open(source, 'r', encoding='utf-8')
+
+def source_name(source):
+    """錯誤訊息與報告中顯示的檔名"""
+    return getattr(source, 'name', source)
+
+# 網頁用 data.json 以外的建置產物與報告
+ARTIFACT_DIR = 'data'
+
+# 規則檔（非歌單）的檔名
+RULE_FILES = ['exceptions.txt', 'headers.txt', 'acapella.txt', 'tags.txt']
+
+class Appearance:
+    """單次演唱紀錄，序列化後即 data.json 中 dates 陣列的一筆。
+
+    連結由 video_id 與秒數在輸出時組成，不在記憶體中保存。
+    position 為 (歌單檔名, 行號)，只用來還原每場直播的演唱順序（setlists.py），不參與比較也不輸出。
+    """
+    __slots__ = ('date', 'time', 'video_id', 'seconds',
+                 'is_member_exclusive', 'is_acapella', 'is_private', 'position')
+
+    def __init__(self, date, time, video_id, seconds, is_member_exclusive=False, is_acapella=False, is_private=False,
+                 position=None):
+        self.date = date
+        self.time = time
+        self.video_id = video_id
+        self.seconds = seconds
+        self.is_member_exclusive = is_member_exclusive
+        self.is_acapella = is_acapella
+        self.is_private = is_private
+        self.position = position
+
+    @property
+    def link(self):
+        return f"https://www.youtube.com/watch?v={self.video_id}&t={self.seconds}s"
+
+    def _identity(self):
+        return (self.date, self.time, self.video_id, self.seconds,
+                self.is_member_exclusive, self.is_acapella, self.is_private)
+
+    def __eq__(self, other):
+        if not isinstance(other, Appearance):
+            return NotImplemented
+        return self._identity() == other._identity()
+
+    def __hash__(self):
+        return hash(self._identity())
+
+    def to_dict(self):
+        return {
+            'date': self.date,
+            'time': self.time,
+            'link': self.link,
+            'is_member_exclusive': self.is_member_exclusive,
+            'is_acapella': self.is_acapella,
+            'is_private': self.is_private,
+        }
+
+class Song:
+    """以 (正規化曲名, 正規化歌手) 為鍵的一首歌與其所有演唱紀錄"""
+    __slots__ = ('key', 'song_name', 'artist', 'source', 'is_copyright', 'az',
+                 'dates', 'tags', 'sources', '_seen')
+
+    def __init__(self, key, song_name, artist, source, is_copyright, az):
+        self.key = key
+        self.song_name = song_name
+        self.artist = artist
+        self.source = source
+        self.is_copyright = is_copyright
+        self.az = az
+        self.dates = []
+        self.tags = []
+        # 這首歌所有出現過的出典寫法（以 dict 保留首次出現順序，輸出才穩定）
+        self.sources = {source: None} if source else {}
+        self._seen = set()
+
+    def add_appearance(self, appearance):
+        """加入演唱紀錄，完全相同的紀錄只保留一筆"""
+        if appearance not in self._seen:
+            self._seen.add(appearance)
+            self.dates.append(appearance)
+
+    def merge(self, other):
+        """合併另一個檔案中同鍵的歌曲"""
+        for appearance in other.dates:
+            self.add_appearance(appearance)
+        self.sources.update(other.sources)
+
+    def to_dict(self):
+        sources = list(self.sources)
+        return {
+            'song_name': self.song_name,
+            'artist': self.artist,
+            'source': select_best_source(sources),      # 預設最佳出典 (偏好日文)
+            'is_copyright': self.is_copyright,
+            'az': self.az,
+            'dates': [appearance.to_dict() for appearance in self.dates],
+            'tags': self.tags,
+            'source_en': select_english_source(sources),  # 純英文出典
+            '_searchableSources': "|".join(sources),
+        }
+
+_UNRESOLVED = object()
+
+class RuleSet:
+    """exceptions.txt 與 acapella.txt 編譯後的規則。
+
+    日期、影片 ID 與正規化 (曲名, 歌手) 各自建立索引，曲名與歌手用 normalize_key 比對，
+    空白或全半形不同的寫法也會套用。每首歌的規則在第一次查詢時合併並快取，
+    之後每筆演唱紀錄只需一次查表。每條規則（一行中的每個日期、影片 ID）都記錄是否曾經套用，
+    建置結束時列出從未套用的規則。
+    """
+
+    def __init__(self):
+        self.rules = []                   # 規則編號 -> (檔名, 行號, 內容)
+        self.matched = set()              # 曾經套用的規則編號
+        self.member_exclusive_dates = {}  # 日期 -> 規則編號
+        self.private_dates = {}           # 日期 -> 規則編號
+        self.private_ids = {}             # 影片 ID -> 規則編號
+        # (曲名, 歌手) 或 (曲名, None) -> [(種類, 日期或 None, 規則編號)]
+        self.song_rules = {}
+        self._resolved = {}
+
+    def _add_rule(self, filename, line_no, text):
+        self.rules.append((filename, line_no, text))
+        return len(self.rules) - 1
+
+    def _add_song_rule(self, kind, song_name, artist, date, rule_id):
+        key = (normalize_key(song_name), normalize_key(artist) if artist is not None else None)
+        self.song_rules.setdefault(key, []).append((kind, date, rule_id))
+        self._resolved.clear()
+
+    def load_exceptions(self, exceptions_file):
+        """從指定文件讀取例外規則"""
+        filename = os.path.basename(source_name(exceptions_file))
+        with open_text(exceptions_file) as f:
+            for line_no, line in enumerate(f, 1):
+                parts = line.strip().split('|')
+                kind = parts[0]
+                if kind in ('member_exclusive_dates', 'private', 'private_id') and len(parts) >= 2:
+                    index = {
+                        'member_exclusive_dates': self.member_exclusive_dates,
+                        'private': self.private_dates,
+                        'private_id': self.private_ids,  # 已刪除影片的ID
+                    }[kind]
+                    for value in parts[1].split(','):
+                        value = value.strip()
+                        if value:
+                            index[value] = self._add_rule(filename, line_no, f"{kind}|{value}")
+                elif kind == 'copyright' and len(parts) in (2, 3):
+                    rule_id = self._add_rule(filename, line_no, line.strip())
+                    artist = parts[2] if len(parts) == 3 else None
+                    self._add_song_rule('copyright', parts[1], artist, None, rule_id)
+
+    def load_acapella(self, acapella_file):
+        """從acapella.txt文件讀取清唱標籤（曲名[|歌手[|日期,日期...]]）"""
+        filename = os.path.basename(source_name(acapella_file))
+        with open_text(acapella_file) as f:
+            for line_no, line in enumerate(f, 1):
+                parts = line.strip().split('|')
+                if not parts[0]:
+                    continue
+                if len(parts) == 1:
+                    # 只有歌名：任何歌手、任何日期
+                    self._add_song_rule('acapella', parts[0], None, None,
+                                        self._add_rule(filename, line_no, line.strip()))
                 elif len(parts) == 2:
-                    song_name = parts[1]
-                    copyright_songs.add((song_name, None))
-
-    return member_exclusive_dates, private_dates, private_ids, copyright_songs
-
-def load_acapella(acapella_file):
-    """從acapella.txt文件讀取清唱標籤"""
-    acapella_songs = {}  # 按日期存儲清唱標籤
-    global_acapella_songs = set()  # 存儲沒有日期的清唱曲名
-    acapella_songs_with_artist = {}  # 存儲有日期和歌手的清唱歌曲
-
-    with open(acapella_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        for line in lines:
-            parts = line.strip().split('|')
-            if len(parts) == 1:
-                global_acapella_songs.add(parts[0])  # 只有歌名的曲名
-            elif len(parts) == 2:
-                song_name, artist = parts[0], parts[1]
-                if artist not in acapella_songs_with_artist:
-                    acapella_songs_with_artist[artist] = set()
-                acapella_songs_with_artist[artist].add(song_name)
-            elif len(parts) == 3:
-                song_name, artist, date_str = parts[0], parts[1], parts[2]
-                for date in date_str.split(','):
-                    date = date.strip()
-                    if date not in acapella_songs:
-                        acapella_songs[date] = {}
-                    if artist not in acapella_songs[date]:
-                        acapella_songs[date][artist] = set()
-                    acapella_songs[date][artist].add(song_name)
-
-    return acapella_songs, global_acapella_songs, acapella_songs_with_artist
+                    self._add_song_rule('acapella', parts[0], parts[1], None,
+                                        self._add_rule(filename, line_no, line.strip()))
+                elif len(parts) == 3:
+                    for date in parts[2].split(','):
+                        date = date.strip()
+                        if date:
+                            rule_id = self._add_rule(filename, line_no, f"{parts[0]}|{parts[1]}|{date}")
+                            self._add_song_rule('acapella', parts[0], parts[1], date, rule_id)
+
+    def stream_flags(self, date_str, video_id):
+        """一場直播的 (is_member_exclusive, is_private)"""
+        member_rule = self.member_exclusive_dates.get(date_str)
+        private_rules = [rule_id for rule_id in (self.private_dates.get(date_str), self.private_ids.get(video_id))
+                         if rule_id is not None]
+        if member_rule is not None:
+            self.matched.add(member_rule)
+        self.matched.update(private_rules)
+        return member_rule is not None, bool(private_rules)
+
+    def _resolve(self, key):
+        """合併 (曲名, 歌手) 與只有曲名的規則：(著作權規則, 不限日期的清唱規則, 日期 -> 清唱規則)，沒有規則時為 None"""
+        copyright_ids, acapella_ids, acapella_by_date = [], [], {}
+        for kind, date, rule_id in self.song_rules.get(key, []) + self.song_rules.get((key[0], None), []):
+            if kind == 'copyright':
+                copyright_ids.append(rule_id)
+            elif date is None:
+                acapella_ids.append(rule_id)
+            else:
+                acapella_by_date.setdefault(date, []).append(rule_id)
+        if not (copyright_ids or acapella_ids or acapella_by_date):
+            return None
+        return tuple(copyright_ids), tuple(acapella_ids), acapella_by_date
+
+    def song_flags(self, key, date_str):
+        """以正規化鍵查詢一筆演唱紀錄的 (is_acapella, is_copyright)"""
+        resolved = self._resolved.get(key, _UNRESOLVED)
+        if resolved is _UNRESOLVED:
+            resolved = self._resolved[key] = self._resolve(key)
+        if resolved is None:
+            # 大部分歌曲沒有任何規則
+            return False, False
+        copyright_ids, acapella_ids, acapella_by_date = resolved
+        acapella = acapella_ids or acapella_by_date.get(date_str)
+        if copyright_ids:
+            self.matched.update(copyright_ids)
+        if acapella:
+            self.matched.update(acapella)
+        return bool(acapella), bool(copyright_ids)
+
+    def unmatched(self):
+        """從未套用到任何演唱紀錄的規則 (檔名, 行號, 內容)"""
+        return [rule for rule_id, rule in enumerate(self.rules) if rule_id not in self.matched]
+
+    def report_unmatched(self):
+        unmatched = self.unmatched()
+        if unmatched:
+            print(f"Warning: {len(unmatched)} of {len(self.rules)} rules never matched any timeline entry:")
+            for filename, line_no, text in unmatched:
+                print(f"  {filename}:{line_no}  {text}")
+        return unmatched
 
 def load_headers(headers_file):
     """從headers.txt讀取首字對應表"""
     headers_dict = {}
     try:
-        with open(headers_file, 'r', encoding='utf-8') as f:
+        with open_text(headers_file) as f:
             for line in f:
                 line = line.strip()
                 if line:
@@ -102,7 +279,7 @@ def load_tags(tags_file):
     """從tags.txt讀取tags標籤"""
     tags_map = {}
     try:
-        with open(tags_file, 'r', encoding='utf-8') as f:
+        with open_text(tags_file) as f:
             for line in f:
                 line = line.strip()
                 if line:
@@ -137,8 +314,12 @@ def get_song_header(song_name, headers_dict):
             
     return None
 
+_JAPANESE_CHAR = re.compile(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]')
+_NON_ASCII_CHAR = re.compile(r'[^\x00-\x7F]')
+
 def select_best_source(sources):
-    """從多個出典寫法中選出最適合顯示的（主出典）。"""
+    """從多個出典寫法中選出最適合顯示的（主出典）。
+    只在這首歌的寫法中挑選；跨歌曲的同一作品見 canonical.py。"""
     if not sources:
         return ""
     
@@ -150,14 +331,14 @@ def select_best_source(sources):
     def source_score(src):
         score = 0
         # 如果包含日文字符，給予極高權重
-        if re.search(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9faf]', src):
+        if _JAPANESE_CHAR.search(src):
             score += 1000
         # 字串較長的通常資訊較完整，作為次要排序條件
         score += len(src)
         return score
 
-    # 依照分數由高到低排序，並回傳最高分的第一個
-    return sorted(valid_sources, key=source_score, reverse=True)[0]
+    # 回傳分數最高者（同分時取最先出現的寫法，與穩定排序後取第一個相同）
+    return max(valid_sources, key=source_score)
 
 def select_english_source(sources):
     """從多個出典寫法中選出純英文的出典。"""
@@ -167,11 +348,11 @@ def select_english_source(sources):
     valid_sources = [s for s in sources if s.strip()]
     
     # 邏輯：過濾出「不包含」任何非 ASCII 字符（如中日文字符）的出典
-    eng_sources = [s for s in valid_sources if not re.search(r'[^\x00-\x7F]', s)]
+    eng_sources = [s for s in valid_sources if not _NON_ASCII_CHAR.search(s)]
     
     if eng_sources:
         # 如果有多個純英文寫法，取長度最長的那個（通常資訊最完整）
-        return sorted(eng_sources, key=len, reverse=True)[0]
+        return max(eng_sources, key=len)
         
     return "" # 如果沒有純英文寫法，回傳空字串
 
@@ -195,117 +376,172 @@ def normalize_key(text):
     
     return normalized
 
-def process_timeline(file_path, date_str, member_exclusive_dates, private_dates, private_ids, acapella_songs, global_acapella_songs, acapella_songs_with_artist, copyright_songs, headers_dict):
-    data = {}
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        if not lines:
-            print(f"Error: {file_path} is empty.")
-            return []
-        
+# 解析流程的各階段都是產生器，一次只處理一行：
+#   timeline_lines    檔案 -> (行號, 行)
+#   parse_records     行 -> Record（拆出時間、曲名、歌手、出典，正規化鍵只算一次）
+#   flag_appearances  Record -> (Record, Appearance, is_copyright)（套用會員限定、清唱等規則）
+#   merge_appearances 併入 {正規化鍵: Song}
+# timeline_appearances 串起前三個階段；process_timeline 與 build_catalogue 都由這些階段組成，
+# 其他工具（lint_timeline 等）也可只取用需要的階段。
+
+Record = collections.namedtuple('Record', 'line_no text time_str song_name artist source key')
+Record.__doc__ = """歌單中的一行歌曲：text 為去除前後空白（與新格式的編號）後的原文，key 為 (正規化曲名, 正規化歌手)"""
+
+OLD_RULE_DATE = datetime(2024, 1, 20)  # 這天（含）以前：時間 | 曲名 | 歌手 | 出典
+NEW_RULE_DATE = datetime(2024, 1, 27)  # 這天（含）以後：時間　曲名 / 歌手 或 時間　曲名『出典』歌手
+
+def _warner(diagnostics):
+    """無法解析的行的回報方式：預設以 print 警告；指定 diagnostics（列表）時改為附加 (行號, 原因, 說明)"""
+    def warn(line_no, reason, detail, message):
+        if diagnostics is None:
+            print(message)
+        else:
+            diagnostics.append((line_no, reason, detail))
+    return warn
+
+def timeline_lines(f):
+    """逐行產生 (行號, 行)，不一次讀入整份檔案"""
+    return enumerate(f, 1)
+
+def read_video_id(lines, file_path, warn):
+    """讀取第一行的 ID = 影片ID；檔案是空的或格式不符時回報並回傳 None"""
+    first = next(lines, None)
+    if first is None:
+        warn(1, 'empty-file', '', f"Error: {source_name(file_path)} is empty.")
+        return None
+    try:
+        return first[1].strip().split('=')[1].strip()
+    except IndexError:
+        warn(1, 'invalid-video-id', first[1].strip(),
+             f"Error: Invalid video ID format in file {source_name(file_path)}.")
+        return None
+
+def parse_records(lines, date_str, warn):
+    """把歌單的每一行拆成 Record，格式不符的行回報後略過"""
+    date = datetime.strptime(date_str, "%Y%m%d")
+    for line_no, line in lines:
+        if date <= OLD_RULE_DATE:
+            # 舊規則解析
+            text = line.strip()
+            parts = text.split(' | ', 3)
+            if len(parts) < 2:
+                warn(line_no, 'insufficient-parts', text,
+                     f"Warning: Skipping line due to insufficient parts: '{text}'")
+                continue
+            time_str = parts[0]
+            song_name = parts[1]
+            artist = parts[2] if len(parts) > 2 else ''
+            source = parts[3] if len(parts) > 3 else ''
+        elif date >= NEW_RULE_DATE:
+            # 新規則解析
+            text = re.sub(r'^\d+\.\s+', '', line).strip()
+
+            # 支持全形空格或 4 個半形空格作為分隔符
+            parts = re.split(r'\u3000{1}| {2,4}', text, maxsplit=1)
+            if len(parts) != 2:
+                warn(line_no, 'incorrect-format', text,
+                     f"Warning: Skipping line due to incorrect format: '{text}'")
+                continue
+
+            time_str, song_info = parts
+            source = ""
+
+            # 檢查是否有『』，如果有則視為 source
+            if '『' in song_info and '』' in song_info:
+                song_name = song_info.split('『')[0].split(' / ')[0].strip()
+                source_artist = song_info.split('『')[1].split('』')
+                source = source_artist[0].strip()
+                artist = source_artist[1].strip() if len(source_artist) > 1 else ''
+            else:
+                # 沒有『』，視為曲名 / 歌手
+                song_parts = song_info.split(' / ')
+                song_name = song_parts[0].strip()
+                artist = song_parts[1].strip() if len(song_parts) > 1 else ''
+        else:
+            # 兩種格式之間的過渡期沒有歌單；保留原本的行為（視為解析錯誤）
+            text = line.strip()
+            warn(line_no, 'line-error', f"{text}: no format for {date_str}",
+                 f"Error processing line '{text}': no format for {date_str}")
+            continue
+
+        # 建立唯一鍵（僅做 NFKC 和 ~ 統一，用於資料合併，不改變顯示原文）
+        key = (normalize_key(song_name), normalize_key(artist))
+        yield Record(line_no, text, time_str, song_name, artist, source, key)
+
+def flag_appearances(records, date_str, video_id, rules, warn, filename=None):
+    """為每個 Record 建立 Appearance 並套用規則；時間格式錯誤的行回報後略過。
+
+    filename 為歌單檔名，與行號一起記在 Appearance.position。
+    """
+    # 會員限定、私人或已刪除影片的標記整場相同
+    is_member_exclusive, is_private = rules.stream_flags(date_str, video_id)
+    for record in records:
         try:
-            video_id = lines[0].strip().split('=')[1].strip()
-        except IndexError:
-            print(f"Error: Invalid video ID format in file {file_path}.")
-            return []
-        
-        # 檢查影片是否已刪除
-        is_deleted = video_id in private_ids
-        
-        date = datetime.strptime(date_str, "%Y%m%d")
-        old_rule_date = datetime.strptime("20240120", "%Y%m%d")
-        new_rule_date = datetime.strptime("20240127", "%Y%m%d")
-        
-        for line in lines[1:]:
-            try:
-                # 這裡需要恢復原來的解析邏輯
-                if date <= old_rule_date:
-                    # 舊規則解析
-                    parts = line.strip().split(' | ', 3)
-                    if len(parts) < 2:
-                        print(f"Warning: Skipping line due to insufficient parts: '{line.strip()}'")
-                        continue
-                    time_str = parts[0]
-                    song_name = parts[1]
-                    artist = parts[2] if len(parts) > 2 else ''
-                    source = parts[3] if len(parts) > 3 else ''
-                elif date >= new_rule_date:
-                    # 新規則解析
-                    line = re.sub(r'^\d+\.\s+', '', line)
-                    
-                    # 支持全形空格或 4 個半形空格作為分隔符
-                    parts = re.split(r'\u3000{1}| {2,4}', line.strip(), maxsplit=1)
-                    if len(parts) != 2:
-                        print(f"Warning: Skipping line due to incorrect format: '{line.strip()}'")
-                        continue
-                        
-                    time_str, song_info = parts
-                    song_name = ""
-                    artist = ""
-                    source = ""
-                    
-                    # 檢查是否有『』，如果有則視為 source
-                    if '『' in song_info and '』' in song_info:
-                        song_name = song_info.split('『')[0].split(' / ')[0].strip()
-                        source_artist = song_info.split('『')[1].split('』')
-                        source = source_artist[0].strip()
-                        artist = source_artist[1].strip() if len(source_artist) > 1 else ''
-                    else:
-                        # 沒有『』，視為曲名 / 歌手
-                        song_parts = song_info.split(' / ')
-                        song_name = song_parts[0].strip()
-                        artist = song_parts[1].strip() if len(song_parts) > 1 else ''
-                
-                # 建立唯一鍵（僅做 NFKC 和 ~ 統一，用於資料合併，不改變顯示原文）
-                normalized_key = (normalize_key(song_name), normalize_key(artist))
-                
-                link = create_link(video_id, time_str)
-                is_member_exclusive = date_str in member_exclusive_dates
-                is_acapella = (
-                    (date_str in acapella_songs and artist in acapella_songs[date_str] and song_name in acapella_songs[date_str][artist]) or
-                    (song_name in global_acapella_songs) or
-                    (artist in acapella_songs_with_artist and song_name in acapella_songs_with_artist[artist])
-                )
-                is_copyright = (song_name, artist) in copyright_songs or (song_name, None) in copyright_songs
-                is_private = date_str in private_dates or is_deleted
-                
-                if normalized_key not in data:
-                    data[normalized_key] = {
-                        'song_name': song_name,
-                        'artist': artist,
-                        'source': source,
-                        'is_copyright': is_copyright,
-                        'az': get_song_header(song_name, headers_dict),
-                        'dates': [],
-                        'tags': []  # 新增：初始化 tags 欄位
-                    }
-
-                date_info = {
-                    'date': date_str,
-                    'time': time_str,
-                    'link': link,
-                    'is_member_exclusive': is_member_exclusive,
-                    'is_acapella': is_acapella,
-                    'is_private': is_private,
-                }
-                if date_info not in data[normalized_key]['dates']:
-                    data[normalized_key]['dates'].append(date_info)
-                
-            except Exception as e:
-                print(f"Error processing line '{line.strip()}': {e}")
-    
+            is_acapella, is_copyright = rules.song_flags(record.key, date_str)
+            # 時間格式錯誤會在此拋出例外並跳過該行
+            appearance = Appearance(
+                date_str, record.time_str, video_id, parse_time(record.time_str),
+                is_member_exclusive, is_acapella, is_private, (filename, record.line_no)
+            )
+        except Exception as e:
+            warn(record.line_no, 'line-error', f"{record.text}: {e}", f"Error processing line '{record.text}': {e}")
+            continue
+        yield record, appearance, is_copyright
+
+def timeline_appearances(file_path, date_str, rules, diagnostics=None):
+    """逐行解析一份歌單，產生 (Record, Appearance, is_copyright)；無法解析的行的回報方式同 process_timeline"""
+    warn = _warner(diagnostics)
+    with open_text(file_path) as f:
+        lines = timeline_lines(f)
+        video_id = read_video_id(lines, file_path, warn)
+        if video_id is None:
+            return
+        yield from flag_appearances(parse_records(lines, date_str, warn), date_str, video_id, rules, warn,
+                                    os.path.basename(source_name(file_path)))
+
+def merge_appearances(flagged, songs, headers_dict):
+    """把一份歌單的 (Record, Appearance, is_copyright) 併入 songs（{正規化鍵: Song}），回傳這份歌單的歌曲數。
+
+    歌曲以第一次出現時的寫法建立；每一行的出典寫法都收錄（依首次出現順序）。
+    """
+    file_keys = set()
+    for record, appearance, is_copyright in flagged:
+        song = songs.get(record.key)
+        if song is None:
+            song = songs[record.key] = Song(
+                record.key, record.song_name, record.artist, record.source, is_copyright,
+                get_song_header(record.song_name, headers_dict)
+            )
+        elif record.source:
+            song.sources.setdefault(record.source, None)
+        file_keys.add(record.key)
+        song.add_appearance(appearance)
+    return len(file_keys)
+
+def process_timeline(file_path, date_str, rules, headers_dict, diagnostics=None):
+    """解析一份歌單，回傳 Song 列表。
+
+    無法解析的行預設以 print 警告；指定 diagnostics（列表）時改為附加 (行號, 原因, 說明)，
+    原因為 empty-file、invalid-video-id、insufficient-parts、incorrect-format 或 line-error。
+    """
+    data = {}
+    merge_appearances(timeline_appearances(file_path, date_str, rules, diagnostics), data, headers_dict)
     return list(data.values())
 
-def main():
-    timeline_dir = 'timeline'
-    exceptions_file = os.path.join(timeline_dir, 'exceptions.txt')
-    acapella_file = os.path.join(timeline_dir, 'acapella.txt')
-    headers_file = os.path.join(timeline_dir, 'headers.txt')
-    tags_file = os.path.join(timeline_dir, 'tags.txt')
-    all_data = {}
+def load_rules(timeline_dir='timeline', pack=None):
+    """讀取 timeline 內的規則檔，回傳 (傳給 process_timeline 的規則參數, tags 對照表)。
 
-    print("Starting process_timeline.py")
+    指定 pack（timeline_pack.TimelinePack）時優先讀取封裝檔中的規則檔。
+    """
+    def rule_file(name):
+        if pack is not None and name in pack:
+            return pack.open(name)
+        return os.path.join(timeline_dir, name)
+
+    exceptions_file = rule_file('exceptions.txt')
+    acapella_file = rule_file('acapella.txt')
+    headers_file = rule_file('headers.txt')
+    tags_file = rule_file('tags.txt')
 
     # 讀取headers檔案
     headers_dict = load_headers(headers_file)
@@ -315,83 +551,151 @@ def main():
     tags_map = load_tags(tags_file)
     print(f"Loaded tags map with {len(tags_map)} entries")
     
-    # 讀取例外規則
-    member_exclusive_dates, private_dates, private_ids, copyright_songs = load_exceptions(exceptions_file)
-    print(f"Loaded exceptions: {len(private_ids)} private_ids, {len(private_dates)} private_dates")
-
-    # 讀取acapella文件
-    acapella_songs, global_acapella_songs, acapella_songs_with_artist = load_acapella(acapella_file)
+    # 讀取例外與清唱規則
+    rule_set = RuleSet()
+    rule_set.load_exceptions(exceptions_file)
+    print(f"Loaded exceptions: {len(rule_set.private_ids)} private_ids, {len(rule_set.private_dates)} private_dates")
+    rule_set.load_acapella(acapella_file)
     print("Loaded acapella settings")
-    
-    file_count = 0
-    for filename in os.listdir(timeline_dir):
-        if filename in ['exceptions.txt', 'headers.txt', 'acapella.txt', 'tags.txt']:
-            continue
-            
-        file_path = os.path.join(timeline_dir, filename)
-        match = re.match(r'(\d{8})(?:_\d+)?\.txt', filename)
-        if match:
-            date_str = match.group(1)
-            try:
-                print(f"Processing file: {filename}")
-                data = process_timeline(
-                    file_path, date_str, member_exclusive_dates, private_dates, 
-                    private_ids, acapella_songs, global_acapella_songs, 
-                    acapella_songs_with_artist, copyright_songs, headers_dict
-                )
-                
-                print(f"Processed {len(data)} songs from {filename}")
-                file_count += 1
-                
-                # 【優化邏輯】合併資料並收集所有出現過的出典
-                for song_data in data:
-                    key = (normalize_key(song_data['song_name']), normalize_key(song_data['artist']))
-                    if key not in all_data:
-                        all_data[key] = song_data
-                        # 初始化一個 Set 來存放這首歌的所有出典寫法
-                        all_data[key]['_all_sources'] = {song_data['source']} if song_data['source'] else set()
-                    else:
-                        existing_dates = all_data[key]['dates']
-                        new_dates = [d for d in song_data['dates'] if d not in existing_dates]
-                        all_data[key]['dates'].extend(new_dates)
-                        
-                        # 把新發現的出典寫法加進 Set 中
-                        if song_data['source']:
-                            all_data[key]['_all_sources'].add(song_data['source'])
-            
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
-    
-    print(f"Processed {file_count} files")
-    print(f"Total unique songs: {len(all_data)}")
 
-    # 【最終整理】在輸出 JSON 前，決定主出典、英文出典與 tags
-    for key, song_data in all_data.items():
-        song_data['tags'] = tags_map.get(key, [])
-        
-        sources = list(song_data.get('_all_sources', []))
-        if sources:
-            song_data['source'] = select_best_source(sources)            # 預設最佳出典 (偏好日文)
-            song_data['source_en'] = select_english_source(sources)      # 純英文出典
-            song_data['_searchableSources'] = "|".join(sources)
-        else:
-            song_data['source'] = ""
-            song_data['source_en'] = ""
-            song_data['_searchableSources'] = ""
-            
-        if '_all_sources' in song_data:
-            del song_data['_all_sources']
-    
-    # 輸出最終資料
+    rules = {
+        'rules': rule_set,
+        'headers_dict': headers_dict,
+    }
+    return rules, tags_map
+
+def timeline_file_date(filename):
+    """歌單檔名 YYYYMMDD.txt（或 YYYYMMDD_N.txt）的日期字串；規則檔或其他檔案回傳 None"""
+    if filename in RULE_FILES:
+        return None
+    match = re.match(r'(\d{8})(?:_\d+)?\.txt', filename)
+    return match.group(1) if match else None
+
+def iter_timeline_files(timeline_dir='timeline', pack=None):
+    """依檔名（即日期）順序產生 (檔名, 路徑, 日期字串)，略過規則檔與非歌單檔案。
+
+    固定順序讓 data.json 的歌曲與日期排列不受檔案系統影響，新歌單的內容只會附加在後面。
+    指定 pack 時改由封裝檔產生，「路徑」為已開啟的檔案物件。
+    """
+    names = pack.names() if pack is not None else sorted(os.listdir(timeline_dir))
+    for filename in names:
+        date_str = timeline_file_date(filename)
+        if date_str:
+            source = pack.open(filename) if pack is not None else os.path.join(timeline_dir, filename)
+            yield filename, source, date_str
+
+def build_catalogue(timeline_dir='timeline', pack=None):
+    """讀取 timeline 資料夾（或封裝檔）內所有歌單並合併為 Song 物件列表（尚未序列化）。
+
+    每份歌單逐行解析後直接併入同一份 {正規化鍵: Song}，不保留各檔的中間結果，
+    記憶體只隨不重複歌曲與演唱紀錄增加。讀取中途發生錯誤的歌單，錯誤前的行仍會收錄。
+    """
+    rules, tags_map = load_rules(timeline_dir, pack)
+    rule_set, headers_dict = rules['rules'], rules['headers_dict']
+
+    catalogue = {}
+    processed = 0
+    for filename, file_path, date_str in iter_timeline_files(timeline_dir, pack):
+        try:
+            print(f"Processing file: {filename}")
+            count = merge_appearances(timeline_appearances(file_path, date_str, rule_set), catalogue, headers_dict)
+            print(f"Processed {count} songs from {filename}")
+            processed += 1
+        except Exception as e:
+            print(f"Error processing file {source_name(file_path)}: {e}")
+
+    print(f"Processed {processed} files")
+    rule_set.report_unmatched()
+    # 【最終整理】決定 tags；主出典與英文出典在序列化時才計算
+    for key, song in catalogue.items():
+        song.tags = tags_map.get(key, [])
+    print(f"Total unique songs: {len(catalogue)}")
+    return list(catalogue.values())
+
+def write_data_json(songs, output_path='data.json'):
+    """將 Song 物件序列化並寫入 data.json（唯一的輸出邊界）"""
     try:
-        output_data = list(all_data.values())
-        if not output_data:
+        if not songs:
             print("Warning: No data to write!")
-        with open('data.json', 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
-        print(f"Successfully wrote {len(output_data)} songs to data.json")
+        # 逐首序列化，輸出與 json.dump(list, indent=4) 完全相同，但不必一次建立整份 dict 列表
+        # 先寫到暫存檔再取代，讀取端（網頁、watch 模式的使用者）不會看到寫到一半的檔案；內容沒變時不覆寫
+        with output_writer.atomic_open(output_path) as f:
+            f.write('[')
+            for i, song in enumerate(songs):
+                text = json.dumps(song.to_dict(), ensure_ascii=False, indent=4)
+                f.write((',\n    ' if i else '\n    ') + text.replace('\n', '\n    '))
+            f.write('\n]' if songs else ']')
+        print(f"Serialized {len(songs)} songs for {output_path}")
     except Exception as e:
-        print(f"Error writing data.json: {e}")
+        print(f"Error writing {output_path}: {e}")
+
+def write_outputs(songs, output_path='data.json'):
+    """寫出 data.json 與 data/ 內所有由歌曲列表衍生的產物"""
+    import delta
+    previous = delta.read_snapshot(output_path)
+    write_data_json(songs, output_path)
+    delta.update_chain(previous, output_path, os.path.join(ARTIFACT_DIR, 'delta'))
+
+    import duplicates
+    duplicates.write_report(songs, os.path.join(ARTIFACT_DIR, 'duplicates.json'))
+
+    import tag_index
+    tag_index.write_index(songs, os.path.join(ARTIFACT_DIR, 'tags.json'))
+
+    import stats
+    stats.write_stats(songs, os.path.join(ARTIFACT_DIR, 'stats.json'))
+
+    import readings
+    readings.write_readings(songs, os.path.join(ARTIFACT_DIR, 'readings.json'))
+
+    import sort_orders
+    sort_orders.write_orders(songs, os.path.join(ARTIFACT_DIR, 'orders.json'))
+
+    import canonical
+    canonical.write_canonical(songs, os.path.join(ARTIFACT_DIR, 'canonical.json'))
+
+    import setlists
+    index = setlists.write_setlists(songs, os.path.join(ARTIFACT_DIR, 'setlists.json'))
+
+    import cooccurrence
+    cooccurrence.write_cooccurrence([stream['songs'] for stream in index['streams']], len(songs),
+                                    os.path.join(ARTIFACT_DIR, 'cooccurrence.json'))
+
+    import disc_links
+    disc_links.write_links(songs, os.path.join(ARTIFACT_DIR, 'disc_links.json'))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將 timeline/*.txt 整理為 data.json')
+    parser.add_argument('--db', metavar='PATH',
+                        help='同時維護 SQLite 歌曲資料庫（只重新解析有變動的歌單），並由資料庫匯出 data.json')
+    parser.add_argument('--watch', action='store_true',
+                        help='常駐監看 timeline/，歌單存檔後只重新解析該檔並更新 data.json')
+    parser.add_argument('--pack', metavar='PATH',
+                        help='由 timeline_pack.py 產生的封裝檔讀取歌單，取代逐一開啟 timeline/ 的檔案')
+    args = parser.parse_args(argv)
+    if args.pack and (args.db or args.watch):
+        parser.error('--pack cannot be combined with --db or --watch')
+
+    if args.watch:
+        import watch
+        watch.watch('timeline', 'data.json')
+        return
+
+    print("Starting process_timeline.py")
+    if args.db:
+        import catalogue_db
+        with catalogue_db.connect(args.db) as conn:
+            catalogue_db.sync_timeline(conn, 'timeline')
+            songs = catalogue_db.load_songs(conn)
+    elif args.pack:
+        import timeline_pack
+        with timeline_pack.TimelinePack(args.pack) as pack:
+            songs = build_catalogue('timeline', pack)
+    else:
+        songs = build_catalogue('timeline')
+
+    write_outputs(songs, 'data.json')
+    output_writer.print_summary()
 
 if __name__ == '__main__':
     main()
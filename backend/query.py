@@ -0,0 +1,272 @@
+"""本地歌曲查詢：載入預先建立的索引，查詢曲名／歌手／出典、tags 與日期範圍。
+
+用法（在專案根目錄執行）：
+    python backend/query.py build                       # 由 data.json 建立索引
+    python backend/query.py search 残酷な天使            # 子字串搜尋（曲名、歌手、出典）
+    python backend/query.py search --fuzzy --field artist 高橋洋
+    python backend/query.py search --tag 90s --tag Anime --since 20250101 --json
+    python backend/query.py search -i                   # 載入一次索引後逐行讀取查詢
+
+索引以 normalize_key 正規化後的曲名、歌手與所有出典寫法建立 1～3 字元 (n-gram) 倒排索引，
+查詢字串以其中最長的 n-gram（三字元以上即 trigram）取候選，data.json 比索引新時會自動重建。
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from process_timeline import normalize_key
+
+INDEX_PATH = 'catalogue.idx'
+DATA_PATH = 'data.json'
+INDEX_VERSION = 1
+GRAM = 3  # 最長的 n-gram；較短的查詢（日文常見 1、2 字）改用同長度的 n-gram
+FIELDS = ('name', 'artist', 'source')
+
+def ngrams(text, n=GRAM):
+    """字串中所有長度為 n 的子字串（不重複）"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def trigrams(text):
+    return ngrams(text, GRAM)
+
+class SongIndex:
+    """data.json 的查詢索引，可直接 pickle 保存"""
+
+    def __init__(self, songs):
+        self.version = INDEX_VERSION
+        # 只保存查詢結果需要的摘要與排序後的日期，不保存整份 data.json
+        self.songs = [song_summary(song) for song in songs]
+        self.song_dates = [tuple(sorted(info['date'] for info in song.get('dates', []))) for song in songs]
+        self.names = [normalize_key(song.get('song_name', '')) for song in songs]
+        self.artists = [normalize_key(song.get('artist', '')) for song in songs]
+        # _searchableSources 已包含所有出典寫法，以 | 分隔
+        self.sources = [normalize_key(song.get('_searchableSources') or song.get('source', ''))
+                        for song in songs]
+
+        postings = {}
+        for song_id, fields in enumerate(zip(self.names, self.artists, self.sources)):
+            # 以 \0 串接三個欄位，跨欄位的 n-gram 含 \0，不會與查詢字串相符
+            doc = '\0'.join(fields)
+            for n in range(1, GRAM + 1):
+                for gram in ngrams(doc, n):
+                    postings.setdefault(gram, array('I')).append(song_id)
+        self.grams = postings
+
+        tag_postings = {}
+        for song_id, song in enumerate(self.songs):
+            for tag in song['tags']:
+                tag_postings.setdefault(tag, array('I')).append(song_id)
+        self.tags = tag_postings
+
+        # 所有演唱日期排序後的平行陣列，日期範圍查詢以二分搜尋處理
+        pairs = sorted((date, song_id) for song_id, dates in enumerate(self.song_dates) for date in dates)
+        self.dates = [date for date, _ in pairs]
+        self.date_song_ids = array('I', (song_id for _, song_id in pairs))
+
+    def _field_texts(self, field):
+        if field == 'name':
+            return (self.names,)
+        if field == 'artist':
+            return (self.artists,)
+        if field == 'source':
+            return (self.sources,)
+        return (self.names, self.artists, self.sources)
+
+    def substring(self, query, field=None):
+        """正規化後的子字串搜尋，回傳依收錄順序排列的歌曲編號"""
+        query = normalize_key(query)
+        texts = self._field_texts(field)
+        if query:
+            # 取最短的 posting list 作為候選，再逐一確認子字串
+            postings = [self.grams.get(gram) for gram in ngrams(query, min(len(query), GRAM))]
+            if any(p is None for p in postings):
+                return []
+            pool = min(postings, key=len)
+        else:
+            pool = range(len(self.songs))
+        return [i for i in pool if any(query in column[i] for column in texts)]
+
+    def fuzzy(self, query, field=None, threshold=0.5):
+        """以共同 trigram 比例做模糊搜尋，回傳 (編號, 分數)，分數高者在前"""
+        query = normalize_key(query)
+        query_grams = trigrams(query)
+        if not query_grams:
+            return [(i, 1.0) for i in self.substring(query, field)]
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self.grams.get(gram, ()))
+        texts = self._field_texts(field)
+        results = []
+        for song_id, shared in counts.items():
+            if shared / len(query_grams) < threshold:
+                continue
+            # 以欄位各自計分，避免指定欄位時被其他欄位的相符 trigram 拉高
+            score = max(len(query_grams & trigrams(column[song_id])) / len(query_grams)
+                        for column in texts)
+            if score >= threshold:
+                results.append((song_id, score))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+    def with_tags(self, tags):
+        """同時擁有所有指定 tags 的歌曲編號集合"""
+        result = None
+        for tag in sorted(tags, key=lambda t: len(self.tags.get(t, ()))):
+            ids = self.tags.get(tag, ())
+            result = set(ids) if result is None else result.intersection(ids)
+            if not result:
+                break
+        return result if result is not None else set()
+
+    def in_date_range(self, since=None, until=None):
+        """在日期範圍內（含兩端，YYYYMMDD）唱過的歌曲編號集合"""
+        lo = bisect_left(self.dates, since) if since else 0
+        hi = bisect_right(self.dates, until) if until else len(self.dates)
+        return set(self.date_song_ids[lo:hi])
+
+    def _matches(self, song_id, tags, since, until):
+        """單首歌是否符合 tags 與日期條件（文字查詢已縮小範圍時使用，比集合運算便宜）"""
+        if tags and not set(tags).issubset(self.songs[song_id]['tags']):
+            return False
+        if since or until:
+            dates = self.song_dates[song_id]
+            lo = bisect_left(dates, since) if since else 0
+            if lo >= len(dates) or (until and dates[lo] > until):
+                return False
+        return True
+
+    def search(self, text=None, field=None, fuzzy=False, tags=(), since=None, until=None, threshold=0.5):
+        """組合查詢，回傳 (編號, 分數) 列表"""
+        if text:
+            # 文字查詢通常最具選擇性，先取得結果再逐首檢查其他條件
+            if fuzzy:
+                results = self.fuzzy(text, field, threshold=threshold)
+            else:
+                results = [(i, 1.0) for i in self.substring(text, field)]
+            if tags or since or until:
+                results = [(i, score) for i, score in results if self._matches(i, tags, since, until)]
+            return results
+        candidates = None
+        if tags:
+            candidates = self.with_tags(tags)
+        if since or until:
+            in_range = self.in_date_range(since, until)
+            candidates = in_range if candidates is None else candidates & in_range
+        if candidates is None:
+            return [(i, 1.0) for i in range(len(self.songs))]
+        return [(i, 1.0) for i in sorted(candidates)]
+
+def build_index(data_path=DATA_PATH, index_path=INDEX_PATH):
+    """由 data.json 建立索引並寫入 index_path"""
+    with open(data_path, 'r', encoding='utf-8') as f:
+        songs = json.load(f)
+    index = SongIndex(songs)
+    with open(index_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return index
+
+def load_index(data_path=DATA_PATH, index_path=INDEX_PATH):
+    """載入索引；索引不存在、版本不符或比 data.json 舊時重新建立"""
+    if os.path.exists(index_path) and (
+        not os.path.exists(data_path) or os.path.getmtime(index_path) >= os.path.getmtime(data_path)
+    ):
+        with open(index_path, 'rb') as f:
+            index = pickle.load(f)
+        if getattr(index, 'version', None) == INDEX_VERSION:
+            return index
+    return build_index(data_path, index_path)
+
+def _display_width(text):
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+
+def _fit(text, width):
+    """依顯示寬度截斷並補齊空白（全形字元算兩格）"""
+    out, used = '', 0
+    for ch in text:
+        w = _display_width(ch)
+        if used + w > width:
+            break
+        out += ch
+        used += w
+    return out + ' ' * (width - used)
+
+def song_summary(song):
+    """查詢結果顯示的歌曲摘要"""
+    dates = sorted(info['date'] for info in song.get('dates', []))
+    return {
+        'song_name': song.get('song_name', ''),
+        'artist': song.get('artist', ''),
+        'source': song.get('source', ''),
+        'tags': song.get('tags') or [],
+        'times_sung': len(dates),
+        'first_date': dates[0] if dates else '',
+        'last_date': dates[-1] if dates else '',
+    }
+
+def print_results(index, results, as_json=False, limit=None):
+    shown = results[:limit] if limit else results
+    if as_json:
+        print(json.dumps([dict(index.songs[i], score=round(score, 3)) for i, score in shown],
+                         ensure_ascii=False, indent=2))
+        return
+    columns = (('song_name', 32), ('artist', 24), ('source', 24), ('times_sung', 5), ('last_date', 8))
+    print('  '.join(_fit(name, width) for name, width in columns))
+    for song_id, _ in shown:
+        summary = index.songs[song_id]
+        print('  '.join(_fit(str(summary[name]), width) for name, width in columns))
+    print(f"({len(results)} songs{', showing ' + str(len(shown)) if len(shown) < len(results) else ''})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=DATA_PATH, help='data.json 路徑')
+    parser.add_argument('--index', default=INDEX_PATH, help='索引檔路徑')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help='由 data.json 建立索引')
+
+    search = subparsers.add_parser('search', help='查詢歌曲')
+    search.add_argument('text', nargs='?', help='查詢字串（省略時只套用 tags／日期條件）')
+    search.add_argument('--field', choices=FIELDS, help='只搜尋指定欄位')
+    search.add_argument('--fuzzy', action='store_true', help='模糊搜尋（共同 trigram 比例）')
+    search.add_argument('--threshold', type=float, default=0.5, help='模糊搜尋的最低分數')
+    search.add_argument('--tag', action='append', default=[], help='必須擁有的 tag，可重複指定')
+    search.add_argument('--since', help='最早日期 YYYYMMDD')
+    search.add_argument('--until', help='最晚日期 YYYYMMDD')
+    search.add_argument('--json', action='store_true', help='以 JSON 輸出')
+    search.add_argument('--limit', type=int, default=50, help='最多顯示筆數（0 為不限）')
+    search.add_argument('-i', '--interactive', action='store_true', help='逐行從標準輸入讀取查詢字串')
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        t0 = time.perf_counter()
+        index = build_index(args.data, args.index)
+        print(f"Indexed {len(index.songs)} songs ({len(index.grams)} n-grams) "
+              f"in {time.perf_counter() - t0:.2f}s -> {args.index}")
+        return
+
+    index = load_index(args.data, args.index)
+
+    def run(text):
+        t0 = time.perf_counter()
+        results = index.search(text, args.field, args.fuzzy, args.tag, args.since, args.until, args.threshold)
+        elapsed = time.perf_counter() - t0
+        print_results(index, results, args.json, args.limit)
+        if not args.json:
+            print(f"query took {elapsed * 1000:.3f} ms", file=sys.stderr)
+
+    if args.interactive:
+        for line in sys.stdin:
+            if line.strip():
+                run(line.strip())
+    else:
+        run(args.text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""多個頻道共用的 YouTube Data API 配額與速率排程。
+
+每次 API 呼叫前以 execute(頻道名稱, request) 取得許可：
+    - 全體共用一份每日配額（單位數，list 類呼叫每次 1 單位），用完時拋出 QuotaExhausted
+    - 全體共用一個每秒請求數上限（令牌桶）
+    - 多個頻道同時等待時，先放行目前已用配額最少的頻道，避免某個頻道的大量留言頁把配額吃光
+每個頻道分別記錄呼叫次數、使用單位、等待排程與等待 API 回應的時間，供最後的報告使用。
+
+暫時性錯誤（5xx、429、速率限制、連線錯誤）以指數退避加隨機抖動重試；
+API 回報配額用完，或連續多次暫時性錯誤時，斷路器跳脫，之後所有頻道的呼叫都立刻拋出例外，
+呼叫端據此停止並保留進度，下次執行再繼續。
+"""
+import json
+import random
+import threading
+import time
+
+DAILY_QUOTA = 10000       # YouTube Data API 預設的每日配額
+REQUESTS_PER_SECOND = 10.0
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0        # 第 n 次重試前最多等待 BACKOFF_BASE * 2**n 秒（上限 BACKOFF_CAP）
+BACKOFF_CAP = 32.0
+FAILURE_THRESHOLD = 10    # 連續這麼多次暫時性錯誤（不分頻道）後斷路器跳脫
+
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'backendError'}
+
+class CircuitOpen(Exception):
+    """斷路器已跳脫，剩下的呼叫不會再送出"""
+
+class QuotaExhausted(CircuitOpen):
+    """配額已用完，剩下的呼叫不會再送出"""
+
+def error_reasons(error):
+    """googleapiclient HttpError 的錯誤原因（reason）集合"""
+    details = getattr(error, 'error_details', None)
+    if not details:
+        try:
+            content = json.loads(getattr(error, 'content', b'') or b'{}')
+            details = content.get('error', {}).get('errors', [])
+        except (ValueError, AttributeError):
+            details = []
+    if not isinstance(details, list):
+        return set()
+    return {detail.get('reason') for detail in details if isinstance(detail, dict)}
+
+def classify_error(error):
+    """'quota'（配額用完）、'transient'（可重試）或 None（其他錯誤，直接交給呼叫端）"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        reasons = error_reasons(error)
+        if reasons & QUOTA_REASONS:
+            return 'quota'
+        if int(status) in TRANSIENT_STATUSES or reasons & RATE_LIMIT_REASONS:
+            return 'transient'
+        return None
+    # 連線逾時、斷線（socket 錯誤，或 httplib2 自己的例外）
+    if isinstance(error, OSError) or type(error).__module__.startswith('httplib2'):
+        return 'transient'
+    return None
+
+class CircuitBreaker:
+    """所有頻道共用的斷路器：配額用完時立即跳脫，暫時性錯誤連續 failure_threshold 次後跳脫"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD):
+        self.failure_threshold = failure_threshold
+        self.failures = 0
+        self.reason = None
+        self.quota = False
+        self._lock = threading.Lock()
+
+    @property
+    def tripped(self):
+        return self.reason is not None
+
+    def check(self):
+        if self.reason is not None:
+            raise (QuotaExhausted if self.quota else CircuitOpen)(self.reason)
+
+    def trip(self, reason, quota=False):
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+                self.quota = quota
+                print(f"Circuit breaker tripped: {reason}")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            failures = self.failures
+        if failures >= self.failure_threshold:
+            self.trip(f"{failures} consecutive transient errors, last: {error}")
+
+class ChannelUsage:
+    """單一頻道的 API 使用統計"""
+    __slots__ = ('calls', 'units', 'retries', 'wait_seconds', 'api_seconds', 'started', 'finished')
+
+    def __init__(self):
+        self.calls = 0
+        self.units = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+        self.api_seconds = 0.0
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+class QuotaScheduler:
+    def __init__(self, quota=DAILY_QUOTA, rate=REQUESTS_PER_SECOND, clock=time.monotonic,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_cap=BACKOFF_CAP,
+                 breaker=None, sleep=time.sleep, rng=None):
+        self.quota = quota
+        self.rate = rate
+        self.clock = clock
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.used = 0
+        self.usage = {}
+        self._tokens = rate
+        self._refilled = clock()
+        self._waiting = {}  # 頻道 -> 開始等待的順序
+        self._arrivals = 0
+        self._cond = threading.Condition()
+
+    def channel(self, name):
+        """取得（必要時建立）頻道的使用統計"""
+        with self._cond:
+            return self.usage.setdefault(name, ChannelUsage())
+
+    def remaining(self):
+        return self.quota - self.used
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _next_channel(self):
+        # 已用配額最少者優先，相同時先到先得
+        return min(self._waiting, key=lambda name: (self.usage[name].units, self._waiting[name]))
+
+    def acquire(self, name, cost=1):
+        """等待輪到 name 且速率與配額允許後，扣除 cost 單位"""
+        usage = self.channel(name)
+        t0 = time.monotonic()
+        with self._cond:
+            self._arrivals += 1
+            self._waiting[name] = self._arrivals
+            try:
+                while True:
+                    self.breaker.check()
+                    if self.used + cost > self.quota:
+                        self.breaker.trip(f"quota of {self.quota} units exhausted ({self.used} used)", quota=True)
+                        self.breaker.check()
+                    self._refill()
+                    if self._next_channel() == name and self._tokens >= 1:
+                        break
+                    # 令牌不足時等到下一個令牌產生，否則等其他頻道放行後的通知
+                    self._cond.wait(max((1 - self._tokens) / self.rate, 0.001) if self._tokens < 1 else None)
+                self._tokens -= 1
+                self.used += cost
+                usage.units += cost
+                usage.calls += 1
+            finally:
+                del self._waiting[name]
+                self._cond.notify_all()
+        usage.wait_seconds += time.monotonic() - t0
+
+    def backoff(self, attempt, error=None):
+        """第 attempt 次重試前的等待秒數：full jitter 指數退避，伺服器有 Retry-After 時至少等那麼久"""
+        delay = self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        resp = getattr(error, 'resp', None)
+        retry_after = resp.get('retry-after') if isinstance(resp, dict) else None
+        if retry_after and str(retry_after).isdigit():
+            delay = max(delay, min(self.backoff_cap, float(retry_after)))
+        return delay
+
+    def execute(self, name, request, cost=1):
+        """取得許可後執行 googleapiclient 的 request，回傳 response；暫時性錯誤自動重試（每次重試都計入配額）"""
+        usage = self.channel(name)
+        for attempt in range(self.max_retries + 1):
+            self.acquire(name, cost)
+            t0 = time.monotonic()
+            try:
+                response = request.execute()
+            except Exception as e:
+                usage.api_seconds += time.monotonic() - t0
+                kind = classify_error(e)
+                if kind == 'quota':
+                    self.breaker.trip(f"API reported quota exhausted: {e}", quota=True)
+                    raise QuotaExhausted(self.breaker.reason) from e
+                if kind != 'transient':
+                    raise
+                self.breaker.record_failure(e)
+                if attempt == self.max_retries or self.breaker.tripped:
+                    raise
+                delay = self.backoff(attempt, e)
+                usage.retries += 1
+                print(f"[{name}] transient error ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            else:
+                usage.api_seconds += time.monotonic() - t0
+                self.breaker.record_success()
+                return response
+            self.sleep(delay)
+
+    def report_rows(self):
+        """[(頻道, 呼叫次數, 單位, 重試次數, 總時間, 排程等待, API 時間)]"""
+        return [(name, usage.calls, usage.units, usage.retries, usage.elapsed, usage.wait_seconds, usage.api_seconds)
+                for name, usage in self.usage.items()]
+
+    def print_report(self, extra=None):
+        """列出每個頻道的時間與配額使用；extra 為 {頻道: 附加說明}"""
+        extra = extra or {}
+        print(f"{'channel':<20}{'calls':>7}{'units':>7}{'retries':>9}{'total (s)':>11}{'queued (s)':>12}{'api (s)':>9}")
+        for name, calls, units, retries, elapsed, waited, api in self.report_rows():
+            print(f"{name:<20}{calls:>7}{units:>7}{retries:>9}{elapsed:>11.1f}{waited:>12.1f}{api:>9.1f}"
+                  f"  {extra.get(name, '')}")
+        print(f"quota: {self.used} of {self.quota} units used, {self.remaining()} remaining")
+        if self.breaker.tripped:
+            print(f"stopped early: {self.breaker.reason}")
@@ -0,0 +1,150 @@
+"""建置時預先計算的讀音與排序鍵：假名讀音鍵、羅馬拼音搜尋字串、字元類型排序權重。
+
+網頁原本在載入時對每首歌呼叫 normalizeString()（js/romaji.js 的 convert_jp），
+排序時再反覆呼叫 getCharacterType()／getJapaneseSortKey()。這裡以相同規則在建置時算好，
+寫出 data/readings.json（欄位陣列，順序同 data.json）：
+    format    格式版本
+    weights   字元類型 -> 排序權重（同 getSortWeight）
+    reading   假名讀音鍵：headers.txt 的首字分類（az），沒有分類時為曲名首字（片假名轉為平假名）
+    weight    曲名首字的字元類型權重
+    search    曲名、歌手、所有出典寫法各自 normalizeString 後以換行串接；
+              搜尋字串經正規化後不含空白，對 search 做一次 includes 即等於分別比對三個欄位
+
+羅馬拼音表直接讀取 js/romaji.js，不在 Python 另外維護一份。歌手與出典寫法大量重複，
+轉換結果以 lru_cache 快取。
+
+    python backend/readings.py "ハルジオン" "千本桜"     # 顯示字串的讀音鍵與搜尋字串
+"""
+import argparse
+import functools
+import re
+import unicodedata
+
+import output_writer
+
+READINGS_FORMAT = 1
+ROMAJI_TABLE_PATH = 'js/romaji.js'
+
+# 同 js/form-generation.js 的字元類型判定
+SYMBOL_CHARS = frozenset('!@#$%^&*()_+-=[]{};\':"\\|,.<>/?～！＠＃＄％＾＆＊（）＿＋－＝［］｛｝；＇："＼｜，．＜＞／？〜∞→←↑↓')
+SORT_WEIGHTS = {'symbol': 0, 'number': 1, 'english': 2, 'japanese': 3, 'other': 4}
+
+_TABLE_ENTRY = re.compile(r"'([a-z]+)'\s*:\s*'([^']+)'")
+_KATAKANA = re.compile(r'[\u30A1-\u30F6]')
+_HAS_KANA = re.compile(r'[\u3040-\u30FF]')
+_UNSAFE = re.compile(r'[<>&\'"\x00-\x1F\x7F]')
+_CV = re.compile(r'\(cv\.(.*?)\)', re.IGNORECASE)
+_TILDE = re.compile(r'[~\u301c\uff5e]')
+# JavaScript 的 \s 另外包含 BOM（U+FEFF），Python 的 \s 沒有
+_WHITESPACE = re.compile(r'[\s\ufeff]+')
+_NON_SPACE = re.compile(r'[^\s\ufeff]')
+
+@functools.lru_cache(maxsize=None)
+def load_romaji_table(path=ROMAJI_TABLE_PATH):
+    """讀取 romaji.js 的 romajiToHiragana，回傳反向的 平假名 -> 羅馬拼音 對照表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    start = source.index('romajiToHiragana')
+    body = source[start:source.index('};', start)]
+    reverse = {}
+    for romaji, hiragana in _TABLE_ENTRY.findall(body):
+        reverse[hiragana] = romaji  # 同 JS：後出現的寫法覆蓋先出現的
+    if not reverse:
+        raise ValueError(f"no romaji table found in {path}")
+    return reverse
+
+def katakana_to_hiragana(text):
+    return _KATAKANA.sub(lambda m: chr(ord(m.group()) - 0x60), text)
+
+@functools.lru_cache(maxsize=None)
+def convert_jp(text):
+    """片假名轉平假名後轉羅馬拼音（同 convert_jp：先試兩個字的拗音，再試單字，查不到保留原字）"""
+    reverse = load_romaji_table()
+    hiragana = katakana_to_hiragana(text)
+    result = []
+    i = 0
+    while i < len(hiragana):
+        pair = hiragana[i:i + 2]
+        if len(pair) == 2 and pair in reverse:
+            result.append(reverse[pair])
+            i += 2
+        else:
+            result.append(reverse.get(hiragana[i], hiragana[i]))
+            i += 1
+    return ''.join(result)
+
+@functools.lru_cache(maxsize=None)
+def normalize_string(text):
+    """同網頁的 normalizeString()：去除危險字元、假名轉羅馬拼音、NFKC、去空白、轉小寫"""
+    if not text:
+        return ''
+    text = _UNSAFE.sub('', text)
+    if _HAS_KANA.search(text):
+        text = convert_jp(text)
+    text = _CV.sub(r'(\1)', text)
+    text = unicodedata.normalize('NFKC', text)
+    text = _TILDE.sub('~', text).replace('，', ',').replace('。', '.').replace('…', '...')
+    return _WHITESPACE.sub('', text).lower()
+
+def character_type(text):
+    """同 getCharacterType()：依去除前後空白後的首字判定"""
+    match = _NON_SPACE.search(text or '')
+    if not match:
+        return 'other'
+    first = match.group()
+    if first in SYMBOL_CHARS:
+        return 'symbol'
+    if 'a' <= first <= 'z' or 'A' <= first <= 'Z':
+        return 'english'
+    if '0' <= first <= '9' or '０' <= first <= '９':
+        return 'number'
+    return 'japanese'
+
+def reading_key(song_name, az):
+    """假名讀音鍵：首字分類（az）優先，否則為曲名首字（同 getJapaneseSortKey，片假名統一成平假名）"""
+    if az:
+        return az
+    return katakana_to_hiragana(song_name[:1]) if song_name else ''
+
+def song_readings(song):
+    """單首歌的 (讀音鍵, 排序權重, 搜尋字串)"""
+    search = '\n'.join((normalize_string(song.song_name or ''), normalize_string(song.artist or ''),
+                        normalize_string('|'.join(song.sources))))
+    return (reading_key(song.song_name, song.az),
+            SORT_WEIGHTS[character_type(song.song_name)],
+            search)
+
+def compute_readings(songs):
+    """由 Song 列表（data.json 順序）計算讀音資料，回傳可直接序列化的 dict"""
+    readings, weights, searches = [], [], []
+    for song in songs:
+        reading, weight, search = song_readings(song)
+        readings.append(reading)
+        weights.append(weight)
+        searches.append(search)
+    return {
+        'format': READINGS_FORMAT,
+        'weights': SORT_WEIGHTS,
+        'reading': readings,
+        'weight': weights,
+        'search': searches,
+    }
+
+def write_readings(songs, output_path):
+    """寫出 readings.json，回傳讀音資料"""
+    readings = compute_readings(songs)
+    output_writer.write_json(output_path, readings, separators=(',', ':'))
+    info = normalize_string.cache_info()
+    print(f"Readings for {len(songs)} songs -> {output_path} "
+          f"({info.currsize} distinct strings normalized, {info.hits} cache hits)")
+    return readings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('text', nargs='+', help='要轉換的字串')
+    args = parser.parse_args()
+    for text in args.text:
+        print(f"{text}\t{character_type(text)}\t{reading_key(text, None)}\t{normalize_string(text)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""每場直播的歌單索引：依日期或影片 ID 直接查出一場直播依序唱了哪些歌。
+
+data.json 以歌曲為單位，要知道某天唱了什麼，網頁得把每首歌的 dates 陣列反過來查一遍；
+合併後各歌單原本的演唱順序也不見了。建置時改由每筆演唱紀錄的 Appearance.position（歌單檔名, 行號）
+還原順序，寫出 data/setlists.json：
+    format    格式版本
+    dates     有直播的日期（遞增、不重複），範圍查詢以二分搜尋找出區間
+    offsets   dates[i] 的直播為 streams[offsets[i]:offsets[i + 1]]（長度為 len(dates) + 1）
+    streams   直播列表，依日期排列，同一天依歌單檔名（YYYYMMDD.txt、YYYYMMDD_2.txt …）；
+              前後一場即相鄰的位置。每場為：
+                date      日期
+                video_id  影片 ID
+                songs     依演唱順序的歌曲編號（即該歌在 data.json 中的位置）
+                seconds   各曲的開始秒數
+                flags     各曲的標記位元：FLAG_MEMBER_EXCLUSIVE、FLAG_ACAPELLA、FLAG_PRIVATE
+    videos    影片 ID -> 該影片在 streams 的位置列表（通常只有一場）
+沒有 position 的紀錄（例如合成的測試資料）依秒數排列。
+
+    python backend/setlists.py 20250809                # 該日的歌單
+    python backend/setlists.py 20250101 20250331       # 區間內的直播
+    python backend/setlists.py --video VIDEO_ID        # 指定影片，並列出前後一場
+"""
+import argparse
+import bisect
+import json
+import os
+
+import output_writer
+from process_timeline import ARTIFACT_DIR
+
+SETLISTS_FORMAT = 1
+SETLISTS_PATH = os.path.join(ARTIFACT_DIR, 'setlists.json')
+
+FLAG_MEMBER_EXCLUSIVE = 1
+FLAG_ACAPELLA = 2
+FLAG_PRIVATE = 4
+
+def appearance_flags(appearance):
+    return ((FLAG_MEMBER_EXCLUSIVE if appearance.is_member_exclusive else 0)
+            | (FLAG_ACAPELLA if appearance.is_acapella else 0)
+            | (FLAG_PRIVATE if appearance.is_private else 0))
+
+def _order(appearance):
+    # 歌單檔名與行號；沒有 position 時退回秒數
+    return appearance.position or ('', appearance.seconds)
+
+def build_setlists(songs):
+    """由 Song 列表（data.json 順序）建立歌單索引，回傳可直接序列化的 dict"""
+    groups = {}
+    for song_id, song in enumerate(songs):
+        for appearance in song.dates:
+            groups.setdefault((appearance.date, appearance.video_id), []).append(
+                (_order(appearance), song_id, appearance))
+
+    for entries in groups.values():
+        entries.sort(key=lambda entry: entry[:2])
+    ordered = sorted(groups.items(), key=lambda item: (item[0][0], item[1][0][0]))
+
+    dates, offsets, streams, videos = [], [], [], {}
+    for (date, video_id), entries in ordered:
+        if not dates or dates[-1] != date:
+            dates.append(date)
+            offsets.append(len(streams))
+        videos.setdefault(video_id, []).append(len(streams))
+        streams.append({
+            'date': date,
+            'video_id': video_id,
+            'songs': [song_id for _, song_id, _ in entries],
+            'seconds': [appearance.seconds for _, _, appearance in entries],
+            'flags': [appearance_flags(appearance) for _, _, appearance in entries],
+        })
+    offsets.append(len(streams))
+    return {'format': SETLISTS_FORMAT, 'dates': dates, 'offsets': offsets, 'streams': streams, 'videos': videos}
+
+def streams_between(setlists, start, end):
+    """日期在 [start, end]（YYYYMMDD，含兩端）之間的直播位置"""
+    dates, offsets = setlists['dates'], setlists['offsets']
+    first = bisect.bisect_left(dates, start)
+    last = bisect.bisect_right(dates, end)
+    return range(offsets[first], offsets[last])
+
+def streams_on(setlists, date):
+    return streams_between(setlists, date, date)
+
+def write_setlists(songs, output_path=SETLISTS_PATH):
+    """寫出 setlists.json，回傳索引"""
+    setlists = build_setlists(songs)
+    output_writer.write_json(output_path, setlists, separators=(',', ':'))
+    streams = setlists['streams']
+    print(f"Setlists: {len(streams)} streams on {len(setlists['dates'])} dates, "
+          f"{sum(len(stream['songs']) for stream in streams)} entries -> {output_path}")
+    return setlists
+
+def _print_stream(setlists, index, names):
+    stream = setlists['streams'][index]
+    print(f"#{index}  {stream['date']}  https://www.youtube.com/watch?v={stream['video_id']}")
+    for song_id, seconds, flags in zip(stream['songs'], stream['seconds'], stream['flags']):
+        marks = ''.join(mark for bit, mark in ((FLAG_MEMBER_EXCLUSIVE, 'M'), (FLAG_ACAPELLA, 'A'), (FLAG_PRIVATE, 'P'))
+                        if flags & bit)
+        hours, rest = divmod(seconds, 3600)
+        print(f"  {hours:02d}:{rest // 60:02d}:{rest % 60:02d}  {names[song_id]}" + (f"  [{marks}]" if marks else ''))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dates', nargs='*', metavar='YYYYMMDD', help='一個日期，或起訖兩個日期')
+    parser.add_argument('--video', help='影片 ID')
+    parser.add_argument('--data', default='data.json', help='歌曲資料（data.json，用來顯示曲名）')
+    parser.add_argument('--setlists', default=SETLISTS_PATH)
+    args = parser.parse_args()
+    if len(args.dates) > 2 or bool(args.dates) == bool(args.video):
+        parser.error('give one date, a date range, or --video')
+
+    with open(args.setlists, 'r', encoding='utf-8') as f:
+        setlists = json.load(f)
+    with open(args.data, 'r', encoding='utf-8') as f:
+        names = [f"{entry['song_name']} / {entry['artist']}" for entry in json.load(f)]
+
+    if args.video:
+        for index in setlists['videos'].get(args.video, []):
+            _print_stream(setlists, index, names)
+            neighbours = [f"{label} #{i} {setlists['streams'][i]['date']} {setlists['streams'][i]['video_id']}"
+                          for label, i in (('previous', index - 1), ('next', index + 1))
+                          if 0 <= i < len(setlists['streams'])]
+            print('  ' + ', '.join(neighbours))
+        return
+    for index in streams_between(setlists, args.dates[0], args.dates[-1]):
+        _print_stream(setlists, index, names)
+
+if __name__ == '__main__':
+    main()
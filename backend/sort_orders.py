@@ -0,0 +1,231 @@
+"""每個可排序欄位預先排好的順序：網頁切換排序時只需依索引重排，不必再比較字串。
+
+網頁的 sortData() 每次點表頭都以 normalizeString() 當比較函式排序整份資料；
+這裡在建置時依同樣的規則排好，寫出 data/orders.json：
+    format    格式版本
+    songs     歌曲總數
+    columns   欄位 -> {"asc": [...], "desc": [...]}，各為 data.json 中的歌曲編號
+                song_name   預設排序：字元類型權重 → 首字分類 → 曲名（localeCompare('ja-JP')）
+                az          首字分類（getJapaneseSortKey）
+                artist      normalizeString(歌手)
+                source      normalizeString(主出典)
+                dates       第一筆演唱日期（網頁「日期」欄）
+                last_date   最近一次演唱日期
+                times_sung  演唱次數
+網頁的 sort 是穩定排序，且總是先套用預設排序，其他欄位值相同的歌曲維持預設排序的先後，
+降冪時也一樣（不是把升冪整個倒過來）。預設排序在網頁上沒有降冪，desc 直接倒轉 asc。
+篩選後只要依序保留符合條件的編號，順序即正確，不需重新排序。
+
+localeCompare('ja-JP') 以 collation_key() 近似 ICU 的日文排序（符號 → 數字 → 拉丁字母 → 假名 → 漢字
+（JIS X 0208 順序）→ 其他文字，再依濁音、大小寫等次要差異比較）。建置時會逐一檢查相鄰兩首歌符合
+比較規則。與網頁實際排出的順序是否相同，由 tests/test_sort_orders.py 以 node 直接執行
+js/form-generation.js 的比較函式核對（建置本身不讀取網頁的 JS 原始碼）。
+
+    python backend/sort_orders.py --column artist --desc --limit 20
+"""
+import argparse
+import functools
+import json
+import os
+import unicodedata
+
+import output_writer
+from process_timeline import select_best_source
+from readings import SORT_WEIGHTS, character_type, load_romaji_table, normalize_string
+
+ORDERS_FORMAT = 1
+
+# ICU 日文排序中的空白、標點與符號順序（以 Intl.Collator('ja-JP') 排出），全形寫法以 NFKC 對應
+PUNCTUATION_ORDER = (
+    ' ‾_‗-‐‑‒–—―⁓〜〰・,、;⁏:!‼⁉¡?⁈⁇¿‽.․‥…。·⁕⁖⁘⁙⁚⁛⁜⁝⁞\'‘’‚‛‹›"“”„‟'
+    '〝〞〟«»()[]{}⁅⁆〈〉《》「」『』【】〔〕〖〗〘〙〚〛‖§¶⁋@*⁎⁑/\\&⁊#%‰‱†‡•‣‧⁃⁌⁍′'
+    '″‴⁗‵‶‷〃‸※‿⁔⁀⁐⁁⁂`´^¯¨¸°©®←→↑↓↔↕↖↗↘↙⇒⇔∀∂∇∈∋+±÷×<=≠>¬|¦~⁒⁄√'
+    '∞∠∧∨∩∪∴∵≒≡≦≧⊥⌒■□▲△▼▽◆◇○◎●★☆♀♂♠♡♢♣♤♥♦♧♪♫♬♭♯〄〒〓々ーｰ¤¢$£¥'
+)
+_PUNCTUATION_RANK = {ch: rank for rank, ch in enumerate(PUNCTUATION_ORDER)}
+
+# 主要排序群組
+SYMBOL, DIGIT, LATIN, KANA, HAN, OTHER = range(6)
+
+_SMALL_KANA = {small: large for small, large in zip('ぁぃぅぇぉっゃゅょゎゕゖ', 'あいうえおつやゆよわかけ')}
+_VOICING_MARKS = {'゙': 1, '゚': 2}
+_LONG_VOWEL_MARKS = 'ーｰ'
+_VOWELS = {'a': 'あ', 'i': 'い', 'u': 'う', 'e': 'え', 'o': 'お', 'n': 'ん'}
+
+@functools.lru_cache(maxsize=None)
+def _vowel_of(kana):
+    """長音符號延長的母音（依 romaji.js 的拼音最後一個字母）"""
+    romaji = load_romaji_table().get(kana, '')
+    return _VOWELS.get(romaji[-1:], kana)
+
+def _han_rank(ch):
+    # JIS X 0208 的漢字（EUC-JP 兩位元組、第 16 區以後）依 JIS 順序，其餘依碼位排在後面
+    try:
+        encoded = ch.encode('euc_jp')
+    except UnicodeEncodeError:
+        encoded = b''
+    if len(encoded) == 2 and encoded[0] >= 0xB0:
+        return encoded[0] << 8 | encoded[1]
+    return 0x10000 + ord(ch)
+
+@functools.lru_cache(maxsize=None)
+def collation_key(text):
+    """近似 localeCompare(…, 'ja-JP') 的排序鍵：(主要差異, 次要差異（濁音、重音）, 第三差異（大小寫、小假名、全半形）)"""
+    primaries, secondaries, tertiaries = [], [], []
+
+    def emit(primary, secondary=0, tertiary=0):
+        primaries.append(primary)
+        secondaries.append(secondary)
+        tertiaries.append(tertiary)
+
+    previous_kana = None
+    for ch in text:
+        if ch in _LONG_VOWEL_MARKS and previous_kana:
+            # 假名後的長音符號視為重複前一個假名的母音（カー 與 カア 只有第三差異）
+            emit((KANA, ord(_vowel_of(previous_kana))), 0, 1)
+            continue
+        if ch in _PUNCTUATION_RANK:
+            emit((SYMBOL, _PUNCTUATION_RANK[ch]))
+            previous_kana = None
+            continue
+        folded = unicodedata.normalize('NFKC', ch)
+        compat = int(folded != ch)
+        if folded in _PUNCTUATION_RANK:
+            emit((SYMBOL, _PUNCTUATION_RANK[folded]), 0, compat)
+            previous_kana = None
+            continue
+        previous_kana = None
+        for base_char in folded:
+            decomposed = unicodedata.normalize('NFD', base_char)
+            base, marks = decomposed[0], decomposed[1:]
+            if 'ァ' <= base <= 'ヶ':
+                base = chr(ord(base) - 0x60)
+            if 'ぁ' <= base <= 'ゖ':
+                large = _SMALL_KANA.get(base, base)
+                emit((KANA, ord(large)), sum(_VOICING_MARKS.get(mark, 0) for mark in marks),
+                     compat + (2 if large == base else 0))
+                previous_kana = large
+            elif base.isdecimal():
+                emit((DIGIT, unicodedata.decimal(base)), 0, compat)
+            elif base.isalpha() and unicodedata.name(base, '').startswith('LATIN'):
+                secondary = sum(ord(mark) for mark in marks)
+                tertiary = compat + (2 if base.isupper() else 0)
+                for letter in base.casefold():
+                    emit((LATIN, ord(letter)), secondary, tertiary)
+            elif unicodedata.name(base, '').startswith('CJK'):
+                emit((HAN, _han_rank(base)), 0, compat)
+            elif base.isalpha():
+                emit((OTHER, ord(base.lower())), sum(ord(mark) for mark in marks),
+                     compat + (2 if base.isupper() else 0))
+            elif not unicodedata.category(base).startswith(('M', 'C')):
+                emit((SYMBOL, len(PUNCTUATION_ORDER) + ord(base)), 0, compat)
+    return tuple(primaries), tuple(secondaries), tuple(tertiaries)
+
+def locale_compare(a, b):
+    """collation_key 版的 localeCompare：回傳 -1、0、1"""
+    key_a, key_b = collation_key(a), collation_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+def code_unit_key(text):
+    """JavaScript 以 > < 比較字串時的順序（UTF-16 碼元），與 Python 的碼位順序在補充平面字元上不同"""
+    return text.encode('utf-16-be')
+
+def japanese_sort_key(song):
+    """同 getJapaneseSortKey()"""
+    return song.az or (song.song_name or '')[:1]
+
+def column_values(songs):
+    """各欄位的比較值，順序同 songs"""
+    return {
+        'az': [code_unit_key(japanese_sort_key(song)) for song in songs],
+        'artist': [code_unit_key(normalize_string(song.artist or '')) for song in songs],
+        'source': [code_unit_key(normalize_string(select_best_source(list(song.sources)))) for song in songs],
+        'dates': [song.dates[0].date if song.dates else '0' for song in songs],
+        'last_date': [max(appearance.date for appearance in song.dates) if song.dates else '0' for song in songs],
+        'times_sung': [len(song.dates) for song in songs],
+    }
+
+def default_sort_key(song):
+    """網頁預設排序（applyFilters 中的比較函式）的排序鍵"""
+    kind = character_type(song.song_name)
+    reading = collation_key(japanese_sort_key(song)) if kind == 'japanese' else ()
+    return SORT_WEIGHTS[kind], reading, collation_key(song.song_name or '')
+
+def compute_orders(songs):
+    """回傳 {欄位: {'asc': 編號列表, 'desc': 編號列表}}"""
+    default_order = sorted(range(len(songs)), key=lambda i: default_sort_key(songs[i]))
+    columns = {'song_name': {'asc': default_order, 'desc': default_order[::-1]}}
+    for column, values in column_values(songs).items():
+        # Python 的 sorted 同樣是穩定排序，reverse=True 也保留相同值的原有先後
+        columns[column] = {
+            'asc': sorted(default_order, key=values.__getitem__),
+            'desc': sorted(default_order, key=values.__getitem__, reverse=True),
+        }
+    return columns
+
+def _compare_default(a, b):
+    """逐步套用網頁預設排序的比較規則（與 default_sort_key 分開實作，作為交叉檢查）"""
+    kind_a, kind_b = character_type(a.song_name), character_type(b.song_name)
+    diff = SORT_WEIGHTS[kind_a] - SORT_WEIGHTS[kind_b]
+    if diff:
+        return diff
+    if kind_a == 'japanese' and kind_b == 'japanese':
+        diff = locale_compare(japanese_sort_key(a), japanese_sort_key(b))
+        if diff:
+            return diff
+    return locale_compare(a.song_name or '', b.song_name or '')
+
+def verify_orders(songs, columns):
+    """檢查每個排列都是完整的排列，且相鄰兩首歌符合該欄位的比較規則（相同值時維持預設排序的先後）；
+    回傳問題描述列表"""
+    problems = []
+    size = len(songs)
+    for column, orders in columns.items():
+        for direction, order in orders.items():
+            if sorted(order) != list(range(size)):
+                problems.append(f"{column}/{direction} is not a permutation of {size} songs")
+    default_order = columns['song_name']['asc']
+    for a, b in zip(default_order, default_order[1:]):
+        if _compare_default(songs[a], songs[b]) > 0:
+            problems.append(f"song_name: {songs[a].song_name} sorted before {songs[b].song_name}")
+    rank = {song_id: position for position, song_id in enumerate(default_order)}
+    for column, values in column_values(songs).items():
+        for direction, sign in (('asc', 1), ('desc', -1)):
+            order = columns[column][direction]
+            for a, b in zip(order, order[1:]):
+                if sign * ((values[a] > values[b]) - (values[a] < values[b])) > 0 \
+                        or values[a] == values[b] and rank[a] > rank[b]:
+                    problems.append(f"{column}/{direction}: song {a} sorted before song {b}")
+                    break
+    return problems
+
+def write_orders(songs, output_path):
+    """寫出 orders.json 並檢查排序結果，回傳各欄位的順序"""
+    columns = compute_orders(songs)
+    problems = verify_orders(songs, columns)
+    for problem in problems[:10]:
+        print(f"Error: {problem}")
+    output_writer.write_json(output_path, {'format': ORDERS_FORMAT, 'songs': len(songs), 'columns': columns},
+                             separators=(',', ':'))
+    print(f"Sort orders for {len(columns)} columns over {len(songs)} songs -> {output_path}")
+    return columns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', default=os.path.join('data', 'orders.json'), help='orders.json 路徑')
+    parser.add_argument('--data', default='data.json', help='顯示曲名用的 data.json')
+    parser.add_argument('--column', default='song_name', help='排序欄位')
+    parser.add_argument('--desc', action='store_true', help='降冪')
+    parser.add_argument('--limit', type=int, default=50, help='顯示筆數')
+    args = parser.parse_args()
+
+    with open(args.orders, 'r', encoding='utf-8') as f:
+        orders = json.load(f)
+    with open(args.data, 'r', encoding='utf-8') as f:
+        songs = json.load(f)
+    for song_id in orders['columns'][args.column]['desc' if args.desc else 'asc'][:args.limit]:
+        song = songs[song_id]
+        print(f"{song['song_name']} / {song['artist']} / {song['source']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""預先計算的歌曲統計：演唱次數、首次與最近演唱日、每年次數，以及歌手、出典的彙總。
+
+建置時把所有演唱紀錄攤平成一張「演唱紀錄表」（歌曲編號、日期兩個整數欄位），
+一次分組彙總後寫出 data/stats.json，網頁不必再逐首掃過 dates 陣列：
+    format          格式版本
+    years           per_year 各欄對應的年份
+    songs           以 data.json 順序排列的欄位陣列：times_sung、first_date、last_date、per_year
+    totals          全部演唱紀錄數、直播場數，以及每年的演唱次數、歌曲數與新歌數
+    artists         依演唱次數排序的歌手彙總（以 normalize_key 合併寫法）
+    sources         依演唱次數排序的出典彙總（以顯示用的主出典分組，空白出典不列入）
+
+有安裝 NumPy 時以 bincount／ufunc.at 向量化彙總，否則使用結果相同的純 Python 迴圈。
+"""
+from array import array
+
+import output_writer
+from process_timeline import normalize_key, select_best_source
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STATS_FORMAT = 1
+
+def appearance_table(songs):
+    """把 Song 列表攤平成演唱紀錄表：(歌曲編號欄, 日期欄 YYYYMMDD 整數, 直播場數)"""
+    song_ids = array('I')
+    dates = array('I')
+    streams = set()
+    date_values = {}  # 日期字串 -> 整數（同一天的紀錄很多，只轉換一次）
+    for song_id, song in enumerate(songs):
+        song_ids.extend([song_id] * len(song.dates))
+        for appearance in song.dates:
+            day = appearance.date
+            dates.append(date_values[day] if day in date_values else date_values.setdefault(day, int(day)))
+            streams.add((day, appearance.video_id))
+    return song_ids, dates, len(streams)
+
+def _aggregate_python(keys, dates, size, first_year, n_years):
+    counts = [0] * size
+    first = [0] * size
+    last = [0] * size
+    per_year = [[0] * n_years for _ in range(size)]
+    for key, date in zip(keys, dates):
+        if not counts[key] or date < first[key]:
+            first[key] = date
+        if date > last[key]:
+            last[key] = date
+        counts[key] += 1
+        per_year[key][date // 10000 - first_year] += 1
+    return counts, first, last, per_year
+
+def _aggregate_numpy(keys, dates, size, first_year, n_years):
+    if isinstance(keys, array):
+        keys = np.frombuffer(keys, dtype=np.uint32)
+    keys = keys.astype(np.intp)
+    dates = np.frombuffer(dates, dtype=np.uint32).astype(np.int64)
+    counts = np.bincount(keys, minlength=size)
+    first = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, keys, dates)
+    last = np.zeros(size, dtype=np.int64)
+    np.maximum.at(last, keys, dates)
+    first[counts == 0] = 0
+    cells = keys * n_years + (dates // 10000 - first_year)
+    per_year = np.bincount(cells, minlength=size * n_years).reshape(size, n_years)
+    return counts.tolist(), first.tolist(), last.tolist(), per_year.tolist()
+
+def aggregate(keys, dates, size, first_year, n_years, use_numpy=None):
+    """依 keys 分組彙總日期欄：回傳 (次數, 最早日期, 最晚日期, 每年次數)，各為長度 size 的列表"""
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _aggregate_numpy(keys, dates, size, first_year, n_years)
+    return _aggregate_python(keys, dates, size, first_year, n_years)
+
+def _merge_song_stats(group_of_song, size, song_stats):
+    """純 Python 版的分組：直接合併各歌曲的結果（相加、取最小／最大值），不必再掃一次演唱紀錄表"""
+    counts, first, last, per_year = song_stats
+    n_years = len(per_year[0]) if per_year else 0
+    group_counts = [0] * size
+    group_first = [0] * size
+    group_last = [0] * size
+    group_per_year = [[0] * n_years for _ in range(size)]
+    for song_id, group in enumerate(group_of_song):
+        if not counts[song_id]:
+            continue
+        if not group_counts[group] or first[song_id] < group_first[group]:
+            group_first[group] = first[song_id]
+        group_last[group] = max(group_last[group], last[song_id])
+        group_counts[group] += counts[song_id]
+        group_per_year[group] = [a + b for a, b in zip(group_per_year[group], per_year[song_id])]
+    return group_counts, group_first, group_last, group_per_year
+
+def _rollup(labels, names, song_stats, song_ids, dates, first_year, n_years, use_numpy):
+    """以每首歌的分組標籤（已正規化）彙總；names 為每首歌該分組的顯示名稱，空白者不列入"""
+    group_ids = {}
+    group_of_song = [group_ids.setdefault(label, len(group_ids)) for label in labels]
+    size = len(group_ids)
+    display = [''] * size
+    song_counts = [0] * size
+    for song_id, group in enumerate(group_of_song):
+        if song_stats[0][song_id]:
+            display[group] = display[group] or names[song_id]
+            song_counts[group] += 1
+
+    if use_numpy:
+        # 每筆演唱紀錄的分組編號 = 分組對照表[歌曲編號]，再以同一個向量化彙總處理
+        keys = np.asarray(group_of_song, dtype=np.intp)[np.frombuffer(song_ids, dtype=np.uint32)]
+        counts, first, last, per_year = _aggregate_numpy(keys, dates, size, first_year, n_years)
+    else:
+        counts, first, last, per_year = _merge_song_stats(group_of_song, size, song_stats)
+
+    rows = [{
+        'name': display[group],
+        'songs': song_counts[group],
+        'times_sung': counts[group],
+        'first_date': str(first[group]),
+        'last_date': str(last[group]),
+        'per_year': per_year[group],
+    } for group in range(size) if display[group]]
+    rows.sort(key=lambda row: (-row['times_sung'], row['name']))
+    return rows
+
+def compute_stats(songs, use_numpy=None):
+    """由 Song 列表（data.json 順序）計算統計資料，回傳可直接序列化的 dict"""
+    song_ids, dates, stream_count = appearance_table(songs)
+    if dates:
+        first_year, last_year = min(dates) // 10000, max(dates) // 10000
+    else:
+        first_year = last_year = 0
+    n_years = last_year - first_year + 1 if dates else 0
+
+    if use_numpy is None:
+        use_numpy = np is not None
+    song_stats = aggregate(song_ids, dates, len(songs), first_year, n_years, use_numpy)
+    counts, first, last, per_year = song_stats
+
+    year_appearances = [0] * n_years
+    year_songs = [0] * n_years
+    year_new_songs = [0] * n_years
+    for song_id, histogram in enumerate(per_year):
+        for year, count in enumerate(histogram):
+            if count:
+                year_appearances[year] += count
+                year_songs[year] += 1
+        if counts[song_id]:
+            year_new_songs[first[song_id] // 10000 - first_year] += 1
+
+    # 歌手直接使用 Song 的正規化鍵；出典寫法大量重複，正規化結果依字串快取
+    artists = [song.artist for song in songs]
+    sources = [select_best_source(list(song.sources)) for song in songs]
+    normalized_sources = {}
+    source_labels = [normalized_sources[source] if source in normalized_sources
+                     else normalized_sources.setdefault(source, normalize_key(source)) for source in sources]
+    return {
+        'format': STATS_FORMAT,
+        'years': list(range(first_year, last_year + 1)) if dates else [],
+        'songs': {
+            'times_sung': counts,
+            'first_date': [str(date) if date else '' for date in first],
+            'last_date': [str(date) if date else '' for date in last],
+            'per_year': per_year,
+        },
+        'totals': {
+            'songs': len(songs),
+            'appearances': len(dates),
+            'streams': stream_count,
+            'per_year_appearances': year_appearances,
+            'per_year_songs': year_songs,
+            'per_year_new_songs': year_new_songs,
+        },
+        'artists': _rollup([song.key[1] for song in songs], artists, song_stats,
+                           song_ids, dates, first_year, n_years, use_numpy),
+        'sources': _rollup(source_labels, sources, song_stats,
+                           song_ids, dates, first_year, n_years, use_numpy),
+    }
+
+def write_stats(songs, output_path):
+    """寫出 stats.json，回傳統計資料"""
+    stats = compute_stats(songs)
+    output_writer.write_json(output_path, stats, separators=(',', ':'))
+    top = stats['artists'][0] if stats['artists'] else None
+    print(f"Stats for {len(songs)} songs / {stats['totals']['appearances']} appearances -> {output_path} "
+          f"({'NumPy' if np is not None else 'pure Python'})"
+          + (f", most sung artist: {top['name']} ({top['times_sung']})" if top else ''))
+    return stats
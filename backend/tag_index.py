@@ -0,0 +1,175 @@
+"""tags 的預先計算索引：每個 tag 對應一組歌曲編號，加上 tag 兩兩同時出現的次數。
+
+建置時寫出 data/tags.json，歌曲編號即該歌在 data.json 中的位置：
+    format        格式版本
+    songs         歌曲總數
+    tags          tag 名稱（依歌曲數多到少）
+    counts        各 tag 的歌曲數
+    sets          各 tag 的歌曲集合，取較小的一種寫法：
+                    {"ids": [...]}      遞增的歌曲編號
+                    {"bitmap": "..."}   base64 位元圖，第 i 個位元（little-endian）代表第 i 首歌
+    cooccurrence  cooccurrence[a][b] = 同時有 tags[a] 與 tags[b] 的歌曲數（對角線即 counts）
+
+AND／OR 篩選因此變成集合運算，側欄的 tag 計數也不必掃過整份資料。
+TagIndex 是讀寫與查詢的參考實作，以 Python 整數作為位元集合。
+
+    python backend/tag_index.py --tag 90s --tag Anime          # 同時擁有兩個 tag
+    python backend/tag_index.py --any Male --any Female --counts
+"""
+import argparse
+import base64
+import json
+import os
+
+import output_writer
+
+TAG_INDEX_FORMAT = 1
+INDEX_PATH = os.path.join('data', 'tags.json')
+
+# 每個位元組值中為 1 的位元位置，將位元集合展開成編號時使用
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def bits_from_ids(ids):
+    """歌曲編號 → 位元集合（Python 整數）"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    # 先在 bytearray 上設定位元，避免對大整數逐一做 |=（每次都會複製整個整數）
+    data = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        data[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(data, 'little')
+
+def ids_from_bits(bits):
+    """位元集合 → 遞增的歌曲編號列表"""
+    ids = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for offset, value in enumerate(data):
+        if value:
+            base = offset * 8
+            ids.extend(base + bit for bit in _BYTE_BITS[value])
+    return ids
+
+def encode_set(ids, bits, size):
+    """以 JSON 較短的寫法表示一個 tag 的歌曲集合"""
+    as_ids = {'ids': ids}
+    as_bitmap = {'bitmap': base64.b64encode(bits.to_bytes((size + 7) // 8, 'little')).decode('ascii')}
+    if len(json.dumps(as_bitmap)) < len(json.dumps(as_ids, separators=(',', ':'))):
+        return as_bitmap
+    return as_ids
+
+def decode_set(entry):
+    """encode_set 的反向操作，回傳位元集合"""
+    if 'bitmap' in entry:
+        return int.from_bytes(base64.b64decode(entry['bitmap']), 'little')
+    return bits_from_ids(entry['ids'])
+
+class TagIndex:
+    """tag → 歌曲位元集合的索引"""
+
+    def __init__(self, size, sets):
+        self.size = size
+        # 依歌曲數多到少排列，同數時依名稱
+        self.sets = dict(sorted(sets.items(), key=lambda item: (-item[1].bit_count(), item[0])))
+        self.all = (1 << size) - 1
+
+    @classmethod
+    def from_tag_lists(cls, tag_lists):
+        """由每首歌的 tags 列表（依 data.json 順序）建立索引"""
+        ids = {}
+        size = 0
+        for song_id, tags in enumerate(tag_lists):
+            size = song_id + 1
+            for tag in tags or ():
+                ids.setdefault(tag, []).append(song_id)
+        return cls(size, {tag: bits_from_ids(song_ids) for tag, song_ids in ids.items()})
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('format') != TAG_INDEX_FORMAT:
+            raise ValueError(f"unsupported tag index format: {data.get('format')}")
+        return cls(data['songs'], {tag: decode_set(entry) for tag, entry in zip(data['tags'], data['sets'])})
+
+    def to_json(self):
+        tags = list(self.sets)
+        return {
+            'format': TAG_INDEX_FORMAT,
+            'songs': self.size,
+            'tags': tags,
+            'counts': [self.sets[tag].bit_count() for tag in tags],
+            'sets': [encode_set(ids_from_bits(self.sets[tag]), self.sets[tag], self.size) for tag in tags],
+            'cooccurrence': self.cooccurrence(),
+        }
+
+    def cooccurrence(self):
+        """tag 兩兩同時出現的歌曲數矩陣（順序同 self.sets）"""
+        bitsets = list(self.sets.values())
+        matrix = [[0] * len(bitsets) for _ in bitsets]
+        for a, bits_a in enumerate(bitsets):
+            for b in range(a, len(bitsets)):
+                matrix[a][b] = matrix[b][a] = (bits_a & bitsets[b]).bit_count()
+        return matrix
+
+    def select(self, all_of=(), any_of=(), none_of=()):
+        """同時擁有 all_of、至少擁有一個 any_of、且不含 none_of 的歌曲位元集合"""
+        bits = self.all
+        for tag in all_of:
+            bits &= self.sets.get(tag, 0)
+        if any_of:
+            union = 0
+            for tag in any_of:
+                union |= self.sets.get(tag, 0)
+            bits &= union
+        for tag in none_of:
+            bits &= ~self.sets.get(tag, 0)
+        return bits
+
+    def filter(self, all_of=(), any_of=(), none_of=()):
+        """select() 的結果展開成遞增的歌曲編號"""
+        return ids_from_bits(self.select(all_of, any_of, none_of))
+
+    def facet_counts(self, bits=None):
+        """在目前篩選結果中，每個 tag 的歌曲數（側欄顯示用）"""
+        if bits is None:
+            bits = self.all
+        return {tag: (bits & tag_bits).bit_count() for tag, tag_bits in self.sets.items()}
+
+def build_index(songs):
+    """由 Song 物件列表（data.json 的順序）建立 TagIndex"""
+    return TagIndex.from_tag_lists(song.tags for song in songs)
+
+def write_index(songs, output_path=INDEX_PATH):
+    """寫出 tags.json，回傳 TagIndex"""
+    index = build_index(songs)
+    output_writer.write_json(output_path, index.to_json(), separators=(',', ':'))
+    print(f"Tag index: {len(index.sets)} tags over {index.size} songs -> {output_path}")
+    return index
+
+def load_index(path=INDEX_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return TagIndex.from_json(json.load(f))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--index', default=INDEX_PATH, help='tags.json 路徑')
+    parser.add_argument('--data', default='data.json', help='顯示曲名用的 data.json')
+    parser.add_argument('--tag', action='append', default=[], help='必須擁有的 tag（AND），可重複指定')
+    parser.add_argument('--any', action='append', default=[], help='至少擁有其中一個的 tag（OR）')
+    parser.add_argument('--exclude', action='append', default=[], help='不可擁有的 tag')
+    parser.add_argument('--counts', action='store_true', help='顯示篩選結果中各 tag 的歌曲數')
+    args = parser.parse_args()
+
+    index = load_index(args.index)
+    bits = index.select(args.tag, args.any, args.exclude)
+    ids = ids_from_bits(bits)
+    with open(args.data, 'r', encoding='utf-8') as f:
+        songs = json.load(f)
+    for song_id in ids:
+        print(f"{songs[song_id]['song_name']} / {songs[song_id]['artist']}")
+    print(f"({len(ids)} songs)")
+    if args.counts:
+        for tag, count in index.facet_counts(bits).items():
+            print(f"  {tag:<12}{count:>6}")
+
+if __name__ == '__main__':
+    main()
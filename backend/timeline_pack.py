@@ -0,0 +1,214 @@
+"""timeline/ 的封裝檔：把所有歌單與規則檔合併成單一檔案，附位移與雜湊索引，以 mmap 讀取。
+
+timeline/ 仍是編輯用的正本；封裝檔只是大量讀取時的替代來源，
+讀取時不必對每個小檔案各自 open、read，只需開啟並 mmap 一個檔案。
+open() 對 STREAM_BYTES 以上的檔案直接由 mmap 的 memoryview 逐塊解碼，不先把整個檔案複製成 bytes 或 str；
+較小的檔案（一般的歌單只有 1～2 KiB）一次解碼反而比建立串流快。
+
+    python backend/timeline_pack.py pack   [--timeline timeline] [--pack timeline.pack]
+    python backend/timeline_pack.py unpack [--timeline timeline] [--pack timeline.pack] [--prune]
+    python backend/timeline_pack.py status [--timeline timeline] [--pack timeline.pack]
+    python backend/process_timeline.py --pack timeline.pack     # 由封裝檔建置 data.json
+
+檔案格式（little-endian）：
+    標頭   magic b'TLPK'、版本 (uint32)、檔案數 (uint32)、索引位移 (uint64)
+    內容   各檔案的原始 bytes，依檔名順序緊接排列
+    索引   每個檔案：檔名長度 (uint16)、檔名 (UTF-8)、內容位移 (uint64)、長度 (uint64)、SHA-1 (20 bytes)
+同樣的內容一定產生完全相同的封裝檔，內容沒變時重新封裝不會改動檔案。
+"""
+import argparse
+import hashlib
+import io
+import mmap
+import os
+import struct
+import sys
+
+import output_writer
+from process_timeline import RULE_FILES, timeline_file_date
+
+PACK_PATH = 'timeline.pack'
+MAGIC = b'TLPK'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sIIQ')
+NAME_LENGTH = struct.Struct('<H')
+ENTRY = struct.Struct('<QQ20s')
+STREAM_BYTES = 64 * 1024  # 以串流逐塊解碼的檔案大小下限
+
+def is_member_name(name):
+    """封裝中可以還原的檔名：timeline 資料夾內的歌單或規則檔，不含路徑（絕對路徑、..、分隔符號）"""
+    if name in ('', '.', '..') or '/' in name or '\\' in name or os.path.isabs(name):
+        return False
+    return name in RULE_FILES or timeline_file_date(name) is not None
+
+def packable_files(timeline_dir):
+    """timeline 資料夾中要封裝的檔案（歌單與規則檔），依檔名排序"""
+    return sorted(name for name in os.listdir(timeline_dir)
+                  if name in RULE_FILES or timeline_file_date(name) is not None)
+
+def build_pack(files):
+    """由 [(檔名, bytes)] 組成封裝檔內容"""
+    files = sorted(files)
+    body = bytearray()
+    index = bytearray()
+    offset = HEADER.size
+    for name, data in files:
+        encoded = name.encode('utf-8')
+        index += NAME_LENGTH.pack(len(encoded)) + encoded
+        index += ENTRY.pack(offset, len(data), hashlib.sha1(data).digest())
+        body += data
+        offset += len(data)
+    return HEADER.pack(MAGIC, PACK_VERSION, len(files), offset) + bytes(body) + bytes(index)
+
+def pack(timeline_dir='timeline', pack_path=PACK_PATH):
+    """封裝 timeline 資料夾，回傳封裝的檔案數"""
+    files = []
+    for name in packable_files(timeline_dir):
+        with open(os.path.join(timeline_dir, name), 'rb') as f:
+            files.append((name, f.read()))
+    output_writer.write_bytes(pack_path, build_pack(files))
+    return len(files)
+
+class _MemberReader(io.BufferedIOBase):
+    """封裝中一個檔案的唯讀位元組串流：read1() 直接回傳 mmap 的 memoryview 切片，由 TextIOWrapper 逐塊解碼"""
+
+    def __init__(self, view, name):
+        self._view = view
+        self._position = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def read1(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else self._position + size
+        chunk = self._view[self._position:end]
+        self._position += len(chunk)
+        return chunk
+
+    read = read1
+
+    def close(self):
+        if not self.closed:
+            # 釋放對 mmap 的參照，TimelinePack.close() 才能關閉 mmap
+            self._view.release()
+        super().close()
+
+class TimelinePack:
+    """以 mmap 開啟的封裝檔；read() 回傳不複製內容的 memoryview"""
+
+    def __init__(self, pack_path=PACK_PATH):
+        self.path = pack_path
+        with open(pack_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, count, index_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{pack_path} is not a version {PACK_VERSION} timeline pack")
+        self.entries = {}  # 檔名 -> (位移, 長度, SHA-1)
+        position = index_offset
+        for _ in range(count):
+            (length,) = NAME_LENGTH.unpack_from(self._mmap, position)
+            position += NAME_LENGTH.size
+            name = str(self._view[position:position + length], 'utf-8')
+            position += length
+            self.entries[name] = ENTRY.unpack_from(self._mmap, position)
+            position += ENTRY.size
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def names(self):
+        return sorted(self.entries)
+
+    def read(self, name):
+        """檔案內容的 memoryview（直接切片 mmap，不複製）"""
+        offset, length, _ = self.entries[name]
+        return self._view[offset:offset + length]
+
+    def open(self, name):
+        """以文字檔的形式開啟封裝中的檔案（換行處理與 open() 相同）"""
+        if name not in self.entries:
+            raise FileNotFoundError(f"{name} is not in {self.path}")
+        path = os.path.join(self.path, name)
+        if self.entries[name][1] >= STREAM_BYTES:
+            return io.TextIOWrapper(_MemberReader(self.read(name), path), encoding='utf-8', newline=None)
+        text = io.StringIO(str(self.read(name), 'utf-8'), newline=None)
+        text.name = path
+        return text
+
+    def verify(self):
+        """回傳 SHA-1 與索引不符的檔名列表"""
+        return [name for name, (_, _, digest) in self.entries.items()
+                if hashlib.sha1(self.read(name)).digest() != digest]
+
+def unpack(pack_path=PACK_PATH, timeline_dir='timeline', prune=False):
+    """把封裝檔還原到 timeline 資料夾（內容相同的檔案不覆寫）；prune 時刪除封裝中沒有的歌單"""
+    with TimelinePack(pack_path) as timeline_pack:
+        corrupted = timeline_pack.verify()
+        if corrupted:
+            raise ValueError(f"{pack_path} is corrupted: {', '.join(corrupted)}")
+        # 索引中的檔名直接成為寫入路徑，寫入任何檔案之前先拒絕路徑或不是歌單、規則檔的名稱
+        unsafe = [name for name in timeline_pack.names() if not is_member_name(name)]
+        if unsafe:
+            raise ValueError(f"{pack_path} contains names that are not timeline files: {', '.join(map(repr, unsafe))}")
+        os.makedirs(timeline_dir, exist_ok=True)
+        for name in timeline_pack.names():
+            output_writer.write_bytes(os.path.join(timeline_dir, name), timeline_pack.read(name))
+        if prune:
+            for name in packable_files(timeline_dir):
+                if name not in timeline_pack:
+                    os.remove(os.path.join(timeline_dir, name))
+                    print(f"Removed {name} (not in {pack_path})")
+        return len(timeline_pack.entries)
+
+def status(pack_path=PACK_PATH, timeline_dir='timeline'):
+    """比較封裝檔與 timeline 資料夾，回傳 (新增, 修改, 刪除) 的檔名列表"""
+    with TimelinePack(pack_path) as timeline_pack:
+        on_disk = set(packable_files(timeline_dir))
+        added = sorted(on_disk - set(timeline_pack.entries))
+        removed = sorted(set(timeline_pack.entries) - on_disk)
+        modified = []
+        for name in sorted(on_disk & set(timeline_pack.entries)):
+            with open(os.path.join(timeline_dir, name), 'rb') as f:
+                if hashlib.sha1(f.read()).digest() != timeline_pack.entries[name][2]:
+                    modified.append(name)
+    return added, modified, removed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('pack', 'unpack', 'status'))
+    parser.add_argument('--timeline', default='timeline', help='可編輯的歌單資料夾')
+    parser.add_argument('--pack', default=PACK_PATH, help='封裝檔路徑')
+    parser.add_argument('--prune', action='store_true', help='unpack 時刪除封裝中沒有的歌單')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        count = pack(args.timeline, args.pack)
+        print(f"Packed {count} files from {args.timeline}/ into {args.pack}")
+    elif args.command == 'unpack':
+        count = unpack(args.pack, args.timeline, args.prune)
+        print(f"Unpacked {count} files from {args.pack} into {args.timeline}/")
+    else:
+        added, modified, removed = status(args.pack, args.timeline)
+        for label, names in (('added', added), ('modified', modified), ('removed', removed)):
+            for name in names:
+                print(f"{label:<9}{name}")
+        if added or modified or removed:
+            print(f"{args.pack} is out of date, run: python backend/timeline_pack.py pack")
+            sys.exit(1)
+        print(f"{args.pack} matches {args.timeline}/")
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,77 @@
 import json
-import re
-import unicodedata
 from pathlib import Path
 
+import catalogue_db
+import output_writer
+# 與 process_timeline.py 共用正規化邏輯：兩邊的鍵不一致時，已有標籤的歌會被當成缺少而附加空白標籤行，
+# 重新建置時空白的那一行覆蓋原本的標籤
+from process_timeline import normalize_key
+
 ROOT = Path(__file__).resolve().parent.parent
 DATA_PATH = ROOT / "data.json"
+DB_PATH = ROOT / catalogue_db.DB_PATH
 TAGS_PATH = ROOT / "timeline" / "tags.txt"
 
-if not DATA_PATH.exists():
-    raise FileNotFoundError(f"Missing {DATA_PATH}")
-if not TAGS_PATH.exists():
-    raise FileNotFoundError(f"Missing {TAGS_PATH}")
+def load_song_entries():
+    """本地資料庫與 timeline/ 一致時直接讀取歌曲清單，否則解析 data.json；回傳 [(歌名, 歌手)]"""
+    conn = catalogue_db.open_current(str(DB_PATH), str(ROOT / "timeline"))
+    if conn is not None:
+        song_entries = catalogue_db.get_song_entries(conn)
+        conn.close()
+        return song_entries
+    with DATA_PATH.open("r", encoding="utf-8") as f:
+        return [(song.get('song_name', ''), song.get('artist', '')) for song in json.load(f)]
 
-# 引入與 process_timeline.py 相同的正規化邏輯
-def normalize_key(text):
-    if not text:
-        return ''
-    # 1. 全半形統一
-    normalized = unicodedata.normalize('NFKC', text)
-    # 2. 波浪符號統一為 ~
-    normalized = re.sub(r'[〜\u301c\u223c]', '~', normalized)
-    # 3. 大小寫不敏感
-    normalized = normalized.casefold()
-    # 4. 去除前後空白，並將中間多個空白壓縮為單個空白
-    normalized = re.sub(r"\s+", ' ', normalized)
-    return normalized.strip()
+def update_tags(song_entries, tags_path=TAGS_PATH):
+    """把 song_entries 中 tags.txt 還沒有的歌曲附加到 tags.txt（標籤留空），回傳新增的行數"""
+    tags_path = Path(tags_path)
+    existing_entries = {}
+    for line in tags_path.read_text(encoding="utf-8").splitlines():
+        raw = line.strip()
+        if not raw or raw.startswith("#"):
+            continue
+        parts = raw.split("|")
+        if len(parts) < 2:
+            continue
+        
+        # 使用 normalize 後的 (歌名, 歌手) 作為唯一的 Key 
+        norm_key = (normalize_key(parts[0]), normalize_key(parts[1]))
+        existing_entries.setdefault(norm_key, []).append(raw)
 
-with DATA_PATH.open("r", encoding="utf-8") as f:
-    data = json.load(f)
+    duplicates = {k: v for k, v in existing_entries.items() if len(v) > 1}
+    if duplicates:
+        print("⚠️ Detected duplicate tags.txt entries for the same song|artist key:")
+        for norm_key, lines in duplicates.items():
+            # 顯示時轉換為好看的格式
+            print(f"  {norm_key[0]} | {norm_key[1]} ({len(lines)} entries)")
+        print("These duplicates may cause unexpected behavior if the same song|artist appears multiple times.")
+        print()
 
-existing_entries = {}
-existing_lines = []
-for line in TAGS_PATH.read_text(encoding="utf-8").splitlines():
-    raw = line.strip()
-    if not raw or raw.startswith("#"):
-        continue
-    parts = raw.split("|")
-    if len(parts) < 2:
-        continue
-    
-    # 使用 normalize 後的 (歌名, 歌手) 作為唯一的 Key 
-    norm_key = (normalize_key(parts[0]), normalize_key(parts[1]))
-    existing_entries.setdefault(norm_key, []).append(raw)
-    existing_lines.append(raw)
+    missing_lines = []
+    for song_name, artist in song_entries:
+        # 用相同的正規化邏輯去比對
+        norm_key = (normalize_key(song_name), normalize_key(artist))
+        
+        if norm_key not in existing_entries:
+            missing_lines.append(f"{song_name}|{artist}|")
 
-duplicates = {k: v for k, v in existing_entries.items() if len(v) > 1}
-if duplicates:
-    print("⚠️ Detected duplicate tags.txt entries for the same song|artist key:")
-    for norm_key, lines in duplicates.items():
-        # 顯示時轉換為好看的格式
-        print(f"  {norm_key[0]} | {norm_key[1]} ({len(lines)} entries)")
-    print("These duplicates may cause unexpected behavior if the same song|artist appears multiple times.")
-    print()
+    if missing_lines:
+        content = tags_path.read_text(encoding="utf-8")
+        if not content.endswith("\n"):
+            content += "\n"
+        content += "\n".join(missing_lines).rstrip() + "\n"
+        output_writer.write_text(str(tags_path), content)
+        print(f"Appended {len(missing_lines)} new tag lines to {tags_path}")
+    else:
+        print("No new song entries found in data.json. timeline/tags.txt unchanged.")
+    return len(missing_lines)
 
-missing_lines = []
-for song in data:
-    song_name = song.get('song_name', '')
-    artist = song.get('artist', '')
-    
-    # 用相同的正規化邏輯去比對
-    norm_key = (normalize_key(song_name), normalize_key(artist))
-    
-    if norm_key not in existing_entries:
-        missing_lines.append(f"{song_name}|{artist}|")
+def main():
+    if not DATA_PATH.exists() and not DB_PATH.exists():
+        raise FileNotFoundError(f"Missing {DATA_PATH}")
+    if not TAGS_PATH.exists():
+        raise FileNotFoundError(f"Missing {TAGS_PATH}")
+    update_tags(load_song_entries())
 
-if missing_lines:
-    content = TAGS_PATH.read_text(encoding="utf-8")
-    if not content.endswith("\n"):
-        content += "\n"
-    content += "\n".join(missing_lines).rstrip() + "\n"
-    TAGS_PATH.write_text(content, encoding="utf-8")
-    print(f"Appended {len(missing_lines)} new tag lines to {TAGS_PATH}")
-else:
-    print("No new song entries found in data.json. timeline/tags.txt unchanged.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
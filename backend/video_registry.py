@@ -0,0 +1,198 @@
+"""本地影片資料登錄檔：getcomment、check_deleted_videos 與 disc_generation 共用的 YouTube 影片資訊。
+
+每部影片只以批次的 videos.list（一次最多 50 部，每次 1 單位配額）查詢，結果存在 data/videos.json：
+    title            標題
+    published_at     發布時間（日本時間）
+    actual_start     直播實際開始時間（日本時間），沒有時為 null
+    scheduled_start  直播預定開始時間（日本時間），沒有時為 null
+    streamed         是否有直播資訊（liveStreamingDetails）
+    duration         長度（秒），直播中或尚未開始時為 null
+    live             liveBroadcastContent（none、upcoming、live）
+    members_only     是否為會員限定
+    privacy          公開狀態（public、unlisted、private）
+    status           available，或 API 查不到時為 missing（已刪除或設為私人）
+    checked_at       最後一次查詢的時間（UTC）
+    last_seen        最後一次 API 有回傳這部影片的時間（UTC）
+播放清單的曲目（disc_generation）另存在 playlists：播放清單 ID -> {checked_at, tracks: [{title, videoId}]}。
+
+查詢過的資料依排程重新查詢：尚未開始或直播中的影片 UPCOMING_TTL 後，其他 REFRESH_AFTER 後
+（每週執行一次的工作流每次都會重新確認影片是否還在）。
+
+    python backend/video_registry.py                 # 列出登錄檔的統計
+    python backend/video_registry.py VIDEO_ID ...    # 顯示指定影片的紀錄
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import output_writer
+
+REGISTRY_PATH = os.path.join('data', 'videos.json')
+REGISTRY_FORMAT = 1
+BATCH_SIZE = 50                        # videos.list 的 id 參數上限
+REFRESH_AFTER = timedelta(days=6)      # 略短於每週一次的排程，每次執行都會重新確認
+UPCOMING_TTL = timedelta(hours=1)      # 尚未開始或直播中的影片，開始時間與長度還會變動
+PLAYLIST_TTL = timedelta(days=6)
+VIDEO_PARTS = 'snippet,liveStreamingDetails,contentDetails,status'
+
+JST = timezone(timedelta(hours=9))     # 日本沒有夏令時間，固定 +09:00
+_DURATION = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+def to_jst(utc_time_str):
+    """API 的 UTC 時間字串（2024-01-01T12:00:00Z）轉為日本時間的 ISO 字串"""
+    if not utc_time_str:
+        return None
+    utc_time = datetime.strptime(utc_time_str[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    return utc_time.astimezone(JST).isoformat()
+
+def jst_date(value):
+    """日本時間 ISO 字串的日期"""
+    return datetime.fromisoformat(value).date() if value else None
+
+def parse_duration(value):
+    """ISO 8601 長度（PT1H2M3S）轉為秒數；直播中的 P0D 或無法解析時為 None"""
+    match = _DURATION.match(value or '')
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    total = ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+    return total or None
+
+def video_record(item, now):
+    """videos.list 回傳的一部影片轉為登錄檔紀錄"""
+    snippet = item.get('snippet', {})
+    live_details = item.get('liveStreamingDetails')
+    return {
+        'title': snippet.get('title', ''),
+        'published_at': to_jst(snippet.get('publishedAt')),
+        'actual_start': to_jst((live_details or {}).get('actualStartTime')),
+        'scheduled_start': to_jst((live_details or {}).get('scheduledStartTime')),
+        'streamed': live_details is not None,
+        'duration': parse_duration(item.get('contentDetails', {}).get('duration')),
+        'live': snippet.get('liveBroadcastContent', 'none'),
+        'members_only': snippet.get('liveBroadcastContent') == 'membersOnly',
+        'privacy': item.get('status', {}).get('privacyStatus'),
+        'status': 'available',
+        'checked_at': now.isoformat(timespec='seconds'),
+        'last_seen': now.isoformat(timespec='seconds'),
+    }
+
+class DirectApi:
+    """不經過配額排程器、直接執行 request 的客戶端（單獨執行 check_deleted_videos、disc_generation 時使用）"""
+
+    def __init__(self, youtube):
+        self.youtube = youtube
+
+    def execute(self, request, cost=1):
+        return request.execute()
+
+class VideoRegistry:
+    """data/videos.json 的讀寫；多個執行緒（getcomment 的各頻道）可共用同一個實例"""
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self.data = {'format': REGISTRY_FORMAT, 'videos': {}, 'playlists': {}}
+        self.calls = 0       # 這次執行實際送出的 videos.list／playlistItems.list 次數
+        self.fetched = 0     # 這次執行查詢的影片數
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == REGISTRY_FORMAT:
+                self.data = data
+
+    def get(self, video_id):
+        return self.data['videos'].get(video_id)
+
+    def is_stale(self, video_id, now=None):
+        record = self.get(video_id)
+        if record is None:
+            return True
+        ttl = UPCOMING_TTL if record.get('live') in ('upcoming', 'live') else REFRESH_AFTER
+        return (now or utc_now()) - datetime.fromisoformat(record['checked_at']) >= ttl
+
+    def save(self):
+        if self.path:
+            with self._lock:
+                output_writer.write_json(self.path, self.data, quiet=True, ensure_ascii=False,
+                                         indent=1, sort_keys=True)
+
+    def refresh(self, api, video_ids, force=False):
+        """以批次的 videos.list 查詢 video_ids 中沒有紀錄或已過期的影片，回傳實際查詢的影片數。
+
+        API 錯誤直接拋出；已查完的批次會先寫入登錄檔。
+        """
+        now = utc_now()
+        pending = sorted({video_id for video_id in video_ids if force or self.is_stale(video_id, now)})
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = pending[start:start + BATCH_SIZE]
+            response = api.execute(api.youtube.videos().list(part=VIDEO_PARTS, id=','.join(batch),
+                                                             maxResults=BATCH_SIZE))
+            now = utc_now()
+            records = {item['id']: video_record(item, now) for item in response.get('items', [])}
+            with self._lock:
+                self.calls += 1
+                self.fetched += len(batch)
+                for video_id in batch:
+                    if video_id in records:
+                        self.data['videos'][video_id] = records[video_id]
+                    else:
+                        # 查不到：已刪除或設為私人；保留上次看到時的資料
+                        record = dict(self.data['videos'].get(video_id) or {'last_seen': None})
+                        record.update(status='missing', checked_at=now.isoformat(timespec='seconds'))
+                        self.data['videos'][video_id] = record
+            self.save()
+        return len(pending)
+
+    def lookup(self, api, video_id):
+        """單一影片的紀錄，沒有或過期時先查詢"""
+        self.refresh(api, [video_id])
+        return self.get(video_id)
+
+    def playlist_tracks(self, api, playlist_id, force=False):
+        """播放清單的曲目 [{title, videoId}]（第一頁，最多 50 首），PLAYLIST_TTL 內沿用登錄檔"""
+        cached = self.data['playlists'].get(playlist_id)
+        now = utc_now()
+        if cached and not force and now - datetime.fromisoformat(cached['checked_at']) < PLAYLIST_TTL:
+            return cached['tracks']
+        response = api.execute(api.youtube.playlistItems().list(part='snippet', playlistId=playlist_id,
+                                                                maxResults=BATCH_SIZE))
+        tracks = [{'title': item['snippet']['title'],
+                   'videoId': item['snippet'].get('resourceId', {}).get('videoId', '')}
+                  for item in response.get('items', [])]
+        with self._lock:
+            self.calls += 1
+            self.data['playlists'][playlist_id] = {'checked_at': now.isoformat(timespec='seconds'), 'tracks': tracks}
+        self.save()
+        return tracks
+
+    def summary(self):
+        videos = self.data['videos'].values()
+        missing = sum(1 for record in videos if record['status'] == 'missing')
+        return (f"Video registry: {len(self.data['videos'])} videos ({missing} missing), "
+                f"{len(self.data['playlists'])} playlists; {self.fetched} videos fetched in {self.calls} calls")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video_ids', nargs='*', help='要顯示的影片 ID')
+    parser.add_argument('--registry', default=REGISTRY_PATH, help='登錄檔路徑')
+    args = parser.parse_args()
+
+    registry = VideoRegistry(args.registry)
+    for video_id in args.video_ids:
+        record = registry.get(video_id)
+        print(f"{video_id}: {json.dumps(record, ensure_ascii=False, indent=1) if record else 'not in registry'}")
+    if not args.video_ids:
+        now = utc_now()
+        stale = sum(1 for video_id in registry.data['videos'] if registry.is_stale(video_id, now))
+        print(registry.summary())
+        print(f"{stale} videos due for refresh")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""常駐監看 timeline/：歌單存檔後只重新解析該檔，幾毫秒內更新 data.json。
+
+    python backend/process_timeline.py --watch
+    python backend/watch.py [--poll]
+
+解析結果以「每個歌單一份 Song 列表」與合併後的歌曲保存在記憶體，修改一個檔案只重新解析該檔，
+並只重新合併該檔修改前後出現過的歌曲（結果與完整建置相同）。
+無法解析的歌單（不存在的日期、非 UTF-8 的內容）只顯示警告，保留該檔上一次成功的解析結果。
+Linux 上使用 inotify，其他平台或 inotify 不可用時改為定期掃描修改時間。
+短時間內的連續修改（編輯器的暫存檔、存檔再改名）會合併成一次重建。
+watch 模式只更新 data.json 與差異鏈（data/delta/，之後的正式建置才能接續同一條鏈），
+不產生其他報告，正式建置仍以 process_timeline.py 為準。
+"""
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import io
+import os
+import select
+import struct
+import sys
+import time
+
+import delta
+from process_timeline import (
+    ARTIFACT_DIR, RULE_FILES, Song, load_rules, process_timeline, timeline_file_date, write_data_json
+)
+
+DEBOUNCE_SECONDS = 0.02
+POLL_INTERVAL = 0.2
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')
+
+def is_watched_file(filename):
+    return filename in RULE_FILES or timeline_file_date(filename) is not None
+
+class InotifyWatcher:
+    """以 inotify 監看資料夾（只限 Linux）"""
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout=None):
+        """等待事件，回傳有變動的檔名集合（逾時則為空集合）"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            buffer = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            filename = os.fsdecode(name.rstrip(b'\0'))
+            # 新建的檔案等寫完（IN_CLOSE_WRITE）再處理
+            if filename and not mask & IN_CREATE and is_watched_file(filename):
+                changed.add(filename)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """定期比對修改時間與大小的備援監看方式"""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if is_watched_file(entry.name):
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {name for name in current.keys() | self.snapshot.keys()
+                       if current.get(name) != self.snapshot.get(name)}
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else
+                       max(0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+def make_watcher(directory, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directory)
+
+class CatalogueState:
+    """記憶體中的解析結果：每個歌單一份 Song 列表、合併後的歌曲，加上規則與 tags。
+
+    合併結果與 build_catalogue 相同：每首歌由含有它的歌單依檔名順序合併，
+    並依「第一次出現的歌單、在該歌單中的位置」排列。修改一個歌單時只重新合併該檔前後出現過的歌曲。
+    """
+
+    def __init__(self, timeline_dir='timeline'):
+        self.timeline_dir = timeline_dir
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.rules, self.tags_map = load_rules(timeline_dir)
+        self.files = {}     # 檔名 -> {正規化鍵: (在該歌單中的位置, Song)}
+        self.holders = {}   # 正規化鍵 -> 含有這首歌的歌單檔名集合
+        self.merged = {}    # 正規化鍵 -> 合併後的 Song
+        self.order = {}     # 正規化鍵 -> (第一次出現的歌單檔名, 位置)
+        self.keys = None    # 依 order 排好的鍵（快取，順序有變動時才重排）
+        self.errors = {}    # 無法解析的歌單 -> 警告訊息（保留上一次成功的解析結果）
+        dirty = set()
+        for filename in sorted(os.listdir(timeline_dir)):
+            if timeline_file_date(filename):
+                songs, warnings = self.parse(filename)
+                if songs is None:
+                    self.errors[filename] = warnings
+                else:
+                    dirty |= self._replace(filename, songs)
+        self._remerge(dirty)
+
+    def parse(self, filename):
+        """解析單一歌單，回傳 (Song 列表, 解析時的警告訊息)；檔案無法讀取或解析時 Song 列表為 None"""
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                songs = process_timeline(os.path.join(self.timeline_dir, filename),
+                                         timeline_file_date(filename), **self.rules)
+        except Exception as e:
+            # 與 build_catalogue 相同，單一歌單的錯誤不中斷整體（例如不存在的日期、非 UTF-8 的內容）
+            songs = None
+            print(f"Error processing file {filename}: {e}", file=output)
+        warnings = [line for line in output.getvalue().splitlines()
+                    if line.startswith(('Warning', 'Error'))]
+        return songs, warnings
+
+    def _replace(self, filename, songs):
+        """以新的解析結果（None 為刪除）取代該歌單，回傳需要重新合併的鍵"""
+        previous = self.files.pop(filename, {})
+        for key in previous:
+            self.holders[key].discard(filename)
+        if songs is not None:
+            self.files[filename] = {song.key: (position, song) for position, song in enumerate(songs)}
+            for song in songs:
+                self.holders.setdefault(song.key, set()).add(filename)
+        return previous.keys() | self.files.get(filename, {}).keys()
+
+    def _remerge(self, keys):
+        """重新合併指定的歌曲，其他歌曲的合併結果不動"""
+        for key in keys:
+            names = sorted(self.holders.get(key, ()))
+            if not names:
+                self.holders.pop(key, None)
+                self.merged.pop(key, None)
+                if self.order.pop(key, None) is not None:
+                    self.keys = None
+                continue
+            position, first = self.files[names[0]][key]
+            merged = Song(first.key, first.song_name, first.artist, first.source, first.is_copyright, first.az)
+            for name in names:
+                merged.merge(self.files[name][key][1])
+            merged.tags = self.tags_map.get(key, [])
+            self.merged[key] = merged
+            if self.order.get(key) != (names[0], position):
+                self.order[key] = (names[0], position)
+                self.keys = None
+
+    def update(self, changed):
+        """套用一批檔案變動，回傳 {檔名: 警告訊息列表}"""
+        report = {}
+        reparse = set(changed)
+        rule_changes = changed & set(RULE_FILES)
+        if rule_changes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.rules, self.tags_map = load_rules(self.timeline_dir)
+            for key, song in self.merged.items():
+                song.tags = self.tags_map.get(key, [])
+            if rule_changes != {'tags.txt'}:
+                # 例外、清唱與首字規則影響所有歌單的標記，必須全部重新解析
+                reparse |= set(self.files) | set(self.errors)
+        dirty = set()
+        for filename in sorted(reparse):
+            if not timeline_file_date(filename):
+                continue
+            if os.path.exists(os.path.join(self.timeline_dir, filename)):
+                songs, warnings = self.parse(filename)
+                if songs is None:
+                    self.errors[filename] = warnings
+                    if filename in self.files:
+                        warnings = warnings + ['keeping the previous version of this file']
+                else:
+                    self.errors.pop(filename, None)
+                    dirty |= self._replace(filename, songs)
+                # 只回報這次存檔的歌單，因規則變動而重新解析的其他歌單不重複顯示舊警告
+                if filename in changed:
+                    report[filename] = warnings
+            else:
+                self.errors.pop(filename, None)
+                dirty |= self._replace(filename, None)
+                report[filename] = ['removed']
+        self._remerge(dirty)
+        return report
+
+    def songs(self):
+        if self.keys is None:
+            self.keys = sorted(self.order, key=self.order.__getitem__)
+        return [self.merged[key] for key in self.keys]
+
+def write_data(songs, output_path, delta_dir):
+    """寫出 data.json 並接續差異鏈（與 process_timeline.write_outputs 相同），回傳差異鏈的版本號"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        previous = delta.read_snapshot(output_path)
+        write_data_json(songs, output_path)
+        return delta.update_chain(previous, output_path, delta_dir)
+
+def rebuild(state, output_path, changed, delta_dir=os.path.join(ARTIFACT_DIR, 'delta')):
+    """處理一批變動並寫出 data.json（同時更新差異鏈），回傳 (警告報告, 歌曲數)"""
+    report = state.update(changed)
+    songs = state.songs()
+    write_data(songs, output_path, delta_dir)
+    return report, len(songs)
+
+def watch(timeline_dir='timeline', output_path='data.json', poll=False, on_rebuilt=None, should_stop=None,
+          delta_dir=os.path.join(ARTIFACT_DIR, 'delta')):
+    """常駐監看直到 Ctrl+C（或 should_stop() 為真）；每次重建後呼叫 on_rebuilt(變動檔名, 歌曲數)"""
+    t0 = time.perf_counter()
+    state = CatalogueState(timeline_dir)
+    write_data(state.songs(), output_path, delta_dir)
+    watcher = make_watcher(timeline_dir, poll)
+    print(f"Loaded {len(state.files)} timeline files in {time.perf_counter() - t0:.2f}s, "
+          f"watching {timeline_dir}/ ({type(watcher).__name__})", flush=True)
+    for filename, warnings in state.errors.items():
+        for warning in warnings:
+            print(f"  {filename}: {warning}", flush=True)
+    try:
+        while should_stop is None or not should_stop():
+            changed = watcher.wait(0.5 if should_stop else None)
+            if not changed:
+                continue
+            # 去抖動：持續收集直到 DEBOUNCE_SECONDS 內沒有新事件
+            while True:
+                more = watcher.wait(DEBOUNCE_SECONDS)
+                if not more:
+                    break
+                changed |= more
+            t0 = time.perf_counter()
+            report, count = rebuild(state, output_path, changed, delta_dir)
+            elapsed = (time.perf_counter() - t0) * 1000
+            print(f"[{time.strftime('%H:%M:%S')}] {', '.join(sorted(changed))}: "
+                  f"{count} songs -> {output_path} in {elapsed:.1f} ms", flush=True)
+            for filename, warnings in report.items():
+                for warning in warnings:
+                    print(f"  {filename}: {warning}", flush=True)
+            if on_rebuilt:
+                on_rebuilt(changed, count)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--timeline', default='timeline')
+    parser.add_argument('--output', default='data.json')
+    parser.add_argument('--poll', action='store_true', help='不使用 inotify，改為定期掃描')
+    args = parser.parse_args()
+    watch(args.timeline, args.output, args.poll)
+
+if __name__ == '__main__':
+    main()
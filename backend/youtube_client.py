@@ -0,0 +1,128 @@
+"""YouTube Data API 客戶端：第一次使用時才建立，探索文件（discovery document）讀取本地副本。
+
+getcomment、check_deleted_videos 與 disc_generation 原本在 import 時就解析憑證並呼叫 build()，
+光是 import googleapiclient.discovery 就要上百毫秒，沒有憑證時連離線功能都無法使用。
+這裡把所有 Google 套件的 import 與憑證檢查延到第一次建立客戶端時：
+    youtube_client.youtube()          共用的客戶端（單一執行緒使用）
+    youtube_client.build_youtube()    新的客戶端（每個執行緒各自建立）
+    except youtube_client.HttpError:  錯誤類別也在第一次用到時才 import
+
+探索文件是 backend/discovery/youtube.v3.json，只保留用到的方法（USED_METHODS）與其回應格式，
+不隨套件版本變動，也不必每次解析套件內 370 KB 的完整文件。新增用到的方法後重新產生：
+    python backend/youtube_client.py vendor path/to/youtube.v3.json
+完整文件可從 googleapiclient/discovery_cache/documents/youtube.v3.json，
+或 https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest 取得。
+"""
+import argparse
+import functools
+import json
+import os
+import threading
+
+DISCOVERY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'discovery', 'youtube.v3.json')
+USED_METHODS = {
+    'channels': ['list'],
+    'commentThreads': ['list'],
+    'playlistItems': ['list'],
+    'videos': ['list'],
+}
+
+_client = None
+_lock = threading.Lock()
+
+def __getattr__(name):
+    # except youtube_client.HttpError: 只在真的有例外時才 import googleapiclient
+    if name == 'HttpError':
+        from googleapiclient.errors import HttpError
+        return HttpError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def api_key():
+    """從環境變量中讀取 API 密鑰；同時確認 Google 憑證存在且可以解析"""
+    check_credentials()
+    return os.getenv('GOOGLE_API_KEY')
+
+@functools.lru_cache(maxsize=None)
+def check_credentials():
+    """檢查 GOOGLE_SHEETS_CREDENTIALS 與 GOOGLE_API_KEY，回傳服務帳戶憑證"""
+    google_sheets_credentials = os.getenv('GOOGLE_SHEETS_CREDENTIALS')
+    if not google_sheets_credentials or not os.getenv('GOOGLE_API_KEY'):
+        raise ValueError("缺少Google API憑證或API密鑰")
+    from google.oauth2 import service_account
+    try:
+        credentials_info = json.loads(google_sheets_credentials)
+        return service_account.Credentials.from_service_account_info(credentials_info)
+    except Exception as e:
+        raise ValueError("無效的Google Sheets憑證") from e
+
+@functools.lru_cache(maxsize=None)
+def discovery_document(path=DISCOVERY_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def build_youtube():
+    """建立新的客戶端；googleapiclient 的 http 物件不是執行緒安全的，多執行緒時各自建立"""
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(discovery_document(), developerKey=api_key())
+
+def youtube():
+    """共用的客戶端，第一次呼叫時建立"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = build_youtube()
+        return _client
+
+def _schema_refs(node, found):
+    if isinstance(node, dict):
+        if '$ref' in node:
+            found.add(node['$ref'])
+        for value in node.values():
+            _schema_refs(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            _schema_refs(value, found)
+
+def trim_document(document, used_methods=USED_METHODS):
+    """只保留 used_methods 與其引用（遞迴）的 schema"""
+    trimmed = {key: value for key, value in document.items() if key not in ('resources', 'schemas')}
+    trimmed['resources'] = {}
+    for resource, methods in used_methods.items():
+        source = document['resources'][resource]
+        trimmed['resources'][resource] = dict(
+            {key: value for key, value in source.items() if key not in ('methods', 'resources')},
+            methods={method: source['methods'][method] for method in methods})
+    pending = set()
+    _schema_refs(trimmed['resources'], pending)
+    schemas = {}
+    while pending:
+        name = pending.pop()
+        if name in schemas:
+            continue
+        schemas[name] = document['schemas'][name]
+        _schema_refs(schemas[name], pending)
+    trimmed['schemas'] = {name: schemas[name] for name in sorted(schemas)}
+    return trimmed
+
+def vendor(source_path, output_path=DISCOVERY_PATH):
+    import output_writer
+    with open(source_path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    trimmed = trim_document(document)
+    output_writer.write_json(output_path, trimmed, ensure_ascii=False, indent=1, sort_keys=True)
+    return trimmed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    vendor_parser = subparsers.add_parser('vendor', help='由完整的探索文件產生本地副本')
+    vendor_parser.add_argument('source', help='完整的 youtube.v3.json')
+    vendor_parser.add_argument('--output', default=DISCOVERY_PATH)
+    args = parser.parse_args()
+
+    trimmed = vendor(args.source, args.output)
+    methods = sum(len(resource['methods']) for resource in trimmed['resources'].values())
+    print(f"{args.output}: revision {trimmed.get('revision')}, {methods} methods, {len(trimmed['schemas'])} schemas")
+
+if __name__ == '__main__':
+    main()
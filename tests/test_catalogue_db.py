@@ -0,0 +1,89 @@
+"""catalogue_db.py：增量同步後由資料庫匯出的歌曲必須與 build_catalogue 完整解析的結果相同。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import unittest
+
+from timeline_case import TimelineTestCase  # 同時把 backend/ 加入 sys.path
+
+import catalogue_db
+import process_timeline
+
+VIDEO_A = 'aaaaaaaaaaa'
+VIDEO_B = 'bbbbbbbbbbb'
+VIDEO_C = 'ccccccccccc'
+VIDEO_D = 'ddddddddddd'
+
+class CatalogueDbTest(TimelineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conn = catalogue_db.connect(os.path.join(self.root, 'catalogue.db'))
+
+    def tearDown(self):
+        self.conn.close()
+        super().tearDown()
+
+    def sync(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = catalogue_db.sync_timeline(self.conn, self.timeline_dir)
+        return result, [song.to_dict() for song in catalogue_db.load_songs(self.conn)]
+
+    def stored_sha1(self, date_str):
+        row = self.conn.execute('SELECT sha1 FROM timeline_files WHERE filename = ?', (f'{date_str}.txt',)).fetchone()
+        return row and row[0]
+
+    def assert_matches_full_build(self):
+        (changed, removed), songs = self.sync()
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = [song.to_dict() for song in process_timeline.build_catalogue(self.timeline_dir)]
+        self.assertEqual(songs, expected)
+        return changed, removed
+
+    def test_incremental_sync_matches_build_catalogue(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha'), ('Song Two', 'Beta'), ('Song Three', 'Gamma')])
+        self.write_timeline('20250111', VIDEO_B, [('Song Two', 'Beta'), ('Song Four', 'Delta')])
+        self.assertEqual(self.assert_matches_full_build(), (2, 0))
+        self.assertEqual(self.assert_matches_full_build(), (0, 0))
+
+        # 修改一份歌單：移除只出現在該場的歌、新增既有歌曲的演唱紀錄
+        self.write_timeline('20250111', VIDEO_B, [('Song One', 'Alpha'), ('Song Five', 'Epsilon')])
+        self.assertEqual(self.assert_matches_full_build(), (1, 0))
+
+        # 補上更早的歌單（改變首次出現的歌單與整體順序）、同一天的第二場
+        self.write_timeline('20241228', VIDEO_C, [('Song Five', 'Epsilon'), ('song  one', 'ALPHA')])
+        self.write_timeline('20250104_2', VIDEO_D, [('Song Six', 'Zeta')])
+        self.assertEqual(self.assert_matches_full_build(), (2, 0))
+
+        # tags 與刪檔規則變動、刪除首次收錄歌曲的歌單
+        self.write_rules(private_ids=[VIDEO_B], tags=[('Song One', 'Alpha', 'anime')])
+        self.remove_timeline('20241228')
+        self.assert_matches_full_build()
+
+    def test_unreadable_file_keeps_previous_rows(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha'), ('Song Two', 'Beta')])
+        self.write_timeline('20250111', VIDEO_B, [('Song Two', 'Beta')])
+        _, before = self.sync()
+        sha1 = self.stored_sha1('20250104')
+
+        # 改壞的歌單（非 UTF-8）與新加入但無法解析的歌單：資料庫維持上次同步的內容
+        with open(os.path.join(self.timeline_dir, '20250104.txt'), 'wb') as f:
+            f.write(b'ID = ' + VIDEO_A.encode() + b'\n01.    00:05:00    \xff\xfe / Alpha\n')
+        with open(os.path.join(self.timeline_dir, '20250118.txt'), 'wb') as f:
+            f.write(b'\xff\xfe\n')
+        (changed, removed), after = self.sync()
+        self.assertEqual((changed, removed), (0, 0))
+        self.assertEqual(after, before)
+        self.assertEqual(self.stored_sha1('20250104'), sha1)
+        self.assertIsNone(self.stored_sha1('20250118'))
+
+        # 修好之後下次同步會重新解析
+        self.write_timeline('20250104', VIDEO_A, [('Song Three', 'Gamma')])
+        (changed, _), after = self.sync()
+        self.assertEqual(changed, 1)
+        self.assertEqual([song['song_name'] for song in after], ['Song Three', 'Song Two'])
+
+if __name__ == '__main__':
+    unittest.main()
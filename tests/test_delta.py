@@ -0,0 +1,152 @@
+"""delta.py：重播差異鏈必須得到與完整建置完全相同的 data.json。
+
+在暫存資料夾中以合成歌單逐版建置（build_catalogue → write_data_json → update_chain，
+與 process_timeline.write_outputs 相同），每一版都從所有較舊的版本以 apply_chain 重播並與新的 data.json 比對。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from timeline_case import TimelineTestCase  # 同時把 backend/ 加入 sys.path
+
+import delta
+import process_timeline
+import watch
+
+VIDEO_A = 'aaaaaaaaaaa'
+VIDEO_B = 'bbbbbbbbbbb'
+VIDEO_C = 'ccccccccccc'
+VIDEO_D = 'ddddddddddd'
+
+class DeltaChainTest(TimelineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data_path = os.path.join(self.root, 'data.json')
+        self.delta_dir = os.path.join(self.root, 'data', 'delta')
+        self.snapshots = {}  # 版本號 -> 該版的 data.json
+
+    def build(self, max_chain=delta.MAX_CHAIN):
+        """建置一版並回傳 (版本號, data.json)"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            songs = process_timeline.build_catalogue(self.timeline_dir)
+            previous = delta.read_snapshot(self.data_path)
+            process_timeline.write_data_json(songs, self.data_path)
+            version = delta.update_chain(previous, self.data_path, self.delta_dir, max_chain)
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        self.snapshots[version] = current
+        return version, current
+
+    def assert_replays(self, version, current):
+        """差異鏈涵蓋的舊版重播後都等於 current，早於差異鏈起點的舊版必須重抓（apply_chain 回傳 None）"""
+        manifest = delta.load_manifest(self.delta_dir)
+        self.assertEqual(manifest['version'], version)
+        start = manifest['deltas'][0]['from'] if manifest['deltas'] else version
+        for old_version, old in self.snapshots.items():
+            replayed = delta.apply_chain(old, old_version, self.delta_dir)
+            if old_version >= start:
+                self.assertEqual(replayed, current, f"replaying from version {old_version} to {version}")
+            else:
+                self.assertIsNone(replayed, f"version {old_version} is before the chain start {start}")
+
+    def delta_kinds(self):
+        kinds = set()
+        for entry in delta.load_manifest(self.delta_dir)['deltas']:
+            with open(os.path.join(self.delta_dir, entry['file']), 'r', encoding='utf-8') as f:
+                kinds |= set(json.load(f))
+        return kinds
+
+    def test_replay_reproduces_every_version(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha'), ('Song Two', 'Beta'), ('Song Three', 'Gamma')])
+        self.write_timeline('20250111', VIDEO_B, [('Song Two', 'Beta'), ('Song Four', 'Delta')])
+        self.assert_replays(*self.build())
+
+        # 新歌與既有歌曲的新演唱紀錄
+        self.write_timeline('20250118', VIDEO_C, [('Song Five', 'Epsilon'), ('Song One', 'Alpha')])
+        self.assert_replays(*self.build())
+
+        # 移除只出現在該場的歌，以及其他歌在該場的演唱紀錄
+        self.write_timeline('20250111', VIDEO_B, [('Song Six', 'Zeta')])
+        self.assert_replays(*self.build())
+
+        # 刪檔：整場的 is_private 改為 true，tags 變動
+        self.write_rules(private_ids=[VIDEO_A], tags=[('Song One', 'Alpha', 'anime')])
+        self.assert_replays(*self.build())
+
+        # 補上更早的歌單：既有歌曲的首次出現與整體順序改變
+        self.write_timeline('20241228', VIDEO_D, [('Song Five', 'Epsilon'), ('Song Seven', 'Eta')])
+        self.assert_replays(*self.build())
+
+        # 取消刪檔並移除第一場：is_private 改回、歌曲移除且順序再次改變
+        self.write_rules(tags=[('Song One', 'Alpha', 'anime')])
+        self.remove_timeline('20250104')
+        self.assert_replays(*self.build())
+
+        self.assertLessEqual({'songs_added', 'songs_removed', 'songs_updated', 'appearances_added',
+                              'appearances_removed', 'flags_changed', 'dates_replaced', 'order'}, self.delta_kinds())
+
+    def test_unchanged_build_keeps_version(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha')])
+        version, _ = self.build()
+        self.assertEqual(self.build()[0], version)
+        self.assertEqual(delta.apply_chain(self.snapshots[version], version, self.delta_dir), self.snapshots[version])
+
+    def test_truncated_chain_requires_refetch(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha')])
+        self.build(max_chain=2)
+        for n, date_str in enumerate(('20250111', '20250118', '20250125')):
+            self.write_timeline(date_str, VIDEO_B[:-1] + str(n), [(f'Song {n}', 'Beta'), ('Song One', 'Alpha')])
+            version, current = self.build(max_chain=2)
+            self.assert_replays(version, current)
+        manifest = delta.load_manifest(self.delta_dir)
+        self.assertEqual([entry['from'] for entry in manifest['deltas']], [2, 3])
+        self.assertEqual(sorted(os.listdir(self.delta_dir)), ['2-3.json', '3-4.json', delta.MANIFEST_NAME])
+        self.assertIsNone(delta.apply_chain(self.snapshots[1], 1, self.delta_dir))
+
+    def test_restart_from_base_snapshot(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha')])
+        self.build()
+        self.write_timeline('20250111', VIDEO_B, [('Song Two', 'Beta')])
+        self.assert_replays(*self.build())
+
+        # data.json 在差異鏈之外被改過：新版成為新的起點，之前的版本都必須重抓
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump([], f)
+        self.write_timeline('20250118', VIDEO_C, [('Song Three', 'Gamma')])
+        base_version, base = self.build()
+        self.assertEqual(delta.load_manifest(self.delta_dir)['deltas'], [])
+        self.assertEqual(os.listdir(self.delta_dir), [delta.MANIFEST_NAME])
+        self.assert_replays(base_version, base)
+
+        # 由重抓的起點繼續累積差異
+        self.write_timeline('20250125', VIDEO_D, [('Song Four', 'Delta'), ('Song One', 'Alpha')])
+        version, current = self.build()
+        self.assert_replays(version, current)
+        self.assertEqual(delta.apply_chain(base, base_version, self.delta_dir), current)
+        self.assertIsNone(delta.apply_chain(self.snapshots[1], 1, self.delta_dir))
+        self.assertEqual(sorted(os.listdir(self.delta_dir)), [f'{base_version}-{version}.json', delta.MANIFEST_NAME])
+
+    def test_watch_rebuild_continues_chain(self):
+        self.write_timeline('20250104', VIDEO_A, [('Song One', 'Alpha')])
+        self.build()
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = watch.CatalogueState(self.timeline_dir)
+
+        # watch 模式改寫 data.json 時一併接續差異鏈，之後的正式建置不必重新起算
+        self.write_timeline('20250111', VIDEO_B, [('Song Two', 'Beta')])
+        with contextlib.redirect_stdout(io.StringIO()):
+            watch.rebuild(state, self.data_path, {'20250111.txt'}, self.delta_dir)
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            self.snapshots[2] = json.load(f)
+        self.write_timeline('20250118', VIDEO_C, [('Song Three', 'Gamma'), ('Song One', 'Alpha')])
+        version, current = self.build()
+        self.assertEqual(version, 3)
+        self.assertEqual([entry['from'] for entry in delta.load_manifest(self.delta_dir)['deltas']], [1, 2])
+        self.assert_replays(version, current)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""output_writer.py：內容與現有檔案相同時不覆寫，寫到一半失敗時保留原檔。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import output_writer  # noqa: E402
+
+class OutputWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'data.json')
+        # 先清掉其他測試累計的統計
+        with contextlib.redirect_stdout(io.StringIO()):
+            output_writer.print_summary()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def summary(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            output_writer.print_summary()
+        return out.getvalue().strip()
+
+    def test_same_content_is_not_rewritten(self):
+        self.assertTrue(output_writer.write_json(self.path, {'songs': [1, 2]}, quiet=True))
+        os.utime(self.path, ns=(1, 1))
+        inode = os.stat(self.path).st_ino
+        self.assertFalse(output_writer.write_json(self.path, {'songs': [1, 2]}, quiet=True))
+        # 檔案本身沒被取代（修改時間與 inode 不變），也沒有留下暫存檔
+        self.assertEqual((os.stat(self.path).st_mtime_ns, os.stat(self.path).st_ino), (1, inode))
+        self.assertEqual(os.listdir(self.root), ['data.json'])
+
+        self.assertTrue(output_writer.write_json(self.path, {'songs': [1, 3]}, quiet=True))
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"songs": [1, 3]}')
+        self.assertEqual(self.summary(), "Output files: 2 written (34 bytes), 1 unchanged (17 bytes skipped)")
+        # print_summary 之後重新計算
+        self.assertEqual(self.summary(), '')
+
+    def test_same_size_different_content_is_written(self):
+        self.assertTrue(output_writer.write_bytes(self.path, b'abcd'))
+        self.assertTrue(output_writer.write_bytes(self.path, b'abce'))
+        self.assertFalse(output_writer.write_bytes(self.path, b'abce'))
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'abce')
+
+    def test_streamed_write_reports_its_own_result(self):
+        with output_writer.atomic_open(self.path, quiet=True) as f:
+            f.write('[1,')
+            f.write('2]')
+        self.assertTrue(f.written)
+        with output_writer.atomic_open(self.path, quiet=True) as f:
+            f.write('[1,2]')
+        self.assertFalse(f.written)
+
+    def test_failed_write_keeps_original(self):
+        output_writer.write_text(self.path, 'original', quiet=True)
+        with self.assertRaises(RuntimeError):
+            with output_writer.atomic_open(self.path, quiet=True) as f:
+                f.write('partial')
+                raise RuntimeError('interrupted')
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'original')
+        self.assertEqual(os.listdir(self.root), ['data.json'])
+
+    def test_concurrent_writers_get_their_own_results(self):
+        # getcomment 的各頻道執行緒同時寫各自的進度檔：每次呼叫回報的都是自己那次的結果
+        mismatches = []
+
+        def worker(n):
+            path = os.path.join(self.root, f'checkpoint{n}.json')
+            for i in range(50):
+                results = (output_writer.write_json(path, {'page': i}, quiet=True),
+                           output_writer.write_json(path, {'page': i}, quiet=True))
+                if results != (True, False):
+                    mismatches.append((n, i, results))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(mismatches, [])
+        self.assertTrue(self.summary().startswith("Output files: 200 written"))
+
+if __name__ == '__main__':
+    unittest.main()
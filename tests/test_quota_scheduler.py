@@ -0,0 +1,145 @@
+"""quota_scheduler.py：暫時性錯誤的退避重試、斷路器跳脫與配額用完時的行為。
+
+以假的 request 與 HttpError 模擬 API，sleep 換成記錄等待秒數，不實際等待也不連網。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from quota_scheduler import CircuitBreaker, CircuitOpen, QuotaExhausted, QuotaScheduler  # noqa: E402
+
+class FakeResponse(dict):
+    """HttpError.resp：httplib2.Response 是帶有 status 屬性的 dict"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+class FakeHttpError(Exception):
+    def __init__(self, status, reason=None, headers=None):
+        super().__init__(f"HTTP {status} {reason or ''}".strip())
+        self.resp = FakeResponse(status, headers)
+        self.content = json.dumps({'error': {'errors': [{'reason': reason}] if reason else []}}).encode('utf-8')
+
+class FakeRequest:
+    """依序拋出 outcomes 中的例外，用完後回傳 response"""
+
+    def __init__(self, *outcomes, response=None):
+        self.outcomes = list(outcomes)
+        self.response = response if response is not None else {'items': []}
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.outcomes:
+            raise self.outcomes.pop(0)
+        return self.response
+
+class QuotaSchedulerTest(unittest.TestCase):
+    def make_scheduler(self, quota=1000, failure_threshold=10, max_retries=5):
+        self.sleeps = []
+        return QuotaScheduler(quota=quota, rate=1000.0, max_retries=max_retries, backoff_base=1.0, backoff_cap=8.0,
+                              breaker=CircuitBreaker(failure_threshold), sleep=self.sleeps.append,
+                              rng=random.Random(0))
+
+    def execute(self, scheduler, request, name='channel'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scheduler.execute(name, request)
+
+    def test_transient_errors_are_retried_with_capped_backoff(self):
+        scheduler = self.make_scheduler()
+        request = FakeRequest(*(FakeHttpError(503) for _ in range(4)), response={'ok': True})
+        self.assertEqual(self.execute(scheduler, request), {'ok': True})
+        self.assertEqual(request.calls, 5)
+        # full jitter：第 n 次重試前等待 [0, min(cap, base * 2**n)] 秒
+        self.assertEqual(len(self.sleeps), 4)
+        for attempt, delay in enumerate(self.sleeps):
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(8.0, 2 ** attempt))
+        usage = scheduler.usage['channel']
+        self.assertEqual((usage.calls, usage.units, usage.retries), (5, 5, 4))
+        self.assertEqual(scheduler.used, 5)
+        # 成功後連續失敗次數歸零
+        self.assertEqual(scheduler.breaker.failures, 0)
+        self.assertFalse(scheduler.breaker.tripped)
+
+    def test_retry_after_sets_minimum_delay(self):
+        scheduler = self.make_scheduler()
+        self.execute(scheduler, FakeRequest(FakeHttpError(429, 'rateLimitExceeded', {'retry-after': '5'})))
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertGreaterEqual(self.sleeps[0], 5)
+        # Retry-After 也不超過上限
+        self.execute(scheduler, FakeRequest(FakeHttpError(429, None, {'retry-after': '120'})))
+        self.assertEqual(self.sleeps[1], 8.0)
+
+    def test_gives_up_after_max_retries(self):
+        scheduler = self.make_scheduler(max_retries=2)
+        request = FakeRequest(*(FakeHttpError(500) for _ in range(5)))
+        with self.assertRaises(FakeHttpError):
+            self.execute(scheduler, request)
+        self.assertEqual(request.calls, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertFalse(scheduler.breaker.tripped)
+
+    def test_other_errors_are_not_retried(self):
+        scheduler = self.make_scheduler()
+        request = FakeRequest(FakeHttpError(404, 'notFound'))
+        with self.assertRaises(FakeHttpError):
+            self.execute(scheduler, request)
+        self.assertEqual((request.calls, self.sleeps, scheduler.breaker.failures), (1, [], 0))
+
+    def test_consecutive_failures_across_channels_trip_the_breaker(self):
+        scheduler = self.make_scheduler(failure_threshold=4, max_retries=1)
+        # 每個頻道失敗兩次（第一次重試仍失敗），第二個頻道的第二次失敗累計到 4 次
+        with self.assertRaises(FakeHttpError):
+            self.execute(scheduler, FakeRequest(FakeHttpError(503), FakeHttpError(503)), 'first')
+        self.assertFalse(scheduler.breaker.tripped)
+        with self.assertRaises(FakeHttpError):
+            self.execute(scheduler, FakeRequest(FakeHttpError(503), FakeHttpError(503)), 'second')
+        self.assertTrue(scheduler.breaker.tripped)
+        self.assertEqual(len(self.sleeps), 2)  # 跳脫的那次失敗不再重試
+
+        # 跳脫後所有頻道的呼叫都不再送出，也不扣配額
+        used = scheduler.used
+        request = FakeRequest()
+        with self.assertRaises(CircuitOpen) as raised:
+            self.execute(scheduler, request, 'third')
+        self.assertNotIsInstance(raised.exception, QuotaExhausted)
+        self.assertEqual((request.calls, scheduler.used), (0, used))
+
+    def test_success_resets_failure_count(self):
+        scheduler = self.make_scheduler(failure_threshold=3, max_retries=1)
+        for _ in range(3):
+            # 每次都是失敗一次後成功：連續失敗次數不會累積到門檻
+            self.execute(scheduler, FakeRequest(FakeHttpError(502)))
+        self.assertFalse(scheduler.breaker.tripped)
+
+    def test_api_quota_error_trips_immediately(self):
+        scheduler = self.make_scheduler()
+        request = FakeRequest(FakeHttpError(403, 'quotaExceeded'))
+        with self.assertRaises(QuotaExhausted):
+            self.execute(scheduler, request)
+        self.assertEqual((request.calls, self.sleeps), (1, []))
+        self.assertTrue(scheduler.breaker.quota)
+        with self.assertRaises(QuotaExhausted):
+            self.execute(scheduler, FakeRequest(), 'other')
+
+    def test_local_quota_is_enforced(self):
+        scheduler = self.make_scheduler(quota=2)
+        self.execute(scheduler, FakeRequest())
+        self.execute(scheduler, FakeRequest())
+        request = FakeRequest()
+        with self.assertRaises(QuotaExhausted):
+            self.execute(scheduler, request)
+        self.assertEqual((request.calls, scheduler.used, scheduler.remaining()), (0, 2, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""setlists.py：每場直播依歌單行序排列，同一天的多場依檔名排列，日期區間查詢與標記位元。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import unittest
+
+from timeline_case import TimelineTestCase  # 同時把 backend/ 加入 sys.path
+
+import process_timeline
+import setlists
+from process_timeline import Appearance, Song
+
+VIDEO_A = 'aaaaaaaaaaa'
+VIDEO_B = 'bbbbbbbbbbb'
+VIDEO_C = 'ccccccccccc'
+
+class SetlistsTest(TimelineTestCase):
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            songs = process_timeline.build_catalogue(self.timeline_dir)
+        return [song.song_name for song in songs], setlists.build_setlists(songs)
+
+    def stream_names(self, names, stream):
+        return [names[song_id] for song_id in stream['songs']]
+
+    def test_streams_follow_timeline_order(self):
+        # 行序與 data.json 的歌曲順序不同，同一場中重複演唱的歌各自保留
+        self.write_timeline('20250104', VIDEO_A, [('Zulu', 'Alpha'), ('Bravo', 'Beta'), ('Mike', 'Gamma'),
+                                                  ('Bravo', 'Beta')])
+        self.write_timeline('20250104_2', VIDEO_B, [('Mike', 'Gamma'), ('Alpha', 'Delta')])
+        self.write_timeline('20250111', VIDEO_C, [('Alpha', 'Delta'), ('Zulu', 'Alpha')])
+        self.write_rules(private_ids=[VIDEO_B])
+        names, index = self.build()
+
+        self.assertEqual(index['dates'], ['20250104', '20250111'])
+        self.assertEqual(index['offsets'], [0, 2, 3])
+        streams = index['streams']
+        self.assertEqual([stream['video_id'] for stream in streams], [VIDEO_A, VIDEO_B, VIDEO_C])
+        self.assertEqual(self.stream_names(names, streams[0]), ['Zulu', 'Bravo', 'Mike', 'Bravo'])
+        self.assertEqual(streams[0]['seconds'], [300, 600, 900, 1200])
+        self.assertEqual(self.stream_names(names, streams[1]), ['Mike', 'Alpha'])
+        self.assertEqual(self.stream_names(names, streams[2]), ['Alpha', 'Zulu'])
+        self.assertEqual(index['videos'], {VIDEO_A: [0], VIDEO_B: [1], VIDEO_C: [2]})
+
+        self.assertEqual(streams[0]['flags'], [0, 0, 0, 0])
+        self.assertEqual(streams[1]['flags'], [setlists.FLAG_PRIVATE] * 2)
+
+        self.assertEqual(setlists.streams_on(index, '20250104'), range(0, 2))
+        self.assertEqual(setlists.streams_on(index, '20250105'), range(2, 2))
+        self.assertEqual(setlists.streams_between(index, '20250101', '20250110'), range(0, 2))
+        self.assertEqual(setlists.streams_between(index, '20250105', '20251231'), range(2, 3))
+        self.assertEqual(setlists.streams_between(index, '20240101', '20241231'), range(0, 0))
+
+    def test_appearances_without_position_fall_back_to_seconds(self):
+        first = Song(('b', 'x'), 'B', 'X', '', False, 'B')
+        second = Song(('a', 'x'), 'A', 'X', '', False, 'A')
+        first.add_appearance(Appearance('20250104', '00:20:00', VIDEO_A, 1200, is_acapella=True))
+        second.add_appearance(Appearance('20250104', '00:05:00', VIDEO_A, 300, is_member_exclusive=True))
+        second.add_appearance(Appearance('20250104', '00:30:00', VIDEO_A, 1800))
+        index = setlists.build_setlists([first, second])
+        self.assertEqual(index['streams'], [{
+            'date': '20250104',
+            'video_id': VIDEO_A,
+            'songs': [1, 0, 1],
+            'seconds': [300, 1200, 1800],
+            'flags': [setlists.FLAG_MEMBER_EXCLUSIVE, setlists.FLAG_ACAPELLA, 0],
+        }])
+
+if __name__ == '__main__':
+    unittest.main()
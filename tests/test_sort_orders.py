@@ -0,0 +1,101 @@
+"""sort_orders.py：預先排好的順序必須與網頁 js/form-generation.js 的比較函式排出的順序相同。
+
+以 timeline/ 建置歌曲列表並寫出 data.json，在 node 中直接執行網頁的比較函式排序後逐欄比對；
+沒有安裝 node 時略過。
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+import process_timeline  # noqa: E402
+import sort_orders  # noqa: E402
+
+# 取出 js/form-generation.js 需要的常數與函式原始碼，
+# 對 data.json 依網頁的流程先做預設排序，再以 sortData() 排各欄位
+NODE_SCRIPT = r"""
+import fs from 'fs';
+import { pathToFileURL } from 'url';
+const [formPath, romajiPath, dataPath] = process.argv.slice(1);
+const { convert_jp } = await import(pathToFileURL(romajiPath).href);
+const src = fs.readFileSync(formPath, 'utf8');
+function block(start, open) {
+    const i = src.indexOf(start);
+    if (i < 0) throw new Error(`${start} not found in ${formPath}`);
+    const close = open === '{' ? '}' : ')';
+    // 函式本體從參數列之後的 ") {" 開始（預設參數裡也可能有大括號）
+    let depth = 0, j = open === '{' ? src.indexOf(') {', i) + 2 : i + start.length - 1;
+    for (; j < src.length; j++) {
+        if (src[j] === open) depth++;
+        else if (src[j] === close && --depth === 0) break;
+    }
+    return src.slice(i, j + 1);
+}
+const constants = src.match(/^const [A-Z_]+ = \/.*\/;$/gm).join('\n');
+const functions = ['sanitizeInput', 'normalizeString', 'getCharacterType', 'getSortWeight',
+                   'getJapaneseSortKey', 'sortData'].map(name => block(`function ${name}(`, '{')).join('\n');
+const comparator = block('filteredData.sort(', '(').slice('filteredData.sort'.length + 1, -1);
+const lib = new Function('convert_jp', `${constants}\n${functions}\n` +
+    `return { sortData, normalizeString, compareDefault: ${comparator} };`)(convert_jp);
+const data = JSON.parse(fs.readFileSync(dataPath, 'utf8')).map((song, id) => ({
+    ...song, _id: id,
+    _normArtist: lib.normalizeString(song.artist || ''),
+    _normSource: lib.normalizeString(song.source || ''),
+}));
+const byDefault = [...data].sort(lib.compareDefault);
+const result = { song_name: byDefault.map(song => song._id) };
+for (const column of ['az', 'artist', 'source', 'dates']) {
+    result[column] = {};
+    for (const reverse of [false, true]) {
+        result[column][reverse ? 'desc' : 'asc'] = lib.sortData(byDefault, { column, reverse }).map(song => song._id);
+    }
+}
+process.stdout.write(JSON.stringify(result));
+"""
+
+
+@unittest.skipUnless(shutil.which('node'), 'node is not installed')
+class FrontendOrderTest(unittest.TestCase):
+    def setUp(self):
+        # readings.py 以相對路徑讀取 js/romaji.js
+        self.cwd = os.getcwd()
+        os.chdir(ROOT_DIR)
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def frontend_orders(self, data_path):
+        result = subprocess.run([shutil.which('node'), '--input-type=module', '-e', NODE_SCRIPT,
+                                 os.path.join(ROOT_DIR, 'js', 'form-generation.js'),
+                                 os.path.join(ROOT_DIR, 'js', 'romaji.js'), data_path],
+                                capture_output=True, text=True, encoding='utf-8', check=True)
+        return json.loads(result.stdout)
+
+    def test_orders_match_frontend_comparator(self):
+        data_path = os.path.join(self.root, 'data.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            songs = process_timeline.build_catalogue(os.path.join(ROOT_DIR, 'timeline'))
+            process_timeline.write_data_json(songs, data_path)
+        columns = sort_orders.compute_orders(songs)
+        self.assertEqual(sort_orders.verify_orders(songs, columns), [])
+
+        expected = self.frontend_orders(data_path)
+        self.assertEqual(columns['song_name']['asc'], expected.pop('song_name'), 'song_name')
+        for column, orders in expected.items():
+            for direction, order in orders.items():
+                self.assertEqual(columns[column][direction], order, f"{column}/{direction}")
+
+if __name__ == '__main__':
+    unittest.main()
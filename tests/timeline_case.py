@@ -0,0 +1,45 @@
+"""測試共用：在暫存資料夾中建立 timeline/（規則檔與合成歌單）。
+
+歌單日期需晚於 OLD_RULE_DATE（20240120），才會以目前的 `編號. 時間 曲名 / 歌手` 格式解析。
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+class TimelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.timeline_dir = os.path.join(self.root, 'timeline')
+        os.makedirs(self.timeline_dir)
+        self.write_rules()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_rules(self, private_ids=(), tags=()):
+        rules = {
+            'exceptions.txt': f"private_id|{','.join(private_ids)}\n" if private_ids else '',
+            'acapella.txt': '',
+            'headers.txt': '',
+            'tags.txt': ''.join(f"{song_name}|{artist}|{tag}\n" for song_name, artist, tag in tags),
+        }
+        for name, content in rules.items():
+            with open(os.path.join(self.timeline_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    def write_timeline(self, date_str, video_id, songs):
+        """songs 為 [(曲名, 歌手)]，第 i 首的時間為 i * 5 分鐘；date_str 可帶 _2 等後綴"""
+        lines = [f'ID = {video_id}', '💐🌟🎶タイムスタンプ💐🌟🎶']
+        for i, (song_name, artist) in enumerate(songs, 1):
+            seconds = 300 * i
+            lines.append(f"{i:02d}.    {seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}    "
+                         f"{song_name} / {artist}")
+        with open(os.path.join(self.timeline_dir, f'{date_str}.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def remove_timeline(self, date_str):
+        os.remove(os.path.join(self.timeline_dir, f'{date_str}.txt'))